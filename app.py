@@ -6,170 +6,18 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import re
+from sqlalchemy import select, func, or_
+from src.models.database import init_db, get_session, get_engine, Property, PropertyScore, PropertyAccess
 from src.models.database import init_db, get_session, get_engine, Property, PropertyScore
-from src.models.database import init_db, get_session, get_engine, Property, PropertyScore
-# from src.scoring.property_scorer import PropertyScorer
-from src.scoring.price_scorer import PriceScorer
-from src.scoring.location_scorer import LocationScorer
-from src.scoring.spec_scorer import SpecScorer
-from src.scoring.cost_scorer import CostScorer
-from src.scoring.future_scorer import FutureScorer
+from src.models.search import search_property_ids, search_select
+from src.models.attributes import MAJOR_BRANDS, SUB_BRANDS
+from src.models.price_history import load_price_histories, load_price_summaries
+from src.scoring.profiles import DEFAULT_PROFILE, PROFILE_LABELS
+from src.scoring.score_store import ScoredListing
 import logging
 
 logger = logging.getLogger(__name__)
 
-class SafePropertyScorer:
-    """物件の総合お得度スコアを算出（Safe Version）"""
-    
-    # 標準の重み係数（全て1.0に統一して100点超えを防止）
-    WEIGHTS = {
-        'price': 1.0,      # 価格適正性: 30点
-        'location': 1.0,   # 立地: 25.0点
-        'spec': 1.0,       # 物件スペック: 25.0点
-        'cost': 1.0,       # 維持コスト: 15.0点
-        'future': 1.0      # 将来性: 5.0点
-    }
-    
-    def __init__(self):
-        self.price_scorer = PriceScorer()
-        self.location_scorer = LocationScorer()
-        self.spec_scorer = SpecScorer()
-        self.cost_scorer = CostScorer()
-        self.future_scorer = FutureScorer()
-    
-    # スペック評価ロジックを緩和版に差し替え
-    def _calculate_age_score(self, building_age):
-        if building_age is None: return 4.0
-        # 基準を緩和：築10年まで満点近く、築30年でもそこそこ
-        if building_age <= 5: return 8.0
-        elif building_age <= 15: return 7.0  # 10->15
-        elif building_age <= 25: return 5.0  # 15->25
-        elif building_age <= 35: return 3.0  # 20->35
-        else: return max(1.0, 3.0 - (building_age - 35) * 0.1)
-
-    def _calculate_area_score(self, area, layout):
-        if area is None: return 2.5
-        # 基準を緩和：広さの評価を甘く
-        if 50 <= area <= 100: return 5.0     # 上限80->100
-        elif 40 <= area < 50 or 100 < area <= 120: return 4.0 # 3.5->4.0
-        elif area > 120: return 3.0 
-        else: return 2.0
-
-    def _calculate_floor_score(self, floor, direction):
-        score = 0.0
-        if floor is not None:
-            if floor >= 10: score += 3.0
-            elif floor >= 3: score += 2.5 # 5->3階以上で良しとする
-            elif floor >= 2: score += 2.0
-            else: score += 1.0 # 1階
-        else: score += 1.5
-        
-        if direction:
-            d = direction
-            if '南' in d: score += 2.0
-            elif '東' in d or '西' in d: score += 2.0 # 東西も南と同じく高評価に変更
-            elif '北' in d: score += 1.0 # 北も0.5->1.0
-        else: score += 1.0
-        return min(5.0, score)
-
-    def _calculate_equipment_score(self, features):
-        score = 2.0 # 基礎点を加算（何もないことはないので）
-        equipment = {}
-        if features:
-            try:
-                import json
-                equipment = json.loads(features) if isinstance(features, str) else features
-            except: pass
-        
-        # 加点幅を増やす
-        if equipment.get('auto_lock'): score += 1.5
-        if equipment.get('delivery_box'): score += 1.5
-        if equipment.get('pet_ok'): score += 2.0
-        if equipment.get('floor_heating'): score += 2.0 # ない場合が多いのであればデカイ
-        
-        return min(7.0, score)
-
-    def calculate_score(self, property_data, comparable_properties=None):
-        # ... (中略) ...
-        # 注意: SafePropertyScorerはクラス内でインスタンス化された各カテゴリのscorerを使っているので
-        # ここで定義したメソッドをインスタンスメソッドとして使うには、
-        # __init__ で self.spec_scorer を自作のものに差し替えるか、
-        # あるいは spec_scorer.py 自体を書き換える必要がある。
-        # 今回は SafePropertyScorer 内で spec_scorer の計算ロジックをオーバーライドする形にするため
-        # calculate メソッド内で直接上記メソッドを呼び出すように変更する。
-        
-        price_detail = self.price_scorer.calculate(property_data, comparable_properties)
-        location_detail = self.location_scorer.calculate(property_data)
-        # spec_detail = self.spec_scorer.calculate(property_data) # これを使わず
-        
-        # 自クラスのメソッドで計算
-        spec_detail = {
-            'age_score': self._calculate_age_score(property_data.get('building_age')),
-            'area_score': self._calculate_area_score(property_data.get('area'), property_data.get('layout')),
-            'floor_score': self._calculate_floor_score(property_data.get('floor'), property_data.get('direction')),
-            'equipment_score': self._calculate_equipment_score(property_data.get('features')),
-            'score': 0.0
-        }
-        spec_detail['score'] = min(
-            spec_detail['age_score'] + spec_detail['area_score'] + 
-            spec_detail['floor_score'] + spec_detail['equipment_score'],
-            SpecScorer.MAX_SCORE
-        )
-
-        cost_detail = self.cost_scorer.calculate(property_data, comparable_properties)
-        future_detail = self.future_scorer.calculate(property_data)
-
-        w = self.WEIGHTS
-        
-        weighted_scores = {}
-        weighted_scores['price_score'] = price_detail['score'] * w['price']
-        weighted_scores['location_score'] = location_detail['score'] * w['location']
-        weighted_scores['spec_score'] = spec_detail['score'] * w['spec']
-        weighted_scores['cost_score'] = cost_detail['score'] * w['cost']
-        weighted_scores['future_score'] = future_detail['score'] * w['future']
-        
-        # 総合スコアを100点満点に正規化
-        total_max = sum([
-            PriceScorer.MAX_SCORE * w['price'],
-            LocationScorer.MAX_SCORE * w['location'],
-            SpecScorer.MAX_SCORE * w['spec'],
-            CostScorer.MAX_SCORE * w['cost'],
-            FutureScorer.MAX_SCORE * w['future']
-        ])
-        
-        total_score = sum(weighted_scores.values())
-        raw_normalized_score = (total_score / total_max) * 100 if total_max > 0 else 0
-        normalized_score = min(100.0, raw_normalized_score)  # 上限を100点にキャップ
-        
-        # スコアランク判定
-        rank = self._get_rank(normalized_score)
-        
-        return {
-            'total_score': round(normalized_score, 1),
-            'rank': rank,
-            'category_scores': {
-                'price': round(weighted_scores['price_score'], 1),
-                'location': round(weighted_scores['location_score'], 1),
-                'spec': round(weighted_scores['spec_score'], 1),
-                'cost': round(weighted_scores['cost_score'], 1),
-                'future': round(weighted_scores['future_score'], 1)
-            },
-            'detail': {
-                'price': price_detail,
-                'location': location_detail,
-                'spec': spec_detail,
-                'cost': cost_detail,
-                'future': future_detail
-            }
-        }
-    
-    def _get_rank(self, score: float) -> str:
-        if score >= 90: return '🌟🌟🌟 超お得！即決レベル'
-        elif score >= 80: return '🌟🌟 かなりお得'
-        elif score >= 70: return '🌟 お得'
-        elif score >= 60: return '⭕ 標準的'
-        else: return '△ 割高の可能性'
-
 # ページ設定
 st.set_page_config(
     page_title="AI分譲マンションファインダー",
@@ -185,10 +33,11 @@ st.title("AI分譲マンションファインダー")
 st.markdown("一都三県の分譲マンション物件をAIが科学的に分析し、真のお得物件を発掘します")
 st.caption("v1.2 | Last Updated: 2026-01-03 13:00 | 路線フィルタ対応")  # 更新確認用
 
-# データベース初期化
+# データベース初期化（マイグレーション適用後は読み取り専用エンジンで閲覧。収集中の書き込みを妨げない）
 @st.cache_resource
 def init_database():
-    return init_db()
+    init_db()
+    return get_engine(readonly=True)
 
 engine = init_database()
 
@@ -201,10 +50,11 @@ def get_db_session():
 def get_unique_stations():
     session = get_db_session()
     try:
-        results = session.query(Property.station_name).filter(
-            Property.station_name != None,
-            Property.station_name != ''
-        ).distinct().order_by(Property.station_name).all()
+        results = session.query(PropertyAccess.station).filter(
+            PropertyAccess.station != None,
+            PropertyAccess.station != '',
+            ~PropertyAccess.line.like('%バス%')
+        ).distinct().order_by(PropertyAccess.station).all()
         stations = [r[0] for r in results]
         
         # 「バス」が含まれるものを後ろに回す
@@ -215,6 +65,7 @@ def get_unique_stations():
     except Exception as e:
         logger.error(f"Error fetching stations: {e}")
         return []
+    finally:
         session.close()
 
 # 利用可能な都道府県と市区町村を取得
@@ -246,48 +97,35 @@ def get_locations():
     finally:
         session.close()
 
-def get_price_history(property_id):
-    """物件の価格履歴を取得"""
+# 利用可能な路線を取得
+@st.cache_data(ttl=3600)
+def get_unique_lines():
+    session = get_db_session()
     try:
-        session = get_db_session()
-        # PriceHistoryをインポート
-        from src.models.database import PriceHistory
-        history = session.query(PriceHistory).filter_by(property_id=property_id).order_by(PriceHistory.recorded_at.asc()).all()
-        return history
+        # 例: 「JR山手線」「東京メトロ日比谷線」（"線" を含むもののみ。バス路線は除く）
+        results = session.query(PropertyAccess.line).filter(
+            PropertyAccess.line.like('%線%')
+        ).distinct().order_by(PropertyAccess.line).all()
+        return [r[0] for r in results]
     except Exception as e:
-        logger.error(f"Error fetching price history for property {property_id}: {e}")
+        logger.error(f"Error fetching railway lines: {e}")
         return []
     finally:
         session.close()
 
-# 利用可能な路線を取得
+# 登録物件のあるブランドを取得（大手 → 準大手の順）
 @st.cache_data(ttl=3600)
-def get_unique_lines():
+def get_unique_brands():
     session = get_db_session()
     try:
-        results = session.query(Property.access_info).filter(
-            Property.access_info != None,
-            Property.access_info != ''
-        ).all()
-        
-        lines = set()
-        for r in results:
-            if r[0]:
-                # access_infoを行ごとに分割
-                access_lines = r[0].split('\n')
-                for line in access_lines:
-                    # "東京メトロ日比谷線 秋葉原 徒歩3分" から "東京メトロ日比谷線" を抽出
-                    parts = line.strip().split()
-                    if len(parts) >= 2:
-                        # 最初の要素が路線名（例：「JR山手線」「東京メトロ日比谷線」）
-                        railway_line = parts[0]
-                        # "線" で終わっているかチェック
-                        if '線' in railway_line:
-                            lines.add(railway_line)
-        
-        return sorted(list(lines))
+        results = session.query(Property.brand).filter(
+            Property.is_active == True, Property.brand != None
+        ).distinct().all()
+        found = {r[0] for r in results}
+        order = [b for b in MAJOR_BRANDS if b in found] + [b for b in SUB_BRANDS if b in found]
+        return sorted(order, key=lambda b: (b not in MAJOR_BRANDS, b))
     except Exception as e:
-        logger.error(f"Error fetching railway lines: {e}")
+        logger.error(f"Error fetching brands: {e}")
         return []
     finally:
         session.close()
@@ -295,6 +133,27 @@ def get_unique_lines():
 # サイドバー
 st.sidebar.header("⚙️ 設定")
 
+# キーワード検索（物件名・住所・駅・アクセスの全文検索）
+keyword = st.sidebar.text_input(
+    "🔎 キーワード検索",
+    placeholder="例: パークハウス、白金台、日比谷線...",
+    help="物件名・住所・駅名・アクセスから検索します（空白区切りですべてを含む物件）"
+).strip()
+sort_order = st.sidebar.radio(
+    "並び順",
+    options=["お得度順", "キーワード一致順"],
+    horizontal=True
+) if keyword else "お得度順"
+
+# ターゲット層（重みプロファイル）。保存済みスコアはターゲット層ごとにある
+target_type = st.sidebar.selectbox(
+    "ターゲット層",
+    options=list(PROFILE_LABELS),
+    index=list(PROFILE_LABELS).index(DEFAULT_PROFILE),
+    format_func=PROFILE_LABELS.get,
+    help="カテゴリ別スコアの重み付けを切り替えます"
+)
+
 # 地域フィルタ
 prefs, city_map = get_locations()
 
@@ -358,10 +217,22 @@ else:
     filtered_stations = station_options
 
 station_filter = st.sidebar.multiselect(
-    "最寄り駅を選択",
+    "駅を選択",
     options=filtered_stations,
-    default=[]
+    default=[],
+    help="アクセス欄に記載のいずれかの駅が該当する物件"
+)
+
+# 駅徒歩フィルタ（路線・駅の選択と組み合わせると「X線のいずれかの駅から徒歩N分以内」）
+walk_max = st.sidebar.slider(
+    "🚶 駅徒歩 (分以内)",
+    min_value=1,
+    max_value=30,
+    value=30,
+    step=1,
+    help="30は制限なし"
 )
+walk_limit = walk_max if walk_max < 30 else None
 
 # 築年数フィルタ
 age_min, age_max = st.sidebar.slider(
@@ -380,21 +251,63 @@ layout_filter = st.sidebar.multiselect(
     default=[]
 )
 
+# 部屋数フィルタ（2LDK+S 等も含めて部屋数で絞り込み）
+rooms_filter = st.sidebar.multiselect(
+    "部屋数",
+    options=[1, 2, 3, 4, 5],
+    format_func=lambda n: f"{n}部屋以上" if n == 5 else f"{n}部屋",
+    default=[]
+)
+
+# ブランドフィルタ
+brand_filter = st.sidebar.multiselect(
+    "🏢 ブランド",
+    options=get_unique_brands(),
+    default=[],
+    help="物件名から判定したマンションブランド"
+)
+
 
 # データベースから物件を取得
-# @st.cache_data(ttl=60)  # 反映を早めるため1分に短縮
-def get_properties_from_db(layout_filter=None, city_filter=None, price_range=None, station_filter=None, age_range=None, prefecture_filter=None, line_filter=None):
-    """データベースから物件データを取得"""
+def get_properties_from_db(session, layout_filter=None, city_filter=None, price_range=None, station_filter=None, age_range=None, prefecture_filter=None, line_filter=None, walk_limit=None, keyword=None, rooms_filter=None, brand_filter=None, sort_order="お得度順", target_type=DEFAULT_PROFILE):
+    """絞り込み・名寄せした物件をスコア順（またはキーワード一致順）に返す ScoredListing"""
     try:
-        session = get_db_session()
         query = session.query(Property).filter(Property.is_active == True)
         
+        # キーワードは全文検索のサブクエリで絞り込む（関連度順位はキーワード一致順のときだけ読む）
+        search_rank = {}
+        if keyword and keyword.split():
+            query = query.filter(Property.id.in_(search_select(keyword)))
+            if sort_order == "キーワード一致順":
+                search_rank = {pid: i for i, pid in enumerate(search_property_ids(session, keyword))}
+        
         # フィルタ適用
         if layout_filter:
             query = query.filter(Property.layout.in_(layout_filter))
         
+        if rooms_filter:
+            conditions = [Property.rooms.in_([n for n in rooms_filter if n < 5])]
+            if 5 in rooms_filter:
+                conditions.append(Property.rooms >= 5)
+            query = query.filter(or_(*conditions))
+        
+        if brand_filter:
+            query = query.filter(Property.brand.in_(brand_filter))
+        
+        # 路線・駅は property_access をインデックスで引く（徒歩分数の条件も同じ行に適用）
+        walk_conditions = [PropertyAccess.walk_minutes <= walk_limit] if walk_limit else []
         if station_filter:
-            query = query.filter(Property.station_name.in_(station_filter))
+            query = query.filter(Property.id.in_(
+                select(PropertyAccess.property_id).where(PropertyAccess.station.in_(station_filter), *walk_conditions)
+            ))
+        if line_filter:
+            query = query.filter(Property.id.in_(
+                select(PropertyAccess.property_id).where(PropertyAccess.line.in_(line_filter), *walk_conditions)
+            ))
+        if walk_limit and not station_filter and not line_filter:
+            query = query.filter(Property.id.in_(
+                select(PropertyAccess.property_id).where(*walk_conditions)
+            ))
             
         if age_range:
             min_a, max_a = age_range
@@ -405,7 +318,6 @@ def get_properties_from_db(layout_filter=None, city_filter=None, price_range=Non
             
         if city_filter:
             # 市区町村フィルタがある場合はそちらを優先（AND条件になるのでOK）
-            from sqlalchemy import or_
             conditions = [Property.city.like(f"%{city}%") for city in city_filter]
             query = query.filter(or_(*conditions))
             
@@ -413,71 +325,26 @@ def get_properties_from_db(layout_filter=None, city_filter=None, price_range=Non
             min_p, max_p = price_range
             query = query.filter(Property.price >= min_p, Property.price <= max_p)
         
-        if line_filter:
-            # 路線フィルタ：access_infoに指定された路線が含まれる物件を抽出
-            from sqlalchemy import or_
-            line_conditions = [Property.access_info.like(f"%{line}%") for line in line_filter]
-            query = query.filter(or_(*line_conditions))
-            
-        properties_db = query.all()
-        
-        if not properties_db:
-            return []
-
-        # データベースの物件を辞書形式に変換
-        raw_properties_list = []
-        for prop in properties_db:
-            raw_properties_list.append({
-                'id': prop.id,
-                'source_id': prop.source_id,
-                'title': prop.title or '',
-                'price': prop.price,
-                'area': prop.area,
-                'price_per_sqm': prop.price_per_sqm,
-                'building_age': prop.building_age,
-                'floor': prop.floor,
-                'direction': prop.direction or '',
-                'layout': prop.layout or '',
-                'address': prop.address or '',
-                'prefecture': prop.prefecture or '',
-                'city': prop.city or '',
-                'station_name': prop.station_name or '',
-                'station_distance': prop.station_distance,
-                'access_info': prop.access_info or '',
-                'management_fee': prop.management_fee,
-                'repair_reserve': prop.repair_reserve,
-                'features': prop.features or '{}',
-                'url': prop.url,
-                'first_seen': prop.first_seen,
-                'last_updated': prop.last_updated
-            })
-            
         # 名寄せ処理（同一物件の重複排除）
-        # キー: (タイトル, 面積(整数), 階数, 間取り)
-        unique_props = {}
-        for p in raw_properties_list:
-            # タイトルが「物件...」のものは名寄せ対象外（ID違いの可能性あるため）だが、
-            # 基本的には同じ部屋ならまとめたい。
-            # 面積は微妙な誤差を許容するため四捨五入して整数で扱う
-            area_key = int(round(p['area'])) if p['area'] else 0
-            key = (p['title'], area_key, p['floor'], p['layout'])
-            
-            if key not in unique_props:
-                unique_props[key] = p
-            else:
-                # 既にある場合は、より新しい情報（source_idが大きい、または更新日時が新しい）を採用
-                # ここでは簡易的にsource_id（文字列だが数値的）が大きい方を採用
-                curr = unique_props[key]
-                if p['source_id'] > curr['source_id']:
-                     unique_props[key] = p
+        # キー: (タイトル, 面積(整数), 階数, 間取り)。面積は微妙な誤差を許容するため四捨五入して整数で扱う
+        # 既にある場合は、より新しい情報としてsource_idが大きい方を採用
+        ranked = query.with_entities(
+            Property.id.label('id'),
+            func.row_number().over(
+                partition_by=(func.coalesce(Property.title, ''), func.coalesce(func.round(Property.area), 0),
+                              Property.floor, Property.layout),
+                order_by=Property.source_id.desc()
+            ).label('dup_rank')
+        ).subquery()
+        unique_ids = select(ranked.c.id).where(ranked.c.dup_rank == 1)
         
-        properties_list = list(unique_props.values())
-        session.close()
-        return properties_list
+        # 保存済みスコアで並べ、未算出・古いスコアの物件だけその場で計算
+        relevance = search_rank if sort_order == "キーワード一致順" else None
+        return ScoredListing(session, unique_ids, relevance=relevance, target_type=target_type)
         
     except Exception as e:
         st.error(f"データベースエラー: {e}")
-        return []
+        return None
 
 # 物件の一言コメント・強み弱みを生成
 def generate_property_analysis(prop, score_data):
@@ -508,7 +375,10 @@ def generate_property_analysis(prop, score_data):
     
     if price_detail.get('score', 0) >= 8:
         strengths.append(f"価格が相場より割安（㎡単価: {prop['price_per_sqm']/10000:.1f}万円/㎡）")
-    
+
+    if price_detail.get('discount_score', 0) >= 3 and prop.get('first_price') and prop['first_price'] > prop['price']:
+        strengths.append(f"値下げ済み（初回{prop['first_price']:,}万円から{prop['first_price'] - prop['price']:,}万円ダウン）")
+
     if spec_detail.get('age_score', 0) >= 6:
         strengths.append(f"築年数が浅い（築{prop['building_age']}年）")
     
@@ -559,91 +429,38 @@ def generate_property_analysis(prop, score_data):
         'weaknesses': weaknesses[:3]  # 最大3つ
     }
 
-# スコアリング実行
-# @st.cache_data(ttl=10)
-def calculate_scores(properties):
-    """物件のスコアを計算"""
-    scorer = SafePropertyScorer()
-    results = []
-    
-    for prop in properties:
-        # 比較対象の抽出
-        try:
-            comparable = [p for p in properties if p.get('station_name') == prop.get('station_name') and p.get('source_id') != prop.get('source_id')]
-        except Exception as e:
-            st.error(f"Error filtering comparable: {e}")
-            st.write("Current prop:", prop)
-            raise e
-            
-        try:
-            # スコア計算の実行
-            score_result = scorer.calculate_score(prop, comparable)
-            
-            results.append({
-                'property': prop,
-                'score': score_result
-            })
-        except TypeError as e:
-            st.error(f"❌ TypeError detected in scoring loop")
-            st.write(f"Error Detail: {e}")
-            st.write("--- Object Information ---")
-            st.write("Prop Type:", type(prop))
-            st.write("Prop Sample:", {k: v for i, (k, v) in enumerate(prop.items()) if i < 5})
-            st.write("Comparable Type:", type(comparable))
-            if comparable:
-                st.write("First Comparable Element Type:", type(comparable[0]))
-            
-            # 内部のどこで起きてるかさらに絞り込み
-            st.write("--- Sub-scorer check ---")
-            try:
-                from src.scoring.price_scorer import PriceScorer
-                ps = PriceScorer()
-                st.write("PriceScorer test result:", ps.calculate(prop, comparable))
-            except Exception as pe:
-                st.write("PriceScorer failed with:", pe)
-                
-            raise e
-        except Exception as e:
-            st.error(f"General Error: {e}")
-            raise e
-    
-    # スコア順にソート
-    try:
-        results.sort(key=lambda x: x['score']['total_score'], reverse=True)
-    except Exception as e:
-        st.error(f"Error sorting results: {e}")
-        if results:
-            st.write("First result score detail:", results[0].get('score'))
-        raise e
-        
-    return results
-
 # メインコンテンツ
-properties = get_properties_from_db(
+listing_session = get_db_session()
+listing = get_properties_from_db(
+    listing_session,
     layout_filter=layout_filter, 
     city_filter=city_filter,
     price_range=(price_min, price_max),
     station_filter=station_filter,
     age_range=(age_min, age_max),
     prefecture_filter=selected_prefs,
-    line_filter=line_filter
+    line_filter=line_filter,
+    walk_limit=walk_limit,
+    keyword=keyword,
+    rooms_filter=rooms_filter,
+    brand_filter=brand_filter,
+    sort_order=sort_order,
+    target_type=target_type
 )
-scored_properties = calculate_scores(properties)
+total_items = listing.total if listing else 0
 
 # 統計情報
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("総物件数", f"{len(properties)}件")
+    st.metric("総物件数", f"{total_items}件")
 
-if scored_properties:
+if total_items > 0:
     with col2:
-        avg_score = sum([r['score']['total_score'] for r in scored_properties]) / len(scored_properties)
-        st.metric("平均スコア", f"{avg_score:.1f}点")
+        st.metric("平均スコア", f"{listing.avg_score:.1f}点")
     with col3:
-        avg_price = sum([r['property']['price'] for r in scored_properties]) / len(scored_properties)
-        st.metric("平均価格", f"{avg_price:.0f}万円")
+        st.metric("平均価格", f"{listing.avg_price:.0f}万円")
     with col4:
-        avg_sqm = sum([r['property']['price_per_sqm'] for r in scored_properties]) / len(scored_properties)
+        avg_sqm = listing.avg_price_per_sqm or 0
         st.metric("平均㎡単価", f"{avg_sqm/10000:.1f}万円")
 else:
     with col2:
@@ -653,14 +470,17 @@ else:
     with col4:
         st.metric("平均㎡単価", "N/A")
 
+if listing and listing.stale_count:
+    st.caption(f"ℹ️ {listing.stale_count}件はスコア未保存（または物件更新後）のためその場で計算しています。"
+               "`python scripts/rescore_changed.py` で保存すると表示が速くなります")
+
 st.markdown("---")
 
 # 物件一覧
-st.header("📋 物件一覧（お得度順）")
+st.header(f"📋 物件一覧（{sort_order}）")
 
 # ページネーション
 ITEMS_PER_PAGE = 20
-total_items = len(scored_properties)
 total_pages = max(1, (total_items - 1) // ITEMS_PER_PAGE + 1)
 
 if total_items > 0:
@@ -673,8 +493,18 @@ if total_items > 0:
     
     st.info(f"全 {total_items} 件中 {start_idx + 1} 〜 {end_idx} 件を表示しています")
     
-    # ページ表示用のスライス
-    display_properties = scored_properties[start_idx:end_idx]
+    # 表示するページの分だけ読み込む
+    display_properties = listing.page(start_idx, ITEMS_PER_PAGE)
+    
+    # 価格履歴はページ分をまとめて読む（要約はSQLで集計し、推移表は価格が動いた物件だけ）
+    try:
+        price_summaries = load_price_summaries(listing_session, [r['property']['id'] for r in display_properties])
+        price_histories = load_price_histories(
+            listing_session, [pid for pid, summary in price_summaries.items() if summary.points > 1]
+        )
+    except Exception as e:
+        logger.error(f"Error fetching price history: {e}")
+        price_summaries, price_histories = {}, {}
     
     for i, result in enumerate(display_properties):
         display_idx = start_idx + i + 1
@@ -686,7 +516,10 @@ if total_items > 0:
         # 物件分析を生成
         analysis = generate_property_analysis(prop, score_data)
         
-        with st.expander(f"**{display_idx}位** - {prop['title']} - **{total_score}点** {rank}", expanded=(i < 3)):
+        price_summary = price_summaries.get(prop['id'])
+        drop_badge = f" 📉値下げ{price_summary.drops}回" if price_summary and price_summary.drops else ""
+        
+        with st.expander(f"**{display_idx}位** - {prop['title']} - **{total_score}点** {rank}{drop_badge}", expanded=(i < 3)):
             # 基本情報
             col1, col2 = st.columns([2, 1])
             
@@ -747,13 +580,13 @@ if total_items > 0:
                 st.table(price_data)
                 
                 # 価格履歴の表示
-                history = get_price_history(prop['id'])
-                if history and len(history) > 1:
-                    st.markdown("**📉 価格推移**")
+                history = price_histories.get(prop['id'])
+                if history and len(history.prices) > 1:
+                    st.markdown(f"**📉 価格推移**（{price_summary.summary()}）")
                     # 最新が上に来るように逆順で表示
                     hist_data = {
-                        "日付": [h.recorded_at.strftime('%Y/%m/%d') for h in reversed(history)],
-                        "価格": [f"{h.price:,}万円" for h in reversed(history)]
+                        "日付": [d.strftime('%Y/%m/%d') for d in reversed(history.dates)],
+                        "価格": [f"{p:,}万円" for p in reversed(history.prices)]
                     }
                     st.table(hist_data)
                 
@@ -800,7 +633,8 @@ if total_items > 0:
                     'future': 5.0
                 }
                 
-                categories = score_data['category_scores']
+                # 100点換算は重み付け前のカテゴリ別スコアで（ターゲット層の重みによらない）
+                categories = {cat: score_data['detail'][cat]['score'] for cat in score_data['category_scores']}
                 for cat, score in categories.items():
                     cat_name = {
                         'price': '💰 価格適正性',
@@ -854,6 +688,8 @@ if total_items > 0:
 else:
     st.info("表示する物件がありません。フィルタ条件を変更してください。")
 
+listing_session.close()
+
 # フッター
 st.markdown("---")
 st.markdown("""
@@ -15,7 +15,10 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.scrapers.suumo_scraper import SuumoScraper
-from src.models.database import get_session, get_engine, Property
+from src.scrapers.listing_crawler import ListingCrawler
+from src.models.database import get_session, get_engine, Property, source_id_from_url
+from src.models.delisting import DelistingSweeper
+from src.models.write_buffer import WriteBehindBuffer
 
 # エリアのローテーション# エリア設定
 AREAS = {
@@ -28,98 +31,31 @@ AREAS = {
 
 INTERVAL = 1 * 60  # 1分（秒単位）
 CRAWL_INTERVAL = 3.0  # スクレイピング間隔
+CONCURRENCY = 4  # 詳細ページの同時取得数
 
 
-def collect_urls_from_area(area_config):
+def collect_urls_from_area(area_config, scraper, crawler=None):
     """エリアから物件URLを収集"""
-    scraper = SuumoScraper()
+    crawler = crawler or ListingCrawler(scraper, max_pages=area_config['pages'])
     urls = set()
     
-    for page in range(1, area_config['pages'] + 1):
-        try:
-            if page == 1:
-                url = area_config['url']
-            else:
-                url = f"{area_config['url']}?page={page}"
-            
-            html = scraper._fetch_html(url)
-            if not html:
-                continue
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            for link in links:
-                href = link['href']
-                if '/ms/chuko/tokyo/' in href and '/nc_' in href:
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0]
-                        if not href.endswith('/'):
-                            href += '/'
-                        href += 'bukkengaiyo/'
-                    urls.add(href)
-            
-            time.sleep(CRAWL_INTERVAL)
-        except Exception as e:
-            print(f"  エラー: {e}")
-            continue
+    try:
+        for url in crawler.iter_property_urls(area_config['url']):
+            urls.add(url)
+    except Exception as e:
+        print(f"  エラー: {e}")
     
     return urls
 
 
-def save_property(url, session):
-    """物件データを取得してDBに保存"""
-    scraper = SuumoScraper()
-    
-    try:
-        detail = scraper.get_property_detail(url)
-        if not detail or not detail.get('price'):
-            return False
-        
-        # source_idを抽出
-        source_id = url.split('/nc_')[1].split('/')[0] if '/nc_' in url else None
-        if not source_id:
-            return False
-        
-        # 既存チェック
-        existing = session.query(Property).filter_by(source_id=source_id).first()
-        if existing:
-            return False  # スキップ
-        
-        # 新規保存
-        property_obj = Property(
-            source='SUUMO',
-            source_id=source_id,
-            url=url,
-            title=detail.get('title') or f'物件 {source_id}',
-            price=detail.get('price'),
-            area=detail.get('area'),
-            price_per_sqm=detail.get('price_per_sqm'),
-            layout=detail.get('layout'),
-            building_age=detail.get('building_age'),
-            floor=detail.get('floor'),
-            direction=detail.get('direction'),
-            address=detail.get('address'),
-            prefecture=detail.get('prefecture'),
-            city=detail.get('city'),
-            station_name=detail.get('station_name'),
-            station_distance=detail.get('station_distance'),
-            management_fee=detail.get('management_fee'),
-            repair_reserve=detail.get('repair_reserve'),
-            features=str(detail.get('features', {})),
-            is_active=True
-        )
-        
-        session.add(property_obj)
-        session.commit()
-        return True
-        
-    except Exception as e:
-        print(f"  保存エラー: {e}")
-        return False
+def to_record(url, detail):
+    """保存対象の詳細データを整形（価格が取れていないものは None）"""
+    if not detail or not detail.get('price'):
+        return None
+    source_id = source_id_from_url(url)
+    if not source_id:
+        return None
+    return dict(detail, url=url, source_id=source_id, title=detail.get('title') or f'物件 {source_id}')
 
 
 def auto_collect_cycle():
@@ -129,19 +65,38 @@ def auto_collect_cycle():
     print("=" * 60)
     
     session = get_session(get_engine())
+    # スクレイパー（接続プール・レート制限）はサイクル内で共有する
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL, concurrency=CONCURRENCY)
+    def report_saved(results):
+        for detail, outcome in results:
+            if outcome == "saved":
+                print(f"  ✓ 新規保存: {detail['source_id']}")
+    
+    # 取得結果はまとめて書き込む（1件ごとのコミットを避ける）
+    writer = WriteBehindBuffer(session, on_flush=report_saved)
     total_new = 0
     
-    for area in AREAS:
+    for area in AREAS.values():
         print(f"\n📍 {area['name']} から収集中...")
-        urls = collect_urls_from_area(area)
+        crawler = ListingCrawler(scraper, max_pages=area['pages'])
+        sweeper = DelistingSweeper(session, area['url'], ward=area['name'])
+        urls = sorted(collect_urls_from_area(area, scraper, crawler))
+        sweeper.saw(source_id_from_url(url) for url in urls)
         print(f"  URL発見: {len(urls)}件")
         
-        new_count = 0
-        for url in urls:
-            if save_property(url, session):
-                new_count += 1
-                print(f"  ✓ 新規保存 [{new_count}件目]")
-            time.sleep(CRAWL_INTERVAL)
+        details = scraper.get_property_details(urls)
+        saved_before = writer.counts['saved']
+        for url, detail in zip(urls, details):
+            record = to_record(url, detail)
+            if record:
+                writer.add(record)
+        writer.flush()
+        new_count = writer.counts['saved'] - saved_before
+        try:
+            sweeper.finish(crawler.completed, probe=scraper.probe_status)
+            print(f"  {sweeper.summary()}")
+        except Exception as e:
+            print(f"  掲載終了の判定エラー: {e}")
         
         total_new += new_count
         print(f"  {area['name']}: {new_count}件追加")
@@ -154,6 +109,7 @@ def auto_collect_cycle():
     print(f"総物件数: {total_count}件")
     print("=" * 60)
     
+    writer.close()
     session.close()
 
 
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+インデックスのベンチマーク
+
+ダミー物件（既定10万件）と価格履歴を入れた一時DBで、アプリの絞り込み
+クエリ（get_properties_from_db / get_unique_stations / get_locations /
+価格履歴の物件ごとの読み込みと一括読み込み）の応答時間を、インデックスなしと
+マイグレーション適用後で比較する。
+
+使い方:
+    python scripts/bench_indexes.py [--rows 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import or_, insert
+from src.models.database import Base, Property, PriceHistory, get_engine, get_session
+from src.models.migrations import run_migrations
+from src.models.price_history import load_price_histories, load_price_summaries
+
+PREFECTURES = {
+    '東京都': ['千代田区', '港区', '渋谷区', '世田谷区', '大田区', '練馬区', '江東区', '品川区'],
+    '神奈川県': ['横浜市', '川崎市', '相模原市'],
+    '埼玉県': ['さいたま市', '川口市'],
+    '千葉県': ['千葉市', '船橋市', '市川市'],
+}
+LAYOUTS = ['1K', '1LDK', '2LDK', '3LDK', '4LDK', '2DK', '3DK']
+STATIONS = [f"駅{i:03d}" for i in range(600)]
+BRANDS = ['パークハウス', 'ライオンズ', 'プラウド', 'ブリリア', 'クレッセント', 'ルネ', 'グランドメゾン', 'シティハウス']
+
+
+def build_db(path: str, rows: int):
+    """インデックスなしのダミーDBを作成"""
+    engine = get_engine(path)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'ix_%'").all():
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+    rng = random.Random(42)
+    now = datetime.now()
+    props = []
+    for i in range(rows):
+        pref = rng.choice(list(PREFECTURES))
+        city = rng.choice(PREFECTURES[pref])
+        station = rng.choice(STATIONS)
+        price = rng.randint(1500, 20000)
+        area = round(rng.uniform(20, 120), 2)
+        props.append({
+            'source': 'SUUMO', 'source_id': str(i), 'url': f"https://suumo.jp/ms/chuko/tokyo/nc_{i}/",
+            'title': f"{rng.choice(BRANDS)}{station}{i}",
+            'address': f"{pref}{city}{rng.randint(1, 9)}丁目", 'access_info': f"○○線「{station}」歩{rng.randint(1, 20)}分", 'price': price, 'area': area, 'price_per_sqm': price * 10000 / area,
+            'building_age': rng.randint(0, 50), 'floor': rng.randint(1, 30), 'layout': rng.choice(LAYOUTS),
+            'prefecture': pref, 'city': city, 'station_name': station,
+            'station_distance': rng.randint(1, 20), 'is_active': rng.random() < 0.9,
+            'first_seen': now, 'last_updated': now,
+        })
+    history = [
+        {'property_id': rng.randint(1, rows), 'price': rng.randint(1500, 20000),
+         'recorded_at': now - timedelta(days=rng.randint(0, 365))}
+        for _ in range(rows * 3)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Property.__table__), props)
+        conn.execute(insert(PriceHistory.__table__), history)
+    return engine
+
+
+def queries(session):
+    """アプリと同じ形のクエリ（名前, 実行関数）"""
+    active = session.query(Property).filter(Property.is_active == True)
+    return [
+        ('価格帯', lambda: active.filter(Property.price >= 5000, Property.price <= 6000).all()),
+        ('間取り+価格帯', lambda: active.filter(Property.layout.in_(['3LDK']),
+                                               Property.price >= 5000, Property.price <= 8000).all()),
+        ('駅', lambda: active.filter(Property.station_name.in_(STATIONS[:3])).all()),
+        ('築年数', lambda: active.filter(Property.building_age >= 0, Property.building_age <= 3).all()),
+        ('都道府県+市区町村', lambda: active.filter(Property.prefecture.in_(['東京都']),
+                                                   or_(Property.city.like('%港区%'))).all()),
+        ('駅一覧 DISTINCT', lambda: session.query(Property.station_name).filter(
+            Property.station_name != None, Property.station_name != '').distinct().order_by(Property.station_name).all()),
+        ('市区町村 DISTINCT', lambda: session.query(Property.prefecture, Property.city).filter(
+            Property.city != None).distinct().all()),
+        ('価格履歴', lambda: [session.query(PriceHistory).filter_by(property_id=pid)
+                               .order_by(PriceHistory.recorded_at.asc()).all() for pid in range(1, 51)]),
+        ('価格履歴 一括', lambda: load_price_histories(session, range(1, 51))),
+        ('価格履歴 要約', lambda: load_price_summaries(session, range(1, 51))),
+    ]
+
+
+def measure(engine, repeat: int):
+    """各クエリの中央値（ミリ秒）"""
+    session = get_session(engine)
+    results = {}
+    for name, run in queries(session):
+        run()  # ウォームアップ
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append((time.perf_counter() - start) * 1000)
+            session.expunge_all()
+        results[name] = sorted(times)[len(times) // 2]
+    session.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='インデックスのベンチマーク')
+    parser.add_argument('--rows', type=int, default=100000, help='ダミー物件数')
+    parser.add_argument('--repeat', type=int, default=20, help='各クエリの繰り返し回数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"🏗️ ダミーDB作成中（物件{args.rows:,}件・価格履歴{args.rows * 3:,}件）...")
+        engine = build_db(path, args.rows)
+
+        before = measure(engine, args.repeat)
+        run_migrations(engine)
+        after = measure(engine, args.repeat)
+        engine.dispose()
+
+    print("=" * 60)
+    print(f"{'クエリ':<20}{'インデックスなし':>12}{'適用後':>10}{'倍率':>8}")
+    for name in before:
+        ratio = before[name] / after[name] if after[name] else 0.0
+        print(f"{name:<20}{before[name]:>10.1f}ms{after[name]:>8.1f}ms{ratio:>7.1f}x")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
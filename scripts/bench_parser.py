@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+物件概要ページパーサーのベンチマーク
+
+旧実装（BeautifulSoup版 SuumoScraper._parse_bukkengaiyo）と
+lxml版（detail_parser.parse_bukkengaiyo）の出力が一致することを確認し、
+1ページあたりのパース時間を比較する。
+
+HTMLアーカイブ（data/html_archive）があれば実ページを、なければ
+SUUMOの物件概要ページを模したサンプルを使用する。
+
+使い方:
+    python scripts/bench_parser.py [--pages N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bs4 import BeautifulSoup
+from src.scrapers.archive import HtmlArchive
+from src.scrapers.detail_parser import parse_bukkengaiyo
+from src.scrapers.suumo_scraper import SuumoScraper
+
+SAMPLE_URL = 'https://suumo.jp/ms/chuko/tokyo/sc_shibuya/nc_12345678/bukkengaiyo/'
+
+
+def build_sample_page() -> bytes:
+    """物件概要ページを模したサンプルHTML（ナビ・フッター込みで実ページ程度のサイズ）"""
+    nav = ''.join(f'<li><a href="/ms/chuko/tokyo/sc_{i}/">エリア{i}の中古マンション</a></li>' for i in range(300))
+    spec_rows = [
+        ('物件名', 'パークハウス渋谷南平台'),
+        ('価格', '1億2980万円'),
+        ('専有面積', '72.45m<sup>2</sup>（壁芯）'),
+        ('間取り', '3LDK'),
+        ('完成時期（築年月）', '2012年3月'),
+        ('所在階', '8階/14階建'),
+        ('向き', '南西'),
+        ('所在地', '東京都渋谷区南平台町1-2 [ 周辺環境 ]'),
+        ('交通', '東急田園都市線「池尻大橋」歩9分<br>ＪＲ山手線「渋谷」歩12分<br>[ 乗り換え案内 ]'),
+        ('管理費', '2万1800円／月（委託(通勤)）'),
+        ('修繕積立金', '1万4500円／月'),
+        ('その他', 'オートロック、宅配ボックス、ペット飼育可（規約あり）'),
+    ]
+    rows = ''.join(
+        f'<tr><th class="w200">{label}<span>ヒント</span></th><td>{value}</td>'
+        f'<th>備考</th><td>-</td></tr>'
+        for label, value in spec_rows
+    )
+    filler = ''.join(f'<p>周辺施設情報 {i}：スーパーまで徒歩{i % 15}分</p>' for i in range(400))
+    html = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>物件概要</title>
+<script>var dataLayer = [];</script><style>.mt10 {{ margin-top: 10px; }}</style></head>
+<body>
+<ul class="p-breadcrumb">
+  <li class="p-breadcrumb-item"><a href="/ms/chuko/">中古マンション</a></li>
+  <li class="p-breadcrumb-item"><a href="/ms/chuko/tokyo/sc_shibuya/nc_12345678/">パークハウス渋谷南平台</a></li>
+</ul>
+<h1 class="section_h1-header-title">【仲介手数料無料】パークハウス渋谷南平台 1億2980万円（物件概要）</h1>
+<nav><ul>{nav}</ul></nav>
+<table class="mt10 bdGrayT">{rows}</table>
+<div>{filler}</div>
+<footer><ul>{nav}</ul></footer>
+</body></html>"""
+    return html.encode('utf-8')
+
+
+def load_pages(limit: int):
+    """アーカイブの実ページ（なければサンプル）を読み込む"""
+    if os.path.exists('data/html_archive/index.db'):
+        archive = HtmlArchive()
+        entries = archive.stale_entries(10 ** 9)[:limit]
+        pages = [(url, archive.load_object(digest)) for url, digest in entries]
+        archive.close()
+        pages = [(url, html) for url, html in pages if html]
+        if pages:
+            return pages, 'アーカイブ'
+    return [(SAMPLE_URL, build_sample_page())], 'サンプル'
+
+
+def legacy_parse(html: bytes, url: str):
+    return SuumoScraper._parse_bukkengaiyo(BeautifulSoup(html, 'lxml'), url)
+
+
+def bench(func, pages, repeat: int) -> float:
+    """1ページあたりの平均時間（ミリ秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            func(html, url)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='物件概要パーサーのベンチマーク')
+    parser.add_argument('--pages', type=int, default=200, help='アーカイブから使うページ数')
+    parser.add_argument('--repeat', type=int, default=20, help='繰り返し回数')
+    args = parser.parse_args()
+
+    pages, source = load_pages(args.pages)
+    print("=" * 60)
+    print(f"📐 パーサーベンチマーク（{source}: {len(pages)}ページ × {args.repeat}回）")
+    print("=" * 60)
+
+    # 出力の一致確認（設備は判定範囲を物件概要テーブルに限定したため差分を別集計）
+    mismatches = 0
+    feature_diffs = 0
+    for url, html in pages:
+        old = legacy_parse(html, url)
+        new = parse_bukkengaiyo(html, url)
+        if old.get('features') != new.get('features'):
+            feature_diffs += 1
+        old.pop('features', None)
+        new.pop('features', None)
+        if old != new:
+            mismatches += 1
+            print(f"  ❌ 不一致: {url}")
+            for key in sorted(set(old) | set(new)):
+                if old.get(key) != new.get(key):
+                    print(f"     {key}: {old.get(key)!r} -> {new.get(key)!r}")
+
+    print(f"出力一致（設備以外）: {len(pages) - mismatches}/{len(pages)}")
+    print(f"設備判定の差分: {feature_diffs}件（ページ全体 → 物件概要テーブルのみ）")
+
+    old_ms = bench(legacy_parse, pages, args.repeat)
+    new_ms = bench(parse_bukkengaiyo, pages, args.repeat)
+    print(f"\nBeautifulSoup版: {old_ms:.2f} ms/ページ")
+    print(f"lxml版        : {new_ms:.2f} ms/ページ")
+    print(f"高速化        : {old_ms / new_ms:.1f}倍")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+スコアのキャッシュ（score_key）のベンチマーク
+
+bench_indexes と同じダミーDB（既定10万件）で、全物件の再計算を
+初回（全件採点）→ 変更なしで再実行 → 一部の物件の価格を変えて再実行 の順に行い、
+所要時間・書き込み行数・命中率を表示する。最後にキャッシュを通した保存結果が
+BatchScorer で全件を採点し直した結果と一致することを確かめる。
+
+価格を変えた物件と同じ駅の物件は比較対象の集計が変わるので、それらも採点し直す。
+
+使い方:
+    python scripts/bench_score_cache.py [--rows 100000] [--changed 0.02]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.database import Property, PropertyScore, get_session
+from src.models.migrations import run_migrations
+from src.scoring.batch_scorer import BatchScorer, load_property_frame
+from src.scoring.score_cache import ScoreCache
+from src.scoring.score_store import load_scorer, rescore_properties
+from bench_indexes import build_db
+
+
+def timed_rescore(session, label: str):
+    cache = ScoreCache()
+    started = time.perf_counter()
+    written = rescore_properties(session, cache=cache)
+    seconds = time.perf_counter() - started
+    print(f"  {label:<16} {seconds:6.2f}秒  書き込み {written:>7,}行  {cache.summary()}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='スコアのキャッシュのベンチマーク')
+    parser.add_argument('--rows', type=int, default=100000, help='ダミー物件数')
+    parser.add_argument('--changed', type=float, default=0.02, help='価格を変える物件の割合')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🏗️ ダミーDB作成中（物件{args.rows:,}件）...")
+        engine = build_db(os.path.join(tmp, 'bench.db'), args.rows)
+        run_migrations(engine)  # 派生属性・エリア統計・価格推移の集計列・score_key
+        session = get_session(engine)
+
+        print("\n📊 全物件の再計算")
+        timed_rescore(session, '初回')
+        timed_rescore(session, '変更なし')
+
+        ids = [property_id for (property_id,) in session.query(Property.id).filter(Property.is_active == True)]
+        changed = random.Random(0).sample(ids, int(len(ids) * args.changed))
+        stations = set()
+        for prop in session.query(Property).filter(Property.id.in_(changed)):
+            prop.price = int(prop.price * 0.97)
+            stations.add(prop.station_name)
+        session.commit()
+        affected = session.query(Property).filter(Property.is_active == True,
+                                                  Property.station_name.in_(stations)).count()
+        print(f"  価格変更 {len(changed):,}件（{args.changed:.0%}）→ 同じ駅の物件 {affected:,}件")
+        timed_rescore(session, '価格変更後')
+
+        frame = load_property_frame(session)
+        expected = BatchScorer(load_scorer(session)).score_profiles(frame)
+        stored = {(row.property_id, row.target_type): row.detail for row in session.query(PropertyScore)}
+        mismatched = sum(
+            json.dumps(result, ensure_ascii=False, default=str) != stored.get((property_id, target_type))
+            for target_type, scores in expected.items()
+            for property_id, result in zip(frame['id'], scores.results())
+        )
+        print(f"  {'✅ 保存結果は全件採点と一致' if not mismatched else f'⚠️ 保存結果の不一致 {mismatched}件'}")
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+スコアリングのベンチマーク
+
+bench_indexes と同じダミーDB（既定10万件）で、物件1件ずつの SafePropertyScorer.calculate_score と
+BatchScorer による一括採点（配列演算）の所要時間を比較し、結果が一致することを確かめる。
+比較対象の駅ごとの集計（StationComparables）の作成時間と、全重みプロファイルを1回で採点する
+score_profiles の所要時間も表示する。
+
+使い方:
+    python scripts/bench_scoring.py [--rows 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.database import Property, get_session
+from src.models.migrations import run_migrations
+from src.scoring.batch_scorer import BatchScorer, load_property_frame
+from src.scoring.score_store import load_scorer, property_record
+from bench_indexes import build_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='スコアリングのベンチマーク')
+    parser.add_argument('--rows', type=int, default=100000, help='ダミー物件数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🏗️ ダミーDB作成中（物件{args.rows:,}件）...")
+        engine = build_db(os.path.join(tmp, 'bench.db'), args.rows)
+        run_migrations(engine)  # 派生属性・エリア統計・価格推移の集計列
+        session = get_session(engine)
+        started = time.perf_counter()
+        scorer = load_scorer(session)
+        comparables_seconds = time.perf_counter() - started
+        now = datetime.now()
+
+        started = time.perf_counter()
+        records = [property_record(p) for p in session.query(Property).filter(Property.is_active == True)
+                   .order_by(Property.id)]
+        load_records = time.perf_counter() - started
+        started = time.perf_counter()
+        scalar = [scorer.calculate_score(record) for record in records]
+        scalar_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        frame = load_property_frame(session)
+        load_frame = time.perf_counter() - started
+        batch_scorer = BatchScorer(scorer)
+        started = time.perf_counter()
+        scores = batch_scorer.score(frame, now=now)
+        batch_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        profiles = batch_scorer.score_profiles(frame, now=now)
+        profiles_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        results = scores.results()
+        results_seconds = time.perf_counter() - started
+
+        mismatched = sum(json.dumps(a, default=str) != json.dumps(b, default=str) for a, b in zip(scalar, results))
+        print(f"\n📊 販売中 {len(records):,}件")
+        print(f"  1件ずつ (calculate_score):   読込 {load_records:6.2f}秒 + 採点 {scalar_seconds:6.2f}秒")
+        print(f"  一括 (BatchScorer.score):    読込 {load_frame:6.2f}秒 + 採点 {batch_seconds:6.2f}秒"
+              f"（結果の辞書化 {results_seconds:.2f}秒）")
+        print(f"  全{len(profiles)}プロファイル (score_profiles): 採点 {profiles_seconds:6.2f}秒")
+        print(f"  比較対象の駅ごとの集計:      作成 {comparables_seconds:6.2f}秒")
+        print(f"  採点の速度比: {scalar_seconds / batch_seconds:.1f}倍")
+        print(f"  {'✅ 結果は全件一致' if not mismatched else f'⚠️ 結果の不一致 {mismatched}件'}")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+キーワード検索のベンチマーク
+
+bench_indexes と同じダミーDB（既定10万件）で、物件名・住所・アクセスへの
+LIKE による全件走査と、property_fts（FTS5 trigram）による検索の応答時間を比較する。
+件数の上限はなく、全件を読む。2文字以下の語だけのキーワード（港区・港区 ルネ）は
+索引を使えず、FTS5 側も properties の LIKE 走査になる。
+
+使い方:
+    python scripts/bench_search.py [--rows 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import or_
+from src.models.database import Property, get_session
+from src.models.migrations import run_migrations
+from src.models.search import search_property_ids
+from bench_indexes import build_db
+
+KEYWORDS = ['パークハウス', 'プラウド 駅123', '港区', '駅042', '港区 ルネ']
+
+
+def like_search(session, query: str):
+    """LIKE で全語を含む物件を探す（FTS導入前の方法）"""
+    q = session.query(Property.id)
+    for term in query.split():
+        pattern = f"%{term}%"
+        q = q.filter(or_(Property.title.like(pattern), Property.address.like(pattern),
+                         Property.station_name.like(pattern), Property.access_info.like(pattern)))
+    return [row[0] for row in q]
+
+
+def median_ms(run, repeat: int) -> float:
+    run()  # ウォームアップ
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='キーワード検索のベンチマーク')
+    parser.add_argument('--rows', type=int, default=100000, help='ダミー物件数')
+    parser.add_argument('--repeat', type=int, default=20, help='各クエリの繰り返し回数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🏗️ ダミーDB作成中（物件{args.rows:,}件）...")
+        engine = build_db(os.path.join(tmp, 'bench.db'), args.rows)
+        run_migrations(engine)
+        session = get_session(engine)
+
+        print("=" * 60)
+        print(f"{'キーワード':<20}{'件数':>8}{'LIKE':>10}{'FTS5':>10}{'倍率':>8}")
+        for keyword in KEYWORDS:
+            hits = len(search_property_ids(session, keyword))
+            like = median_ms(lambda: like_search(session, keyword), args.repeat)
+            fts = median_ms(lambda: search_property_ids(session, keyword), args.repeat)
+            print(f"{keyword:<20}{hits:>8}{like:>8.1f}ms{fts:>8.1f}ms{like / fts:>7.1f}x")
+        print("=" * 60)
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+書き込みバッファ（WriteBehindBuffer）のベンチマーク
+
+bench_indexes と同じダミーDB（既定2万件）に、詳細データ（既定2000件。1割は既存物件の
+価格変更）を保存する時間を、1件ずつ save_or_update_property でコミットする方法と
+書き込みバッファでまとめて書き込む方法で比較する。DBは方法ごとに作り直す。
+最後に add が途切れてもタイマーで書き込まれること（idle flush）を確かめる。
+
+使い方:
+    python scripts/bench_write_buffer.py [--rows 20000] [--details 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.database import Property, get_session, save_or_update_property
+from src.models.migrations import run_migrations
+from src.models.write_buffer import WriteBehindBuffer
+from bench_indexes import build_db, LAYOUTS, PREFECTURES, STATIONS
+
+
+def make_details(rows: int, count: int):
+    """取得した詳細データに相当するダミー（1割は既存物件の価格変更）"""
+    rng = random.Random(7)
+    details = []
+    for i in range(count):
+        source_id = str(rng.randrange(rows)) if i % 10 == 0 else f"new{i}"
+        pref = rng.choice(list(PREFECTURES))
+        station = rng.choice(STATIONS)
+        price = rng.randint(1500, 20000)
+        area = round(rng.uniform(20, 120), 2)
+        details.append({
+            'source': 'SUUMO', 'source_id': source_id, 'url': f"https://suumo.jp/ms/chuko/tokyo/nc_{source_id}/",
+            'title': f"ダミー{source_id}", 'price': price, 'area': area, 'price_per_sqm': price * 10000 / area,
+            'layout': rng.choice(LAYOUTS), 'building_age': rng.randint(0, 50), 'floor': rng.randint(1, 30),
+            'address': f"{pref}{rng.choice(PREFECTURES[pref])}1丁目", 'prefecture': pref,
+            'station_name': station, 'station_distance': rng.randint(1, 20),
+            'access_info': f"○○線「{station}」歩{rng.randint(1, 20)}分", 'features': '{}',
+        })
+    return details
+
+
+def fresh_session(tmp: str, name: str, rows: int):
+    engine = build_db(os.path.join(tmp, f'{name}.db'), rows)
+    run_migrations(engine)
+    return get_session(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='書き込みバッファのベンチマーク')
+    parser.add_argument('--rows', type=int, default=20000, help='ダミーDBの物件数')
+    parser.add_argument('--details', type=int, default=2000, help='保存する詳細データの件数')
+    args = parser.parse_args()
+
+    details = make_details(args.rows, args.details)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🏗️ ダミーDB作成中（物件{args.rows:,}件）・保存する詳細データ {len(details):,}件")
+
+        session = fresh_session(tmp, 'rows', args.rows)
+        started = time.perf_counter()
+        for detail in details:
+            save_or_update_property(session, detail, detail['source_id'])
+        row_seconds = time.perf_counter() - started
+        row_count = session.query(Property).count()
+        session.close()
+        print(f"  1件ずつコミット   {row_seconds:7.2f}秒")
+
+        session = fresh_session(tmp, 'buffer', args.rows)
+        started = time.perf_counter()
+        with WriteBehindBuffer(session) as writer:
+            for detail in details:
+                writer.add(detail)
+        buffer_seconds = time.perf_counter() - started
+        buffer_count = session.query(Property).count()
+        print(f"  書き込みバッファ   {buffer_seconds:7.2f}秒  {writer.summary()}")
+        print(f"  → {row_seconds / buffer_seconds:.0f}倍"
+              f"  {'✅ 保存件数が一致' if row_count == buffer_count else f'⚠️ 保存件数の不一致 {row_count} / {buffer_count}'}")
+
+        print("\n⏱️ idle flush（add が途切れた後のタイマーによる書き込み）")
+        writer = WriteBehindBuffer(session, max_seconds=0.5)
+        writer.add(dict(details[1], source_id='idle1', url='https://suumo.jp/ms/chuko/tokyo/nc_idle1/'))
+        time.sleep(1.0)
+        written = session.query(Property).filter_by(source_id='idle1').count()
+        print(f"  {'✅ 0.5秒後に書き込み済み' if written and not len(writer) else '⚠️ 書き込まれていない'}"
+              f"（{writer.summary()}）")
+        writer.close()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
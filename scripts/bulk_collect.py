@@ -6,7 +6,6 @@
 
 import os
 import sys
-import time
 from datetime import datetime
 from pathlib import Path
 
@@ -15,6 +14,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.listing_crawler import ListingCrawler
 
 # エリア設定
 AREAS = {
@@ -28,61 +28,16 @@ AREAS = {
 INTERVAL = 3.0  # リクエスト間隔（秒）
 
 
-def collect_urls_for_area(area_code, area_config):
-    """指定エリアから物件URLを収集"""
-    scraper = SuumoScraper()
+def collect_urls_for_area(area_code, area_config, scraper):
+    """指定エリアから物件URLを収集（最終ページを検出したらそこで終了）"""
+    crawler = ListingCrawler(scraper, max_pages=area_config['pages'])
     urls = set()
     
-    base_url = area_config['url']
-    pages = area_config['pages']
-    
-    for page in range(1, pages + 1):
-        try:
-            if page == 1:
-                url = base_url
-            else:
-                url = f"{base_url}?page={page}"
-            
-            print(f"  ページ {page}/{pages} を取得中... ", end='', flush=True)
-            
-            # HTMLを取得
-            html = scraper._fetch_html(url)
-            if not html:
-                print("❌ エラー: HTMLの取得に失敗")
-                continue
-            
-            # URLを抽出
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 物件リンクを探す
-            links = soup.find_all('a', href=True)
-            page_urls = set()
-            
-            for link in links:
-                href = link['href']
-                if '/ms/chuko/tokyo/' in href and '/nc_' in href:
-                    # 完全URLに変換
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    # bukkengaiyoのURLに変換
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0]
-                        if not href.endswith('/'):
-                            href += '/'
-                        href += 'bukkengaiyo/'
-                    page_urls.add(href)
-            
-            urls.update(page_urls)
-            print(f"✓ {len(page_urls)}件")
-            
-            # レート制限
-            if page < pages:
-                time.sleep(INTERVAL)
-                
-        except Exception as e:
-            print(f"❌ エラー: {e}")
-            continue
+    try:
+        for url in crawler.iter_property_urls(area_config['url']):
+            urls.add(url)
+    except Exception as e:
+        print(f"  ❌ エラー: {e}")
     
     return urls
 
@@ -95,11 +50,13 @@ def main():
     
     all_urls = set()
     area_stats = {}
+    # レート制限（INTERVAL秒に1リクエスト）と接続プールを全エリアで共有
+    scraper = SuumoScraper(interval=INTERVAL)
     
     # 各エリアからURL収集
     for area_code, config in AREAS.items():
         print(f"\n📍 [{config['name']}] URL収集中...")
-        urls = collect_urls_for_area(area_code, config)
+        urls = collect_urls_for_area(area_code, config, scraper)
         area_stats[config['name']] = len(urls)
         all_urls.update(urls)
         print(f"  ✓ 合計: {len(urls)}件")
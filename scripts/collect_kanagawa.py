@@ -1,16 +1,16 @@
 #!/usr/bin/env python
 import os
 import sys
-import time
 from pathlib import Path
-import requests
 
 # プロジェクトルートをPythonパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.models.database import get_session, get_engine, Property, save_or_update_property
+from src.models.database import get_session, get_engine, source_id_from_url
+from src.models.write_buffer import WriteBehindBuffer
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.listing_crawler import ListingCrawler, listing_url
 
 # 神奈川県（武蔵小杉・鷺沼）の設定
 AREAS = {
@@ -20,71 +20,43 @@ AREAS = {
 
 CRAWL_INTERVAL = 1.0
 
-def save_property(url, session, scraper):
-    """URLから物件情報を取得して保存または更新"""
+def report_saved(results):
+    """書き込みバッファの書き込み結果のうち新規保存を表示"""
+    for detail, outcome in results:
+        if outcome == "saved":
+            print(f"      ✅ 保存成功: {detail['source_id']}")
+
+def save_property(url, writer, scraper):
+    """URLから物件情報を取得して書き込みバッファへ（DBへはまとめて書き込む）"""
     try:
-        source_id = url.split('/nc_')[1].split('/')[0] if '/nc_' in url else None
+        source_id = source_id_from_url(url)
         if not source_id: return "skip"
         
         detail = scraper.get_property_detail(url)
         if not detail or not detail.get('price'): return "error"
         
-        return save_or_update_property(session, detail, source_id)
+        writer.add(dict(detail, url=url, source_id=source_id))
+        return "queued"
         
     except Exception as e:
         print(f"      ❌ 処理エラー ({url}): {e}")
         return "error"
 
-def process_area(area_code, config, session, scraper):
-    """神奈川県版: 指定エリアを巡回"""
-    # ⚠️ ここが重要: URLパターンが神奈川県版 (kanagawa) になっている
-    base_url = f'https://suumo.jp/ms/chuko/kanagawa/sc_{area_code}/'
-    pages = config['pages']
-    
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    saved_count = 0
+def process_area(area_code, config, writer, scraper):
+    """神奈川県版: 指定エリアを巡回（最終ページで自動終了）"""
+    search_url = listing_url('kanagawa', ward=area_code)
+    crawler = ListingCrawler(scraper, max_pages=config['pages'])
+    saved_before = writer.counts['saved']
     
-    for page in range(1, pages + 1):
-        try:
-            url = base_url if page == 1 else f"{base_url}?page={page}"
-            print(f"  📄 ページ {page}/{pages} をスキャン中... ({config['name']})")
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code != 200:
-                print(f"    ❌ HTTP {response.status_code}")
-                # 404ならそのページ以降はない可能性が高いが、念のためcontinue
-                continue
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            page_urls = set()
-            for link in links:
-                href = link['href']
-                # 神奈川URLパターンにマッチさせる
-                if '/ms/chuko/kanagawa/' in href and '/nc_' in href:
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0].rstrip('/') + '/bukkengaiyo/'
-                    page_urls.add(href)
-            
-            print(f"    🔍 {len(page_urls)}件のURLを発見。保存開始...")
-            
-            for p_url in page_urls:
-                result = save_property(p_url, session, scraper)
-                if result == "saved":
-                    saved_count += 1
-                    print(f"      ✅ 保存成功: {p_url.split('/nc_')[1].split('/')[0]}")
-            
-            time.sleep(CRAWL_INTERVAL)
-            
-        except Exception as e:
-            print(f"    ⚠️ ページエラー: {e}")
-            continue
+    print(f"  📄 一覧をスキャン中... ({config['name']})")
+    try:
+        for p_url in crawler.iter_property_urls(search_url):
+            save_property(p_url, writer, scraper)
+    except Exception as e:
+        print(f"    ⚠️ 一覧取得エラー: {e}")
+    writer.flush()
             
-    return saved_count
+    return writer.counts['saved'] - saved_before
 
 def main():
     print("=" * 60)
@@ -93,20 +65,23 @@ def main():
     
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0)
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL)
+    # 取得結果はまとめて書き込む（1件ごとのコミットを避ける）
+    writer = WriteBehindBuffer(session, on_flush=report_saved)
     
     total_saved = 0
     
     try:
         for area_code, config in AREAS.items():
             print(f"\n{config['name']} の処理を開始")
-            count = process_area(area_code, config, session, scraper)
+            count = process_area(area_code, config, writer, scraper)
             total_saved += count
             print(f"  ✨ {config['name']} 完了: +{count}件")
             
     except KeyboardInterrupt:
         print("\n🛑 中断されました")
     finally:
+        writer.close()  # 中断時もバッファに残った分を書き込む
         session.close()
         print("\n" + "=" * 60)
         print(f"🏁 終了。新規保存: {total_saved}件")
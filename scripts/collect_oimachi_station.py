@@ -4,17 +4,16 @@
 """
 import os
 import sys
-import time
 from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
 
 # プロジェクトルートをPythonパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.models.database import get_session, get_engine, Property, save_or_update_property
+from src.models.database import get_session, get_engine, source_id_from_url
+from src.models.write_buffer import WriteBehindBuffer
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.listing_crawler import ListingCrawler, listing_url
 
 # 大井町駅の設定
 STATIONS = {
@@ -23,76 +22,43 @@ STATIONS = {
 
 CRAWL_INTERVAL = 1.0
 
-def save_property(url, session, scraper):
-    """URLから物件情報を取得して保存または更新"""
+def report_saved(results):
+    """書き込みバッファの書き込み結果のうち新規保存を表示"""
+    for detail, outcome in results:
+        if outcome == "saved":
+            print(f"      ✅ 保存成功: {detail['source_id']}")
+
+def save_property(url, writer, scraper):
+    """URLから物件情報を取得して書き込みバッファへ（DBへはまとめて書き込む）"""
     try:
-        source_id = url.split('/nc_')[1].split('/')[0] if '/nc_' in url else None
+        source_id = source_id_from_url(url)
         if not source_id: return "skip"
         
         detail = scraper.get_property_detail(url)
         if not detail or not detail.get('price'): return "error"
         
-        return save_or_update_property(session, detail, source_id)
+        writer.add(dict(detail, url=url, source_id=source_id))
+        return "queued"
         
     except Exception as e:
         print(f"      ❌ 処理エラー ({url}): {e}")
         return "error"
 
-def process_station(ek_code, config, session, scraper):
-    """駅ごとにページを巡回"""
-    base_url = f'https://suumo.jp/ms/chuko/tokyo/ek_{ek_code}/'
-    pages = config['pages']
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    }
-    
-    saved_count = 0
+def process_station(ek_code, config, writer, scraper):
+    """駅ごとに一覧を巡回（最終ページで自動終了）"""
+    search_url = listing_url('tokyo', station=ek_code)
+    crawler = ListingCrawler(scraper, max_pages=config['pages'])
+    saved_before = writer.counts['saved']
     
-    for page in range(1, pages + 1):
-        try:
-            url = base_url if page == 1 else f"{base_url}?page={page}"
-            print(f"  📄 ページ {page}/{pages} をスキャン中... ({config['name']})")
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code != 200:
-                print(f"    ❌ HTTP {response.status_code}")
-                continue
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # 検索結果メインリストのコンテナを特定（通常 'property_unit' クラスなどを持つ）
-            # もしくは、おすすめ物件を除外するために、特定のセクション内のみを探索
-            main_content = soup.find('div', id='js-bukkenList') or soup
-            links = main_content.find_all('a', href=True)
-            
-            page_urls = set()
-            for link in links:
-                href = link['href']
-                # 駅近辺の検索結果に限定
-                if '/ms/chuko/tokyo/' in href and '/nc_' in href:
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0].rstrip('/') + '/bukkengaiyo/'
-                    page_urls.add(href)
-            
-            print(f"    🔍 {len(page_urls)}件のURLを発見。保存開始...")
-            
-            for p_url in page_urls:
-                result = save_property(p_url, session, scraper)
-                if result == "saved":
-                    saved_count += 1
-                    print(f"      ✅ 保存成功: {p_url.split('/nc_')[1].split('/')[0]}")
-                elif result == "exists":
-                    pass
-            
-            time.sleep(CRAWL_INTERVAL)
-            
-        except Exception as e:
-            print(f"    ⚠️ ページエラー: {e}")
-            continue
+    print(f"  📄 一覧をスキャン中... ({config['name']})")
+    try:
+        for p_url in crawler.iter_property_urls(search_url):
+            save_property(p_url, writer, scraper)
+    except Exception as e:
+        print(f"    ⚠️ 一覧取得エラー: {e}")
+    writer.flush()
             
-    return saved_count
+    return writer.counts['saved'] - saved_before
 
 def main():
     print("=" * 60)
@@ -101,20 +67,23 @@ def main():
     
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0)
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL)
+    # 取得結果はまとめて書き込む（1件ごとのコミットを避ける）
+    writer = WriteBehindBuffer(session, on_flush=report_saved)
     
     total_saved = 0
     
     try:
         for ek_code, config in STATIONS.items():
             print(f"\n{config['name']} の処理を開始")
-            count = process_station(ek_code, config, session, scraper)
+            count = process_station(ek_code, config, writer, scraper)
             total_saved += count
             print(f"  ✨ {config['name']} 完了: +{count}件")
             
     except KeyboardInterrupt:
         print("\n🛑 中断されました")
     finally:
+        writer.close()  # 中断時もバッファに残った分を書き込む
         session.close()
         print("\n" + "=" * 60)
         print(f"🏁 終了。今回のセッションでの新規保存: {total_saved}件")
@@ -4,16 +4,16 @@
 """
 import os
 import sys
-import time
 from pathlib import Path
-import requests
 
 # プロジェクトルートをPythonパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.models.database import get_session, get_engine, Property
+from src.models.database import get_session, get_engine, Property, source_id_from_url
+from src.models.write_buffer import WriteBehindBuffer
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.listing_crawler import ListingCrawler, listing_url
 
 # 杉並区・江戸川区の設定（各30ページずつ徹底的に）
 AREAS = {
@@ -23,97 +23,45 @@ AREAS = {
 
 CRAWL_INTERVAL = 1.0
 
-def save_property(url, session, scraper):
-    """URLから物件情報を取得して保存"""
+def report_saved(results):
+    """書き込みバッファの書き込み結果のうち新規保存を表示"""
+    for detail, outcome in results:
+        if outcome == "saved":
+            print(f"      ✅ 保存成功: {detail['source_id']}")
+
+def save_property(url, session, writer, scraper):
+    """URLから物件情報を取得して書き込みバッファへ（既存物件は取得しない）"""
     try:
-        source_id = url.split('/nc_')[1].split('/')[0] if '/nc_' in url else None
+        source_id = source_id_from_url(url)
         if not source_id: return "skip"
         
-        existing = session.query(Property).filter_by(source_id=source_id).first()
+        existing = session.query(Property.id).filter_by(source_id=source_id).first()
         if existing: return "exists"
         
         detail = scraper.get_property_detail(url)
         if not detail or not detail.get('price'): return "error"
         
-        property_obj = Property(
-            source='SUUMO',
-            source_id=source_id,
-            url=url,
-            title=detail.get('title') or f'物件 {source_id}',
-            price=detail.get('price'),
-            area=detail.get('area'),
-            price_per_sqm=detail.get('price_per_sqm'),
-            layout=detail.get('layout'),
-            building_age=detail.get('building_age'),
-            floor=detail.get('floor'),
-            direction=detail.get('direction'),
-            address=detail.get('address'),
-            prefecture=detail.get('prefecture'),
-            city=detail.get('city'),
-            station_name=detail.get('station_name'),
-            station_distance=detail.get('station_distance'),
-            access_info=detail.get('access_info'),
-            management_fee=detail.get('management_fee'),
-            repair_reserve=detail.get('repair_reserve'),
-            features=detail.get('features', '{}'),
-            is_active=True
-        )
-        
-        session.add(property_obj)
-        session.commit()
-        return "saved"
+        writer.add(dict(detail, url=url, source_id=source_id, title=detail.get('title') or f'物件 {source_id}'))
+        return "queued"
     except Exception as e:
-        print(f"      ❌ 保存エラー ({url}): {e}")
-        session.rollback()
+        print(f"      ❌ 取得エラー ({url}): {e}")
         return "error"
 
-def process_area(area_code, config, session, scraper):
-    """区ごとにページを巡回"""
-    base_url = f'https://suumo.jp/ms/chuko/tokyo/sc_{area_code}/'
-    pages = config['pages']
-    
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    saved_count = 0
+def process_area(area_code, config, session, writer, scraper):
+    """区ごとに一覧を巡回（最終ページで自動終了）"""
+    search_url = listing_url('tokyo', ward=area_code)
+    crawler = ListingCrawler(scraper, max_pages=config['pages'])
+    saved_before = writer.counts['saved']
     
-    for page in range(1, pages + 1):
-        try:
-            url = base_url if page == 1 else f"{base_url}?page={page}"
-            print(f"  📄 ページ {page}/{pages} をスキャン中... ({config['name']})")
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code != 200:
-                print(f"    ❌ HTTP {response.status_code}")
-                continue
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            page_urls = set()
-            for link in links:
-                href = link['href']
-                if '/ms/chuko/tokyo/' in href and '/nc_' in href:
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0].rstrip('/') + '/bukkengaiyo/'
-                    page_urls.add(href)
-            
-            print(f"    🔍 {len(page_urls)}件のURLを発見。保存開始...")
-            
-            for p_url in page_urls:
-                result = save_property(p_url, session, scraper)
-                if result == "saved":
-                    saved_count += 1
-                    print(f"      ✅ 保存成功: {p_url.split('/nc_')[1].split('/')[0]}")
-            
-            time.sleep(CRAWL_INTERVAL)
-            
-        except Exception as e:
-            print(f"    ⚠️ ページエラー: {e}")
-            continue
+    print(f"  📄 一覧をスキャン中... ({config['name']})")
+    try:
+        for p_url in crawler.iter_property_urls(search_url):
+            save_property(p_url, session, writer, scraper)
+    except Exception as e:
+        print(f"    ⚠️ 一覧取得エラー: {e}")
+    writer.flush()
             
-    return saved_count
+    return writer.counts['saved'] - saved_before
 
 def main():
     print("=" * 60)
@@ -122,20 +70,23 @@ def main():
     
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0)
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL)
+    # 取得結果はまとめて書き込む（1件ごとのコミットを避ける）
+    writer = WriteBehindBuffer(session, on_flush=report_saved)
     
     total_saved = 0
     
     try:
         for area_code, config in AREAS.items():
             print(f"\n{config['name']} の処理を開始")
-            count = process_area(area_code, config, session, scraper)
+            count = process_area(area_code, config, session, writer, scraper)
             total_saved += count
             print(f"  ✨ {config['name']} 完了: +{count}件")
             
     except KeyboardInterrupt:
         print("\n🛑 中断されました")
     finally:
+        writer.close()  # 中断時もバッファに残った分を書き込む
         session.close()
         print("\n" + "=" * 60)
         print(f"🏁 終了。新規保存: {total_saved}件")
@@ -4,19 +4,25 @@
 東京23区すべてから物件データを収集して500件以上を目指す
 """
 
+import argparse
 import os
 import sys
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # プロジェクトルートをPythonパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.models.database import get_session, get_engine, Property, PriceHistory, save_or_update_property
+from src.models.database import get_session, get_engine, Property, PriceHistory, apply_listing_cards
+from src.models.delisting import DelistingSweeper
 from src.scrapers.suumo_scraper import SuumoScraper
-import requests
+from src.scrapers.http_cache import HttpCache
+from src.scrapers.archive import HtmlArchive
+from src.models.frontier import CrawlFrontier
+from src.models.write_buffer import WriteBehindBuffer
+from src.scrapers.pipeline import DetailPipeline
+from src.scrapers.listing_crawler import ListingCrawler, listing_url, batched
 
 # 東京23区の設定
 AREAS = {
@@ -45,106 +51,181 @@ AREAS = {
     'edogawa': {'pages': 10, 'name': '江戸川区'},
 }
 
-CRAWL_INTERVAL = 3.0  # スクレイピング間隔
+CRAWL_INTERVAL = 1.0  # リクエスト間隔（全ワーカー共通のレート上限）
+CONCURRENCY = 4  # 詳細ページの同時取得数
+BATCH_SIZE = 30  # まとめて詳細取得する件数（一覧約1ページ分）
+REVISIT_AFTER = timedelta(hours=12)  # 取得済み・失敗したURLを再取得するまでの間隔（中断後の再開ではスキップ）
 
-def save_property(url, session, scraper):
-    """URLから物件情報を取得して保存または更新"""
+WRITE_BATCH_ROWS = 200  # この件数たまったらまとめてDBに書き込む
+WRITE_BATCH_SECONDS = 5.0  # 最初の1件からこの秒数経ったら書き込む
+MAX_MISSED_CRAWLS = 3  # この回数の巡回で続けて見つからなければ掲載終了
+
+def source_id_of(url):
+    return url.split('/nc_')[1].split('/')[0]
+
+def make_writer(session, frontier, scraper=None):
+    """
+    書き込みバッファを作成
+
+    DBへの書き込みが済んだURLだけフロンティアで完了にし、HTTPキャッシュ・アーカイブに
+    記録する（書き込み前に中断したURLはリース切れ後に再取得・再パースされる）。
+    """
+    def on_flush(results):
+        urls = [detail['url'] for detail, _ in results]
+        if scraper:
+            scraper.confirm_saved(urls)
+        frontier.complete(urls)
+        for detail, outcome in results:
+            if outcome == "saved":
+                print(f"      ✅ 保存成功: {source_id_of(detail['url'])}")
+    return WriteBehindBuffer(session, max_rows=WRITE_BATCH_ROWS, max_seconds=WRITE_BATCH_SECONDS,
+                             on_flush=on_flush)
+
+def sweep_delisted(sweeper, crawler, scraper):
+    """巡回で見つからなかった物件を掲載終了にする（書き込みバッファを flush した後に呼ぶ）"""
     try:
-        # source_idを抽出
-        source_id = url.split('/nc_')[1].split('/')[0] if '/nc_' in url else None
-        if not source_id:
-            return "skip"
-        
-        # 詳細取得
-        detail = scraper.get_property_detail(url)
-        if not detail or not detail.get('price'):
-            return "error"
-        
-        # 共通関数を使用して保存または更新
-        return save_or_update_property(session, detail, source_id)
-        
+        sweeper.finish(crawler.completed, probe=scraper.probe_status)
+        print(f"    🧹 {sweeper.summary()}")
     except Exception as e:
-        print(f"      ❌ 処理エラー ({url}): {e}")
-        return "error"
+        print(f"    ⚠️ 掲載終了の判定エラー: {e}")
 
-def process_area(area_code, config, session, scraper):
-    """区ごとにページを巡回し、見つけ次第保存"""
-    base_url = f'https://suumo.jp/ms/chuko/tokyo/sc_{area_code}/'
-    pages = config['pages']
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    }
+def work_frontier(frontier, writer, scraper, pipeline=None):
+    """
+    フロンティアからURLを BATCH_SIZE 件ずつリースして取得し、書き込みバッファへ（待ちがなくなるまで）
+
+    pipeline を渡すとパースを別プロセスで行い、取得と並行させる。
+    """
+    while True:
+        batch = frontier.claim(BATCH_SIZE)
+        if not batch:
+            return
+        urls = [url for url, _ in batch]
+        try:
+            details = (pipeline or scraper).get_property_details(urls)
+        except BaseException:
+            # 中断時はリースを返却し、次回（または他のワーカー）に回す
+            frontier.release(urls)
+            raise
+        failed = []
+        for p_url, detail in zip(urls, details):
+            if not detail or not (detail.get('unchanged') or detail.get('price')):
+                failed.append(p_url)
+                continue
+            writer.add(dict(detail, url=p_url))
+        scraper.discard_fetched(failed)
+        frontier.fail(failed)
+
+def process_area(area_code, config, session, scraper, frontier=None, pipeline=None, writer=None):
+    """区ごとに一覧を巡回してフロンティアに積み、見つけ次第取得・保存"""
+    frontier = frontier or CrawlFrontier(session.get_bind())
+    writer = writer or make_writer(session, frontier, scraper)
+    search_url = listing_url('tokyo', ward=area_code)
+    crawler = ListingCrawler(scraper, max_pages=config['pages'])
+    sweeper = DelistingSweeper(session, search_url, ward=config['name'], max_missed=MAX_MISSED_CRAWLS)
     
-    saved_count = 0
+    saved_before = writer.counts['saved']
     
-    for page in range(1, pages + 1):
-        try:
-            url = base_url if page == 1 else f"{base_url}?page={page}"
-            print(f"  📄 ページ {page}/{pages} をスキャン中...")
+    try:
+        # 一覧から見つかったURLを BATCH_SIZE 件ずつフロンティアに積み、並列取得して保存
+        for batch in batched(crawler.iter_property_urls(search_url), BATCH_SIZE):
+            sweeper.saw(source_id_of(url) for url in batch)
+            queued = frontier.add([(url, source_id_of(url)) for url in batch], revisit_after=REVISIT_AFTER)
+            print(f"    🔍 {len(batch)}件のURLを発見（未取得 {queued}件）。保存開始...")
+            work_frontier(frontier, writer, scraper, pipeline)
+    except Exception as e:
+        print(f"    ⚠️ 一覧取得エラー: {e}")
+    writer.flush()
+    sweep_delisted(sweeper, crawler, scraper)
             
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code != 200:
-                print(f"    ❌ HTTP {response.status_code}")
+    return writer.counts['saved'] - saved_before
+
+def process_area_cards(area_code, config, session, scraper, frontier=None, pipeline=None, writer=None):
+    """
+    一覧カードだけで差分更新（カード取込モード）
+
+    一覧カードの価格・面積・間取り・築年をDBと照合し、新規物件と主要項目が
+    変わった物件だけ詳細ページを取得する。価格変更はカードから直接価格履歴へ記録。
+    """
+    frontier = frontier or CrawlFrontier(session.get_bind())
+    writer = writer or make_writer(session, frontier, scraper)
+    search_url = listing_url('tokyo', ward=area_code)
+    crawler = ListingCrawler(scraper, max_pages=config['pages'])
+    sweeper = DelistingSweeper(session, search_url, ward=config['name'], max_missed=MAX_MISSED_CRAWLS)
+    counts = {'cards': 0, 'price_changed': 0, 'queued': 0}
+    saved_before = writer.counts['saved']
+
+    try:
+        for batch in batched(crawler.iter_cards(search_url), BATCH_SIZE):
+            sweeper.saw(card['source_id'] for card in batch)
+            statuses = apply_listing_cards(session, batch)
+            counts['cards'] += len(batch)
+            counts['price_changed'] += statuses.count("price_changed")
+
+            to_fetch = [(card['url'], card['source_id']) for card, status in zip(batch, statuses)
+                        if status in ("new", "changed")]
+            if not to_fetch:
                 continue
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            page_urls = set()
-            for link in links:
-                href = link['href']
-                if '/ms/chuko/tokyo/' in href and '/nc_' in href:
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0].rstrip('/') + '/bukkengaiyo/'
-                    page_urls.add(href)
-            
-            print(f"    🔍 {len(page_urls)}件のURLを発見。保存開始...")
-            
-            for p_url in page_urls:
-                result = save_property(p_url, session, scraper)
-                if result == "saved":
-                    saved_count += 1
-                    print(f"      ✅ 保存成功: {p_url.split('/nc_')[1].split('/')[0]}")
-                elif result == "exists":
-                    pass # 冗長なので出力しない
-            
-            time.sleep(CRAWL_INTERVAL)
-            
-        except Exception as e:
-            print(f"    ⚠️ ページエラー: {e}")
-            continue
-            
-    return saved_count
+            print(f"    🔍 カード{len(batch)}件中 {len(to_fetch)}件を詳細取得...")
+            # 変化が分かっている物件なので取得済みでも再取得する（HTTPキャッシュで未変更扱いにしない）
+            scraper.forget_detail([card['url'] for card, status in zip(batch, statuses) if status == "changed"])
+            counts['queued'] += frontier.add(to_fetch, priority=1, revisit_after=timedelta(0))
+            work_frontier(frontier, writer, scraper, pipeline)
+    except Exception as e:
+        print(f"    ⚠️ 一覧取得エラー: {e}")
+    writer.flush()
+    sweep_delisted(sweeper, crawler, scraper)
+
+    print(f"    📋 カード{counts['cards']}件 / 価格変更{counts['price_changed']}件 / 詳細取得{counts['queued']}件")
+    return writer.counts['saved'] - saved_before
 
 def main():
+    parser = argparse.ArgumentParser(description='東京23区の物件データ収集')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='パース用プロセス数（省略時はCPUコア数）')
+    parser.add_argument('--cards', action='store_true',
+                        help='一覧カードで差分判定し、新規・変更物件だけ詳細取得する')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🚀 超高速インクリメンタル収集（目標: 500件以上）")
-    print("見つけ次第DBにコミットします。Streamlitでリアルタイムに確認可能")
+    print("数秒ごとにまとめてDBにコミットします。Streamlitでリアルタイムに確認可能")
+    print("中断しても再実行で続きから再開。scripts/crawl_worker.py で並列化できます")
     print("=" * 60)
     
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0) # 加速
+    frontier = CrawlFrontier(engine)
+    cache = HttpCache()
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL, concurrency=CONCURRENCY, cache=cache, archive=HtmlArchive()) # 加速
+    pipeline = DetailPipeline(scraper, parse_workers=args.parse_workers)
+    writer = make_writer(session, frontier, scraper)
     
     total_saved = 0
     
     try:
         for idx, (area_code, config) in enumerate(AREAS.items(), 1):
             print(f"\n[{idx}/23] {config['name']} の処理を開始")
-            count = process_area(area_code, config, session, scraper)
+            if args.cards:
+                count = process_area_cards(area_code, config, session, scraper, frontier, pipeline, writer)
+            else:
+                count = process_area(area_code, config, session, scraper, frontier, pipeline, writer)
             total_saved += count
             print(f"  ✨ {config['name']} 完了: +{count}件 (合計: {total_saved}件)")
             
     except KeyboardInterrupt:
         print("\n🛑 中断されました")
     finally:
+        writer.close()  # 中断時もバッファに残った分を書き込む
         session.close()
         print("\n" + "=" * 60)
         print(f"🏁 終了。今回のセッションでの新規保存: {total_saved}件")
+        print(writer.summary())
+        print(cache.summary())
+        print(scraper.rate_limiter.summary())
+        print(frontier.summary())
+        print(pipeline.summary())
+        pipeline.close()
+        cache.close()
         print("=" * 60)
 
 if __name__ == '__main__':
@@ -4,16 +4,17 @@
 """
 import os
 import sys
-import time
 from pathlib import Path
-import requests
 
 # プロジェクトルートをPythonパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.models.database import get_session, get_engine, Property
+from src.models.attributes import derive_attributes
+from src.models.area_stats import snapshot, update_area_stats
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.listing_crawler import ListingCrawler, listing_url
 
 # 横浜市都筑区の設定（30ページ）
 AREAS = {
@@ -55,10 +56,12 @@ def save_property(url, session, scraper):
             management_fee=detail.get('management_fee'),
             repair_reserve=detail.get('repair_reserve'),
             features=detail.get('features', '{}'),
-            is_active=True
+            is_active=True,
+            **derive_attributes(detail)
         )
         
         session.add(property_obj)
+        update_area_stats(session, added=[snapshot(property_obj)])
         session.commit()
         return "saved"
     except Exception as e:
@@ -67,50 +70,20 @@ def save_property(url, session, scraper):
         return "error"
 
 def process_area(area_code, config, session, scraper):
-    """エリアごとにページを巡回（神奈川県版）"""
-    base_url = f'https://suumo.jp/ms/chuko/kanagawa/sc_{area_code}/'
-    pages = config['pages']
-    
-    headers = {'User-Agent': 'Mozilla/5.0'}
+    """エリアごとに一覧を巡回（神奈川県版・最終ページで自動終了）"""
+    search_url = listing_url('kanagawa', ward=area_code)
+    crawler = ListingCrawler(scraper, max_pages=config['pages'])
     saved_count = 0
     
-    for page in range(1, pages + 1):
-        try:
-            url = base_url if page == 1 else f"{base_url}?page={page}"
-            print(f"  📄 ページ {page}/{pages} をスキャン中... ({config['name']})")
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code != 200:
-                print(f"    ❌ HTTP {response.status_code}")
-                continue
-            
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            page_urls = set()
-            for link in links:
-                href = link['href']
-                if '/ms/chuko/kanagawa/' in href and '/nc_' in href:
-                    if not href.startswith('http'):
-                        href = 'https://suumo.jp' + href
-                    if 'bukkengaiyo' not in href:
-                        href = href.split('?')[0].rstrip('/') + '/bukkengaiyo/'
-                    page_urls.add(href)
-            
-            print(f"    🔍 {len(page_urls)}件のURLを発見。保存開始...")
-            
-            for p_url in page_urls:
-                result = save_property(p_url, session, scraper)
-                if result == "saved":
-                    saved_count += 1
-                    print(f"      ✅ 保存成功: {p_url.split('/nc_')[1].split('/')[0]}")
-            
-            time.sleep(CRAWL_INTERVAL)
-            
-        except Exception as e:
-            print(f"    ⚠️ ページエラー: {e}")
-            continue
+    print(f"  📄 一覧をスキャン中... ({config['name']})")
+    try:
+        for p_url in crawler.iter_property_urls(search_url):
+            result = save_property(p_url, session, scraper)
+            if result == "saved":
+                saved_count += 1
+                print(f"      ✅ 保存成功: {p_url.split('/nc_')[1].split('/')[0]}")
+    except Exception as e:
+        print(f"    ⚠️ 一覧取得エラー: {e}")
             
     return saved_count
 
@@ -121,7 +94,7 @@ def main():
     
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0)
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL)
     
     total_saved = 0
     
@@ -6,13 +6,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import time
-import re
-from bs4 import BeautifulSoup
-import requests
+from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.listing_crawler import ListingCrawler
 
 # 設定
-BASE_URL = "https://suumo.jp"
 INTERVAL = 3.0  # リクエスト間隔（秒）
 
 # エリア別の検索URL（中古マンション）
@@ -27,70 +24,29 @@ SEARCH_URLS = {
 }
 
 
-def collect_urls_from_page(url, max_pages=5):
+def collect_urls_from_page(url, max_pages=5, scraper=None):
     """
     検索ページから物件URLを収集
     
     Args:
         url: 検索ページのURL
-        max_pages: 最大ページ数
+        max_pages: 最大ページ数（最終ページに達したらそこで終了）
+        scraper: 共有するSuumoScraper（省略時は新規作成）
     
     Returns:
         物件URLのリスト
     """
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    })
+    scraper = scraper or SuumoScraper(interval=INTERVAL)
+    crawler = ListingCrawler(scraper, max_pages=max_pages)
     
     all_urls = []
+    try:
+        for property_url in crawler.iter_property_urls(url):
+            all_urls.append(property_url)
+    except Exception as e:
+        print(f"  ⚠ エラー: {e}")
     
-    for page in range(1, max_pages + 1):
-        # ページ番号付きURL
-        page_url = f"{url}&page={page}" if page > 1 else url
-        
-        print(f"📄 ページ {page}/{max_pages} を取得中...")
-        
-        try:
-            response = session.get(page_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # 物件カードから詳細ページURLを抽出
-            property_cards = soup.find_all('div', class_='property_unit')
-            
-            count = 0
-            for card in property_cards:
-                # h2.property_unit-title a からURLを取得
-                title_elem = card.find('h2', class_='property_unit-title')
-                if title_elem:
-                    link = title_elem.find('a')
-                    if link and 'href' in link.attrs:
-                        property_url = link['href']
-                        
-                        # 相対URLを絶対URLに変換
-                        if property_url.startswith('/'):
-                            property_url = BASE_URL + property_url
-                        
-                        # /nc_XXXXX/ の形式をチェック
-                        if '/nc_' in property_url:
-                            all_urls.append(property_url)
-                            count += 1
-            
-            print(f"  ✓ {count}件の物件URLを発見")
-            
-            if count == 0:
-                print(f"  これ以上物件が見つかりません。")
-                break
-            
-            # レート制限
-            time.sleep(INTERVAL)
-            
-        except Exception as e:
-            print(f"  ⚠ エラー: {e}")
-            break
-    
+    print(f"  ✓ {len(all_urls)}件の物件URLを発見")
     return all_urls
 
 
@@ -129,12 +85,13 @@ def main():
     max_pages = input("\n各エリアで取得するページ数 (デフォルト: 5): ").strip()
     max_pages = int(max_pages) if max_pages.isdigit() else 5
     
-    # URL収集
+    # URL収集（接続プールとレート制限は全エリアで共有）
     all_property_urls = []
+    scraper = SuumoScraper(interval=INTERVAL)
     
     for area in areas:
         print(f"\n🏙️ {area} の物件URLを収集中...")
-        urls = collect_urls_from_page(SEARCH_URLS[area], max_pages)
+        urls = collect_urls_from_page(SEARCH_URLS[area], max_pages, scraper)
         all_property_urls.extend(urls)
         print(f"  合計 {len(urls)}件")
     
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+クロールフロンティアのワーカー
+
+collect_tokyo23.py などが crawl_frontier テーブルに積んだURLをリースして
+取得・保存する。複数プロセスを同時に起動してもURLは重複取得しない。
+
+使い方:
+    python scripts/crawl_worker.py [--idle-exit 秒]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.database import get_session, get_engine
+from src.models.frontier import CrawlFrontier
+from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.http_cache import HttpCache
+from src.scrapers.archive import HtmlArchive
+from src.scrapers.pipeline import DetailPipeline
+from scripts.collect_tokyo23 import work_frontier, make_writer, CRAWL_INTERVAL, CONCURRENCY
+
+POLL_INTERVAL = 5  # 待ちURLがないときの確認間隔（秒）
+
+
+def main():
+    parser = argparse.ArgumentParser(description='クロールフロンティアのワーカー')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='パース用プロセス数（省略時はCPUコア数）')
+    parser.add_argument('--idle-exit', type=int, default=60,
+                        help='待ちURLがこの秒数なければ終了（0で即終了）')
+    args = parser.parse_args()
+
+    engine = get_engine()
+    session = get_session(engine)
+    frontier = CrawlFrontier(engine)
+    cache = HttpCache()
+    scraper = SuumoScraper(interval=CRAWL_INTERVAL, concurrency=CONCURRENCY, cache=cache, archive=HtmlArchive())
+    pipeline = DetailPipeline(scraper, parse_workers=args.parse_workers)
+    writer = make_writer(session, frontier, scraper)
+
+    print(f"👷 ワーカー {frontier.worker_id} 起動")
+    print(frontier.summary())
+
+    idle_since = time.monotonic()
+    try:
+        while True:
+            if frontier.counts().get('pending', 0):
+                work_frontier(frontier, writer, scraper, pipeline)
+                idle_since = time.monotonic()
+                continue
+            writer.flush()
+            if time.monotonic() - idle_since >= args.idle_exit:
+                break
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        print("\n🛑 中断されました（リース中のURLは返却済み）")
+    finally:
+        writer.close()
+        session.close()
+        print(f"🏁 終了。{writer.summary()}")
+        print(frontier.summary())
+        print(cache.summary())
+        print(pipeline.summary())
+        pipeline.close()
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.scrapers.suumo_scraper import SuumoScraper
 from src.models.database import init_db, get_session, Property
+from src.models.attributes import derive_attributes
+from src.models.area_stats import snapshot, update_area_stats
 from datetime import datetime
 import re
 
@@ -106,10 +108,12 @@ def main():
                 features=detail['features'],
                 first_seen=datetime.now(),
                 last_updated=datetime.now(),
-                is_active=True
+                is_active=True,
+                **derive_attributes(detail)
             )
             
             session.add(new_property)
+            update_area_stats(session, added=[snapshot(new_property)])
             session.commit()
             saved_count += 1
             
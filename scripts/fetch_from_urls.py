@@ -8,9 +8,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.scrapers.suumo_scraper import SuumoScraper
 from src.models.database import init_db, get_session, get_engine, Property
-from src.scoring.property_scorer import PropertyScorer
-from datetime import datetime
-import json
+from src.models.write_buffer import WriteBehindBuffer
+from src.scoring.score_store import load_scorer, property_record
 
 # 取得したい物件URLのリスト（千代田区の実在物件）
 PROPERTY_URLS = [
@@ -47,7 +46,16 @@ def main():
     print(f"\n[2/3] {len(PROPERTY_URLS)}件の物件データを取得中...")
     scraper = SuumoScraper(interval=3.0)
     
-    saved_count = 0
+    def report_saved(results):
+        for detail, outcome in results:
+            if outcome == "saved":
+                print(f"✓ 保存完了: {detail['title']}")
+                print(f"  価格: {detail.get('price', '不明')}万円")
+                print(f"  面積: {detail.get('area', '不明')}㎡")
+                if detail.get('station_name'):
+                    print(f"  駅: {detail['station_name']}駅 徒歩{detail.get('station_distance', '?')}分")
+    
+    writer = WriteBehindBuffer(session, on_flush=report_saved)
     error_count = 0
     
     for idx, url in enumerate(PROPERTY_URLS):
@@ -87,90 +95,26 @@ def main():
         if not detail.get('title'):
             detail['title'] = f"物件 {property_id}"
         
-        # 新規物件を保存
-        try:
-            new_property = Property(
-                source=detail['source'],
-                source_id=property_id,
-                url=detail['url'],
-                title=detail['title'],
-                price=detail['price'],
-                area=detail['area'],
-                price_per_sqm=detail['price_per_sqm'],
-                building_age=detail['building_age'],
-                floor=detail['floor'],
-                direction=detail['direction'],
-                layout=detail['layout'],
-                address=detail['address'],
-                prefecture=detail['prefecture'],
-                city=detail['city'],
-                station_name=detail['station_name'],
-                station_distance=detail['station_distance'],
-                management_fee=detail['management_fee'],
-                repair_reserve=detail['repair_reserve'],
-                features=detail['features'],
-                first_seen=datetime.now(),
-                last_updated=datetime.now(),
-                is_active=True
-            )
-            
-            session.add(new_property)
-            session.commit()
-            saved_count += 1
-            
-            print(f"✓ 保存完了: {detail['title']}")
-            print(f"  価格: {detail.get('price', '不明')}万円")
-            print(f"  面積: {detail.get('area', '不明')}㎡")
-            if detail.get('station_name'):
-                print(f"  駅: {detail['station_name']}駅 徒歩{detail.get('station_distance', '?')}分")
-            
-        except Exception as e:
-            print(f"⚠ 保存エラー: {e}")
-            error_count += 1
-            session.rollback()
+        # 新規物件は書き込みバッファにまとめて保存
+        writer.add(dict(detail, url=url, source_id=property_id))
+    
+    try:
+        writer.close()
+    except Exception as e:
+        print(f"⚠ 保存エラー: {e}")
+        error_count += len(writer)
+    saved_count = writer.counts['saved']
     
     # スコアリング
     print(f"\n[3/3] スコアリング実行中...")
     all_properties = session.query(Property).filter_by(is_active=True).all()
     
     if all_properties:
-        scorer = PropertyScorer()
-        
-        # 比較対象物件のリストを作成
-        comparable_data = []
-        for p in all_properties:
-            comparable_data.append({
-                'price': p.price,
-                'area': p.area,
-                'price_per_sqm': p.price_per_sqm,
-                'building_age': p.building_age,
-                'management_fee': p.management_fee,
-                'repair_reserve': p.repair_reserve
-            })
+        # ファミリー向けの重みで採点（比較対象は同じ駅の他の販売中物件）
+        scorer = load_scorer(session, target_type='family')
         
         for prop in all_properties:
-            # 物件データを辞書に変換
-            prop_data = {
-                'title': prop.title,
-                'price': prop.price,
-                'area': prop.area,
-                'price_per_sqm': prop.price_per_sqm,
-                'building_age': prop.building_age,
-                'floor': prop.floor,
-                'direction': prop.direction,
-                'layout': prop.layout,
-                'address': prop.address,
-                'prefecture': prop.prefecture,
-                'city': prop.city,
-                'station_name': prop.station_name,
-                'station_distance': prop.station_distance,
-                'management_fee': prop.management_fee,
-                'repair_reserve': prop.repair_reserve,
-                'features': prop.features
-            }
-            
-            # ファミリー向けスコアを計算
-            score_result = scorer.calculate_score(prop_data, 'family', comparable_data)
+            score_result = scorer.calculate_score(property_record(prop))
             
             print(f"✓ {prop.title}: {score_result['total_score']}点")
     
@@ -8,7 +8,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.scrapers.suumo_scraper import SuumoScraper
 from src.models.database import init_db, get_session, get_engine, Property
-from src.scoring.property_scorer import PropertyScorer
+from src.models.attributes import derive_attributes
+from src.models.area_stats import snapshot, update_area_stats
+from src.scoring.score_store import load_scorer, property_record
 from datetime import datetime
 import json
 
@@ -81,10 +83,12 @@ def main():
             features=detail['features'],
             first_seen=datetime.now(),
             last_updated=datetime.now(),
-            is_active=True
+            is_active=True,
+            **derive_attributes(detail)
         )
         
         session.add(new_property)
+        update_area_stats(session, added=[snapshot(new_property)])
         session.commit()
         saved_count += 1
         
@@ -100,43 +104,11 @@ def main():
     all_properties = session.query(Property).filter_by(is_active=True).all()
     
     if all_properties:
-        scorer = PropertyScorer()
-        
-        # 比較対象物件のリストを作成
-        comparable_data = []
-        for p in all_properties:
-            comparable_data.append({
-                'price': p.price,
-                'area': p.area,
-                'price_per_sqm': p.price_per_sqm,
-                'building_age': p.building_age,
-                'management_fee': p.management_fee,
-                'repair_reserve': p.repair_reserve
-            })
+        # ファミリー向けの重みで採点（比較対象は同じ駅の他の販売中物件）
+        scorer = load_scorer(session, target_type='family')
         
         for prop in all_properties:
-            # 物件データを辞書に変換
-            prop_data = {
-                'title': prop.title,
-                'price': prop.price,
-                'area': prop.area,
-                'price_per_sqm': prop.price_per_sqm,
-                'building_age': prop.building_age,
-                'floor': prop.floor,
-                'direction': prop.direction,
-                'layout': prop.layout,
-                'address': prop.address,
-                'prefecture': prop.prefecture,
-                'city': prop.city,
-                'station_name': prop.station_name,
-                'station_distance': prop.station_distance,
-                'management_fee': prop.management_fee,
-                'repair_reserve': prop.repair_reserve,
-                'features': prop.features
-            }
-            
-            # ファミリー向けスコアを計算
-            score_result = scorer.calculate_score(prop_data, 'family', comparable_data)
+            score_result = scorer.calculate_score(property_record(prop))
             
             print(f"✓ {prop.title}: {score_result['total_score']}点")
     
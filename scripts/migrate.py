@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+データベースのマイグレーション
+
+既存のDBに未適用のスキーマ変更（カラム追加・インデックス等）を適用する。
+アプリ起動時（init_db）にも自動で適用されるが、収集スクリプトの実行前に
+明示的に更新したい場合に使う。
+
+使い方:
+    python scripts/migrate.py [--db data/mansion_scientist.db]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.database import Base, get_engine
+from src.models.migrations import MIGRATIONS, current_version, run_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='データベースのマイグレーション')
+    parser.add_argument('--db', default='data/mansion_scientist.db', help='対象のDBファイル')
+    args = parser.parse_args()
+
+    engine = get_engine(args.db)
+    Base.metadata.create_all(engine)  # 未作成のテーブルは最新の定義で作成
+
+    latest = max(m.version for m in MIGRATIONS)
+    print(f"📦 {args.db}: バージョン {current_version(engine)} → {latest}")
+
+    applied = run_migrations(engine)
+    for migration in applied:
+        print(f"  ✅ {migration.version}: {migration.name}")
+    if not applied:
+        print("  ✨ 最新です")
+
+
+if __name__ == '__main__':
+    main()
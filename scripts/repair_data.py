@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 import os
 import sys
-import time
 from pathlib import Path
 
 # プロジェクトルートをPythonパスに追加
@@ -9,12 +8,16 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.models.database import get_session, get_engine, Property
+from src.models.area_stats import snapshot, update_area_stats
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.http_cache import HttpCache
+from src.scrapers.archive import HtmlArchive
 
 def repair():
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0)
+    cache = HttpCache()
+    scraper = SuumoScraper(interval=1.0, cache=cache, archive=HtmlArchive())
     
     # 修復対象:
     # 1. 駅距離がNULL または アクセス情報が空
@@ -32,24 +35,29 @@ def repair():
         print(f"[{i}/{len(targets)}] {prop.title} ({prop.id}) を再取得中...")
         try:
             detail = scraper.get_property_detail(prop.url)
-            if detail:
+            if detail and detail.get('unchanged'):
+                print("  ⏭ 前回取得時から変更なし。スキップ")
+            elif detail:
+                before = snapshot(prop)
                 prop.station_distance = detail.get('station_distance', prop.station_distance)
                 prop.station_name = detail.get('station_name', prop.station_name)
                 prop.access_info = detail.get('access_info', prop.access_info)
                 prop.management_fee = detail.get('management_fee', prop.management_fee)
                 prop.repair_reserve = detail.get('repair_reserve', prop.repair_reserve)
+                update_area_stats(session, [before], [snapshot(prop)])
                 session.commit()
+                scraper.confirm_saved([prop.url])
                 print(f"  ✅ 修正: 徒歩{prop.station_distance}分 / 管理費{prop.management_fee}円 / 修繕{prop.repair_reserve}円")
             else:
                 print(f"  ⚠️ 取得失敗")
         except Exception as e:
             print(f"  ❌ エラー: {e}")
             session.rollback()
-        
-        time.sleep(1)
     
     session.close()
     print("\n✅ 修復完了")
+    print(cache.summary())
+    cache.close()
 
 if __name__ == '__main__':
     repair()
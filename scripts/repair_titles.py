@@ -10,9 +10,11 @@ sys.path.append(os.getcwd())
 
 from sqlalchemy import func
 from src.models.database import get_engine, get_session, Property
+from src.models.area_stats import snapshot, update_area_stats
 from src.scrapers.suumo_scraper import SuumoScraper
+from src.scrapers.http_cache import HttpCache
+from src.scrapers.archive import HtmlArchive
 import logging
-import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,7 +22,8 @@ logger = logging.getLogger(__name__)
 def repair_titles():
     engine = get_engine()
     session = get_session(engine)
-    scraper = SuumoScraper(interval=1.0)
+    cache = HttpCache()
+    scraper = SuumoScraper(interval=1.0, cache=cache, archive=HtmlArchive())
     
     # 修復対象：
     # 1. タイトルが空、または「物件 」で始まるもの
@@ -39,8 +42,11 @@ def repair_titles():
             # 再取得
             detail = scraper.get_property_detail(prop.url)
             
-            if detail and detail.get('title') and not detail['title'].startswith('物件 '):
+            if detail and detail.get('unchanged'):
+                logger.info(f"Unchanged since last fetch, skipped: {prop.source_id}")
+            elif detail and detail.get('title') and not detail['title'].startswith('物件 '):
                 old_title = prop.title
+                before = snapshot(prop)
                 prop.title = detail['title']
                 
                 # 他の項目もついでに最新化（特に将来性に関連するブランド名判定に重要）
@@ -57,21 +63,22 @@ def repair_titles():
                 if detail.get('station_name'):
                     prop.station_name = detail['station_name']
                 
+                update_area_stats(session, [before], [snapshot(prop)])
                 session.commit()
+                scraper.confirm_saved([prop.url])
                 logger.info(f"Successfully repaired: {old_title} -> {prop.title}")
                 repaired_count += 1
             else:
                 logger.warning(f"Could not get clean title for {prop.source_id}. Got: {detail.get('title') if detail else 'None'}")
             
-            # サーバー負荷軽減
-            time.sleep(0.5)
-            
         except Exception as e:
             logger.error(f"Error repairing property {prop.id}: {e}")
             session.rollback()
             
     session.close()
     logger.info(f"Title repair completed. Repaired {repaired_count} properties.")
+    logger.info(cache.summary())
+    cache.close()
 
 if __name__ == "__main__":
     repair_titles()
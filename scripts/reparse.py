@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+HTMLアーカイブからの再パーススクリプト
+
+パーサー（_parse_bukkengaiyo）を修正して PARSER_VERSION を上げた後に実行すると、
+旧バージョンでパースされた物件だけをアーカイブから再パースしてDBを更新する。
+SUUMOへのアクセスは発生しない。
+
+使い方:
+    python scripts/reparse.py [--workers N] [--all]
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.database import get_session, get_engine, save_or_update_property, refresh_property_fields
+from src.scrapers.archive import HtmlArchive
+from src.scrapers.suumo_scraper import PARSER_VERSION, parse_detail_html
+
+COMMIT_BATCH = 500  # この件数ごとにコミット・バージョン記録
+
+
+def reparse_page(job):
+    """アーカイブの1ページをパース（ワーカープロセスで実行）"""
+    url, object_path = job
+    try:
+        with gzip.open(object_path, 'rb') as f:
+            return url, parse_detail_html(f.read(), url)
+    except Exception as e:
+        print(f"  ❌ パースエラー ({url}): {e}")
+        return url, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTMLアーカイブから物件データを再構築')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='パース用プロセス数')
+    parser.add_argument('--all', action='store_true', help='パーサーバージョンに関係なく全件を再パース')
+    args = parser.parse_args()
+    
+    archive = HtmlArchive()
+    target_version = PARSER_VERSION + 1 if args.all else PARSER_VERSION
+    entries = archive.stale_entries(target_version)
+    
+    print("=" * 60)
+    print(f"🔁 アーカイブから再パース（パーサー v{PARSER_VERSION}）")
+    print(f"対象: {len(entries)}件 / ワーカー: {args.workers}")
+    print("=" * 60)
+    
+    if not entries:
+        print("再パースが必要な物件はありません")
+        return
+    
+    engine = get_engine()
+    session = get_session(engine)
+    jobs = [(url, archive.object_path(digest)) for url, digest in entries]
+    counts = {'updated': 0, 'unchanged': 0, 'saved': 0, 'error': 0}
+    pending_urls = []
+    start = time.time()
+    
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for idx, (url, detail) in enumerate(executor.map(reparse_page, jobs, chunksize=32), 1):
+                match = re.search(r'/nc_(\d+)/', url)
+                if not detail or not match:
+                    counts['error'] += 1
+                    continue
+                
+                source_id = match.group(1)
+                result = refresh_property_fields(session, detail, source_id)
+                if result == "missing" and detail.get('price'):
+                    # アーカイブにだけ残っている物件は新規保存
+                    session.commit()
+                    result = save_or_update_property(session, detail, source_id)
+                if result == "missing":
+                    result = "error"
+                counts[result] = counts.get(result, 0) + 1
+                pending_urls.append(url)
+                
+                if len(pending_urls) >= COMMIT_BATCH:
+                    session.commit()
+                    archive.mark_parsed(pending_urls, PARSER_VERSION)
+                    pending_urls = []
+                    print(f"  処理中... {idx}/{len(jobs)}")
+        
+        session.commit()
+        archive.mark_parsed(pending_urls, PARSER_VERSION)
+        
+    except KeyboardInterrupt:
+        print("\n🛑 中断されました（コミット済みの分は次回スキップされます）")
+        session.rollback()
+    finally:
+        session.close()
+        archive.close()
+    
+    elapsed = time.time() - start
+    print("\n" + "=" * 60)
+    print(f"🏁 完了 ({elapsed:.1f}秒, {len(jobs) / elapsed if elapsed > 0 else 0:.0f}件/秒)")
+    print(f"更新: {counts['updated']}件 / 変更なし: {counts['unchanged']}件 / 新規: {counts['saved']}件 / エラー: {counts['error']}件")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+変更された物件とその駅の物件だけのスコアを再計算してDBに保存するスクリプト
+
+前回の実行以降に追加・価格変更・掲載終了・販売中に戻った物件を読み、比較対象が
+変わる同じ駅の販売中物件に広げて property_scores を更新する（src/scoring/score_updater.py）。
+初回は全物件を対象にする。--watch を付けると一定間隔で繰り返し、収集中もスコアを最新に保つ。
+
+使い方:
+    python scripts/rescore_changed.py              # 1回だけ
+    python scripts/rescore_changed.py --watch 10   # 10秒ごとに繰り返す（Ctrl+C で終了）
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy.exc import OperationalError
+
+from src.models.database import init_db, get_session
+from src.scoring.score_store import SCORE_CACHE
+from src.scoring.score_updater import rescore_changed
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rescore_once(session) -> None:
+    started = time.monotonic()
+    counts = rescore_changed(session)
+    logger.info(
+        f"変更{counts['changed']}件 → 同じ駅を含め{counts['properties']}件を確認、"
+        f"{counts['written']}行を書き込み・{counts['removed']}行を削除（{time.monotonic() - started:.1f}秒）"
+    )
+
+
+def main(db_path='data/mansion_scientist.db', watch=None):
+    engine = init_db(db_path)
+    session = get_session(engine)
+
+    try:
+        while True:
+            try:
+                rescore_once(session)
+            except OperationalError as e:
+                # 収集中の書き込みと重なったときは次の回に持ち越す
+                logger.warning(f"書き込めませんでした（次の回に再実行）: {e}")
+                session.rollback()
+            if watch is None:
+                break
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(SCORE_CACHE.summary())
+        session.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='変更された物件のスコアの再計算')
+    parser.add_argument('--db', default='data/mansion_scientist.db', help='データベースのパス')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help='この秒数ごとに繰り返す')
+    args = parser.parse_args()
+    main(args.db, args.watch)
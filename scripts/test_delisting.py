@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+掲載終了の検出（DelistingSweeper）と変更駆動の再採点（rescore_changed）の確認
+
+一時ディレクトリに小さなDB（1区・4駅・30件。うち1駅は3件だけで、比較対象が足りず
+市区町村のエリア統計と比べる）を作り、巡回を
+掲載終了（最終ページまで見た回）→ HEAD 確認（途中までの回）→ 再掲載 → 価格変更 →
+掲載日数の段の変化 の順に進める。各段階で発見・再掲載・掲載終了・HEAD 確認の件数を確かめ、
+差分更新したエリア統計（area_stats）が全件からの再集計と一致すること、rescore_changed の
+後の property_scores が BatchScorer で全件を採点し直した結果と一致すること（販売終了の
+物件の行がないこと）を確かめる。
+
+使い方:
+    python scripts/test_delisting.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import update
+
+from src.models.area_stats import AreaStatsLookup, rebuild_area_stats
+from src.models.database import Property, PropertyScore, get_session, init_db, save_properties_bulk
+from src.models.delisting import DelistingSweeper
+from src.scoring.batch_scorer import BatchScorer, load_property_frame
+from src.scoring.safe_scorer import SafePropertyScorer
+from src.scoring.score_store import load_scorer, property_record
+from src.scoring.score_updater import rescore_changed
+
+AREA = 'https://suumo.jp/ms/chuko/tokyo/sc_minato/'
+WARD = '港区'
+STATIONS = ['田町', '三田', '白金高輪']
+SMALL_STATION = '芝公園'  # 最後の3件だけの駅（自分を除くと2件で比較対象が足りない）
+ROWS = 30
+MAX_MISSED = 2
+
+
+def make_detail(i: int, price: int = None):
+    """ダミーの詳細データ"""
+    station = SMALL_STATION if i >= ROWS - 3 else STATIONS[i % len(STATIONS)]
+    area = 40 + (i * 7) % 50
+    price = price or 4000 + (i * 379) % 6000
+    return {
+        'source': 'SUUMO', 'source_id': str(i), 'url': f"https://suumo.jp/ms/chuko/tokyo/nc_{i}/",
+        'title': f"テスト{station}{i}", 'price': price, 'area': area, 'price_per_sqm': price * 10000 / area,
+        'layout': ['1LDK', '2LDK', '3LDK'][i % 3], 'building_age': i % 40, 'floor': 1 + i % 15,
+        'address': f"東京都{WARD}芝{1 + i % 5}丁目", 'prefecture': '東京都',
+        'station_name': station, 'station_distance': 1 + i % 12,
+        'access_info': f"ＪＲ山手線「{station}」歩{1 + i % 12}分", 'features': '{}',
+    }
+
+
+def url_of(i: int) -> str:
+    return f"https://suumo.jp/ms/chuko/tokyo/nc_{i}/"
+
+
+def crawl(session, missing, complete: bool = True, probe=None):
+    """missing 以外の物件が一覧で見つかった1回分の巡回"""
+    sweeper = DelistingSweeper(session, AREA, ward=WARD, max_missed=MAX_MISSED)
+    sweeper.saw(str(i) for i in range(ROWS) if i not in missing)
+    counts = sweeper.finish(complete, probe)
+    print(f"  {'完了' if complete else '途中'}  {sweeper.summary()}")
+    return counts
+
+
+def property_record_of(session, i: int):
+    return property_record(session.query(Property).filter_by(source_id=str(i)).one())
+
+
+def is_active(session, i: int) -> bool:
+    return session.query(Property.is_active).filter_by(source_id=str(i)).scalar()
+
+
+def rescore(session):
+    """前回の開始以降の変更だけを再採点（取りこぼし防止の重複読みはしない）"""
+    return rescore_changed(session, overlap=timedelta(0))
+
+
+def check_area_stats(session, label: str):
+    """差分更新したエリア統計が販売中の全物件からの再集計と一致するか"""
+    def load():
+        return {
+            code: {metric: stats for metric, stats in metrics.items() if stats.count}
+            for code, metrics in AreaStatsLookup.load(session, levels=('station', 'ward', 'prefecture')).stats.items()
+            if any(stats.count for stats in metrics.values())
+        }
+
+    session.expire_all()
+    incremental = load()
+    rebuild_area_stats(session)
+    rebuilt = load()
+    session.rollback()
+    assert set(incremental) == set(rebuilt), f"{label}: エリアの過不足 {set(incremental) ^ set(rebuilt)}"
+    for code, metrics in rebuilt.items():
+        for metric, stats in metrics.items():
+            got = incremental[code].get(metric)
+            assert got is not None and got.count == stats.count, f"{label}: {code} {metric} {got} / {stats}"
+            assert abs(got.mean - stats.mean) <= 1e-9 * abs(stats.mean), f"{label}: {code} {metric} {got} / {stats}"
+            assert abs(got.m2 - stats.m2) <= 1e-6 * max(1.0, stats.m2), f"{label}: {code} {metric} {got} / {stats}"
+    print(f"  ✅ {label}: エリア統計 {len(rebuilt)}エリアが再集計と一致")
+
+
+def check_scores(session, label: str, counts):
+    """保存済みのスコアが BatchScorer で全件を採点し直した結果と一致するか"""
+    session.expire_all()
+    frame = load_property_frame(session)
+    expected = {
+        (property_id, target_type): json.dumps(result, ensure_ascii=False, default=str)
+        for target_type, scores in BatchScorer(load_scorer(session)).score_profiles(frame).items()
+        for property_id, result in zip(frame['id'], scores.results())
+    }
+    stored = {(row.property_id, row.target_type): row.detail for row in session.query(PropertyScore)}
+    versions = {row.scorer_version for row in session.query(PropertyScore)}
+    assert set(stored) == set(expected), f"{label}: スコア行の過不足 {set(stored) ^ set(expected)}"
+    mismatched = [key for key, detail in expected.items() if stored[key] != detail]
+    assert not mismatched, f"{label}: 全件の再採点と食い違う行 {mismatched[:5]}"
+    assert versions == {SafePropertyScorer.VERSION}, f"{label}: 版 {versions}"
+    print(f"  ✅ {label}: {len(stored)}行が全件の再採点と一致（{counts}）")
+    check_area_stats(session, label)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🏗️ テスト用DB作成中（{WARD}・{len(STATIONS) + 1}駅・{ROWS}件）...")
+        engine = init_db(os.path.join(tmp, 'test.db'))
+        session = get_session(engine)
+        assert save_properties_bulk(session, [make_detail(i) for i in range(ROWS)]) == ['saved'] * ROWS
+        check_scores(session, '初回', rescore(session))
+
+        # 比較対象が足りない駅の物件は市区町村の集計と比べる
+        comparables = load_scorer(session).price_scorer.comparables
+        small = property_record_of(session, ROWS - 1)
+        assert comparables.stations.comparable(small, 'sqm') is None
+        assert comparables.comparable(small, 'sqm').count == ROWS - 1
+
+        print(f"\n🧹 最終ページまで見た回で {MAX_MISSED}回続けて見つからない物件を掲載終了に")
+        counts = crawl(session, {0, 1})
+        assert counts == {'seen': ROWS - 2, 'relisted': 0, 'swept': 0, 'probed': 0, 'gone': 0}, counts
+        counts = crawl(session, {0})
+        assert counts == {'seen': ROWS - 1, 'relisted': 0, 'swept': 1, 'probed': 0, 'gone': 0}, counts
+        assert not is_active(session, 0) and is_active(session, 1)
+        counts = rescore(session)
+        # 同じ駅の物件と、市区町村の集計と比べる駅の物件（3件）を採点し直す
+        assert counts['changed'] == 1 and counts['removed'] > 0, counts
+        assert counts['properties'] == len(range(3, ROWS - 3, 3)) + 3, counts
+        check_scores(session, '掲載終了後', counts)
+
+        print(f"\n🔎 途中までの回を含めて {MAX_MISSED}回見つからない物件は HEAD で確認")
+        probe = {url_of(2): 404, url_of(3): 200}.get
+        counts = crawl(session, {0, 2, 3}, complete=False, probe=probe)
+        assert counts == {'seen': ROWS - 3, 'relisted': 0, 'swept': 0, 'probed': 0, 'gone': 0}, counts
+        counts = crawl(session, {0, 2, 3}, complete=False, probe=probe)
+        assert counts == {'seen': ROWS - 3, 'relisted': 0, 'swept': 0, 'probed': 2, 'gone': 1}, counts
+        assert not is_active(session, 2) and is_active(session, 3)
+        # 途中までの回は最終ページまで見た回として数えない
+        counts = crawl(session, {0, 2, 3})
+        assert counts['swept'] == 0, counts
+        check_scores(session, 'HEAD 確認後', rescore(session))
+
+        print("\n♻️ 一覧に再び現れた物件を販売中に戻す")
+        counts = crawl(session, {2})
+        assert counts == {'seen': ROWS - 1, 'relisted': 1, 'swept': 0, 'probed': 0, 'gone': 0}, counts
+        assert is_active(session, 0)
+        counts = rescore(session)
+        assert counts['changed'] == 1, counts
+        assert session.query(PropertyScore).join(Property, Property.id == PropertyScore.property_id)\
+            .filter(Property.source_id == '0').count() > 0
+        check_scores(session, '再掲載後', counts)
+
+        print("\n💴 価格変更")
+        detail = make_detail(5)
+        detail = make_detail(5, int(detail['price'] * 0.9))
+        assert save_properties_bulk(session, [detail]) == ['updated']
+        counts = rescore(session)
+        assert counts['changed'] == 1, counts
+        check_scores(session, '価格変更後', counts)
+
+        print("\n📅 掲載日数の加点の段が変わる（物件は更新されない）")
+        # 2秒後に掲載90日目になるよう掲載開始日をずらす（last_updated は変えない）
+        session.execute(
+            update(Property).where(Property.source_id == '6')
+            .values(first_seen=datetime.now() - timedelta(days=90, seconds=-2), last_updated=Property.last_updated)
+        )
+        session.commit()
+        time.sleep(3)
+        counts = rescore(session)
+        assert counts['changed'] == 1 and counts['written'] > 0, counts
+        check_scores(session, '段の変化後', counts)
+
+        session.close()
+        engine.dispose()
+    print("\n✅ すべて一致しました")
+
+
+if __name__ == '__main__':
+    main()
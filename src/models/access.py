@@ -0,0 +1,95 @@
+"""
+アクセス情報の正規化
+
+access_info（「路線 駅 徒歩N分」の改行区切り）を1駅1行に分解して
+property_access テーブルに保存する。路線・駅の絞り込みや「X線のいずれかの駅から
+徒歩7分以内」といった条件をインデックスで引けるようにするため。
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+
+from .database import Property, PropertyAccess
+
+_ACCESS_LINE_RE = re.compile(r'^(.+?)\s*(?:徒歩|歩)(\d+)分')
+
+
+def parse_access_info(access_info: Optional[str]) -> List[Dict]:
+    """
+    access_info を [{'line', 'station', 'walk_minutes', 'rank'}, ...] に分解
+
+    例: "ＪＲ中央線 荻窪 バス10分法務局前 徒歩3分" は駅までバスなので walk_minutes=None、
+        "都営バス 四の橋 徒歩2分" はバス路線とバス停として扱う。
+    """
+    entries = []
+    if not access_info:
+        return entries
+    for text in access_info.split('\n'):
+        m = _ACCESS_LINE_RE.search(text.strip())
+        if not m:
+            continue
+        tokens = m.group(1).split()
+        walk_minutes = int(m.group(2))
+        line = tokens[0]
+        if 'バス' in line:
+            station = tokens[-1] if len(tokens) > 1 else None
+        elif any('バス' in t for t in tokens[1:]):
+            station = tokens[1] if not tokens[1].startswith('バス') else None
+            walk_minutes = None  # 徒歩分数はバス停からのもの
+        else:
+            station = tokens[-1] if len(tokens) > 1 else None
+        entries.append({
+            'line': line,
+            'station': station,
+            'walk_minutes': walk_minutes,
+            'rank': len(entries) + 1,
+        })
+    return entries
+
+
+def replace_property_access(executor, items: Iterable[Tuple[int, Optional[str]]]) -> int:
+    """
+    物件ごとのアクセス行を access_info から作り直す（コミットは呼び出し側）
+
+    Args:
+        executor: Session または Connection
+        items: [(property_id, access_info), ...]
+
+    Returns:
+        書き込んだ行数
+    """
+    items = list(items)
+    if not items:
+        return 0
+    property_ids = [property_id for property_id, _ in items]
+    for start in range(0, len(property_ids), 500):
+        executor.execute(
+            delete(PropertyAccess).where(PropertyAccess.property_id.in_(property_ids[start:start + 500]))
+        )
+    rows = [
+        dict(entry, property_id=property_id)
+        for property_id, access_info in items
+        for entry in parse_access_info(access_info)
+    ]
+    if rows:
+        executor.execute(insert(PropertyAccess), rows)
+    return len(rows)
+
+
+def backfill_property_access(conn, batch_size: int = 2000) -> int:
+    """既存の全物件から property_access を作り直す"""
+    total = 0
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(Property.id, Property.access_info)
+            .where(Property.id > last_id)
+            .order_by(Property.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return total
+        total += replace_property_access(conn, batch)
+        last_id = batch[-1][0]
@@ -0,0 +1,332 @@
+"""
+エリア統計（area_stats）の差分更新と参照
+
+販売中物件の ㎡単価・総額・㎡あたり維持費を、駅・市区町村・都道府県ごとに
+件数・平均・偏差平方和（Welford）で持つ。物件の追加・価格変更・掲載終了のたびに
+その物件の寄与を引いて足すだけで更新でき、全件を読み直す必要がない。
+更新は1文の UPSERT／UPDATE の中で合成するので、複数の収集プロセスが同時に
+書いても集計が食い違わない。
+
+スコアラーは AreaStatsLookup から O(1) で平均・標準偏差を得る（一括採点では
+comparable_many で全物件分を配列でまとめて得る）。採点では同じ駅の比較対象が足りない
+物件に市区町村・都道府県の集計を使う（scoring.comparables.AreaComparables）。
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .database import AreaStats, Property
+
+LEVELS = ('station', 'ward', 'prefecture')
+METRICS = ('sqm', 'price', 'cost')
+
+# 物件の寄与を決める項目
+STAT_FIELDS = ('price', 'price_per_sqm', 'area', 'management_fee', 'repair_reserve',
+               'station_name', 'ward', 'prefecture', 'is_active')
+
+_LEVEL_FIELDS = {'station': 'station_name', 'ward': 'ward', 'prefecture': 'prefecture'}
+
+
+class RunningStats(NamedTuple):
+    """件数・平均・偏差平方和（Welford）"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> 'RunningStats':
+        values = list(values)
+        if not values:
+            return cls()
+        mean = math.fsum(values) / len(values)
+        return cls(len(values), mean, math.fsum((v - mean) ** 2 for v in values))
+
+    def add(self, value: float) -> 'RunningStats':
+        count = self.count + 1
+        delta = value - self.mean
+        mean = self.mean + delta / count
+        return RunningStats(count, mean, self.m2 + delta * (value - mean))
+
+    def remove(self, value: float) -> 'RunningStats':
+        """value を1件除いた集計（比較対象から自分自身を除く）"""
+        count = self.count - 1
+        if count <= 0:
+            return RunningStats()
+        mean = (self.mean * self.count - value) / count
+        return RunningStats(count, mean, max(0.0, self.m2 - (value - self.mean) * (value - mean)))
+
+    @property
+    def stdev(self) -> float:
+        """標本標準偏差（statistics.stdev と同じく n-1 で割る）"""
+        if self.count <= 1:
+            return 0.0
+        variance = max(0.0, self.m2) / (self.count - 1)
+        # 全て同じ値のとき差分更新の丸め誤差で残る分散は 0 とみなす
+        tolerance = self.mean * 1e-6
+        if variance <= tolerance * tolerance:
+            return 0.0
+        return math.sqrt(variance)
+
+
+def metric_values(data: Dict) -> Dict[str, float]:
+    """物件の指標値（スコアラーの比較対象と同じ条件で、値がない指標は含めない）"""
+    values = {}
+    if data.get('price_per_sqm'):
+        values['sqm'] = data['price_per_sqm']
+    if data.get('price'):
+        values['price'] = data['price']
+    area = data.get('area')
+    if area and area > 0:
+        values['cost'] = ((data.get('management_fee') or 0) + (data.get('repair_reserve') or 0)) / area
+    return values
+
+
+def area_codes(data: Dict) -> List[Tuple[str, str, str]]:
+    """物件が属するエリア [(area_code, level, エリア名), ...]"""
+    codes = []
+    for level in LEVELS:
+        name = data.get(_LEVEL_FIELDS[level])
+        if name:
+            codes.append((f"{level}:{name}", level, name))
+    return codes
+
+
+def snapshot(obj) -> Dict:
+    """Property（または辞書）から寄与の計算に使う項目を取り出す"""
+    if isinstance(obj, dict):
+        return {field: obj.get(field) for field in STAT_FIELDS}
+    return {field: getattr(obj, field) for field in STAT_FIELDS}
+
+
+def _partials(rows: Iterable[Dict]) -> Dict[Tuple[str, str, str], Dict[str, RunningStats]]:
+    """販売中の物件の寄与をエリア・指標ごとの部分集計にまとめる"""
+    grouped = defaultdict(lambda: defaultdict(list))
+    for data in rows:
+        if data is None or data.get('is_active') is False:
+            continue
+        values = metric_values(data)
+        if not values:
+            continue
+        for code in area_codes(data):
+            for metric, value in values.items():
+                grouped[code][metric].append(value)
+    return {
+        code: {metric: RunningStats.of(metrics.get(metric, [])) for metric in METRICS}
+        for code, metrics in grouped.items()
+    }
+
+
+def _merged_values(current, incoming) -> Dict:
+    """現在の集計に部分集計を合成する式（件数が負なら取り除く）"""
+    values = {}
+    for metric in METRICS:
+        count, mean, m2 = (getattr(current, f"{metric}_{k}") for k in ('count', 'mean', 'm2'))
+        in_count, in_mean, in_m2 = (incoming[f"{metric}_{k}"] for k in ('count', 'mean', 'm2'))
+        total = count + in_count
+        delta = in_mean - mean
+        values[f"{metric}_count"] = total
+        values[f"{metric}_mean"] = case((total <= 0, 0.0), else_=mean + delta * in_count * 1.0 / total)
+        values[f"{metric}_m2"] = case(
+            (total <= 0, 0.0),
+            else_=func.max(0.0, m2 + in_m2 + delta * delta * count * in_count * 1.0 / total)
+        )
+    return values
+
+
+def update_area_stats(executor, removed: Iterable[Dict] = (), added: Iterable[Dict] = ()) -> None:
+    """
+    物件の寄与を差し引き・加算してエリア統計を更新（コミットは呼び出し側）
+
+    Args:
+        executor: Session または Connection
+        removed: 変更前の物件（snapshot）。販売中でないものは無視
+        added: 変更後・新規の物件（snapshot）
+    """
+    table = AreaStats.__table__
+    now = datetime.now()
+    for sign, rows in ((-1, removed), (1, added)):
+        partials = _partials(rows)
+        if not partials:
+            continue
+        params = []
+        for (code, level, name), metrics in partials.items():
+            row = {'area_code': code, 'level': level, 'area_name': name, 'updated_at': now}
+            for metric, stats in metrics.items():
+                row.update({f"{metric}_count": sign * stats.count, f"{metric}_mean": stats.mean,
+                            f"{metric}_m2": sign * stats.m2})
+            params.append(row)
+
+        if sign > 0:
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['area_code'],
+                set_=dict(_merged_values(table.c, stmt.excluded), updated_at=stmt.excluded.updated_at)
+            )
+            executor.execute(stmt, params)
+        else:
+            # 取り除く側は既存の行だけを更新
+            incoming = {
+                f"{metric}_{k}": bindparam(f"in_{metric}_{k}")
+                for metric in METRICS for k in ('count', 'mean', 'm2')
+            }
+            stmt = (
+                update(table)
+                .where(table.c.area_code == bindparam('code'))
+                .values(dict(_merged_values(table.c, incoming), updated_at=bindparam('now')))
+            )
+            executor.execute(stmt, [
+                dict({f"in_{k}": v for k, v in row.items() if k.split('_')[0] in METRICS},
+                     code=row['area_code'], now=now)
+                for row in params
+            ])
+
+
+def rebuild_area_stats(executor) -> int:
+    """販売中の全物件からエリア統計を作り直す（コミットは呼び出し側）。作成した行数を返す"""
+    columns = [getattr(Property, field) for field in STAT_FIELDS]
+    rows = [dict(row._mapping) for row in executor.execute(select(*columns).where(Property.is_active == True))]
+    executor.execute(delete(AreaStats))
+    now = datetime.now()
+    values = []
+    for (code, level, name), metrics in _partials(rows).items():
+        row = {'area_code': code, 'level': level, 'area_name': name, 'updated_at': now}
+        for metric, stats in metrics.items():
+            row.update({f"{metric}_count": stats.count, f"{metric}_mean": stats.mean, f"{metric}_m2": stats.m2})
+        values.append(row)
+    if values:
+        executor.execute(insert(AreaStats), values)
+    return len(values)
+
+
+class AreaStatsLookup:
+    """スコアラー用のエリア統計（比較対象の平均・標準偏差を O(1) で返す）"""
+
+    def __init__(self, stats: Dict[str, Dict[str, RunningStats]], levels: Tuple[str, ...] = ('station',),
+                 min_samples: int = 3):
+        """
+        Args:
+            stats: {area_code: {metric: RunningStats}}
+            levels: 参照するエリアの順。先のエリアの件数が min_samples 未満なら次を見る
+                    （既定は駅のみ。従来の「同じ駅の他の物件」と同じ）
+            min_samples: 比較に必要な件数
+        """
+        self.stats = stats
+        self.levels = levels
+        self.min_samples = min_samples
+
+    @classmethod
+    def load(cls, executor, levels: Tuple[str, ...] = ('station',), **kwargs) -> 'AreaStatsLookup':
+        """area_stats テーブルから読み込む（levels のエリアの行だけ）"""
+        stats = {}
+        for row in executor.execute(select(AreaStats).where(AreaStats.level.in_(levels))).scalars():
+            stats[row.area_code] = {
+                metric: RunningStats(getattr(row, f"{metric}_count") or 0, getattr(row, f"{metric}_mean") or 0.0,
+                                     getattr(row, f"{metric}_m2") or 0.0)
+                for metric in METRICS
+            }
+        return cls(stats, levels=levels, **kwargs)
+
+    def area_version(self, property_data: Dict) -> str:
+        """
+        物件が参照するエリアの集計の版（件数・平均・偏差平方和が変わると変わる。スコアのキャッシュキーに使う）
+
+        件数が min_samples を超えるエリア（自分を除いても足りる）より後のエリアは参照しないので含めない。
+        """
+        parts = []
+        for level in self.levels:
+            name = property_data.get(_LEVEL_FIELDS[level])
+            metrics = self.stats.get(f"{level}:{name}") if name else None
+            if not metrics:
+                continue
+            parts.append(f"{level}:{name}:" + ','.join(f"{metric}{tuple(metrics[metric])}" for metric in METRICS))
+            if all(metrics[metric].count > self.min_samples for metric in METRICS):
+                break
+        return '|'.join(parts)
+
+    def comparable(self, property_data: Dict, metric: str) -> Optional[RunningStats]:
+        """
+        物件と比較するエリアの集計（件数が min_samples 未満なら None）
+
+        DBに登録済みの販売中物件（id を持つもの）は集計に自分自身が含まれるので、
+        その値を除いた集計を返す。
+        """
+        own = metric_values(property_data).get(metric)
+        counted = property_data.get('id') is not None and property_data.get('is_active', True) is not False
+        for level in self.levels:
+            name = property_data.get(_LEVEL_FIELDS[level])
+            stats = self.stats.get(f"{level}:{name}", {}).get(metric) if name else None
+            if stats is None:
+                continue
+            if counted and own is not None:
+                stats = stats.remove(own)
+            if stats.count >= self.min_samples:
+                return stats
+        return None
+
+    def comparable_many(self, names: Dict[str, Sequence[str]], own: np.ndarray, counted: np.ndarray,
+                        metric: str, ids: Optional[Sequence] = None,
+                        with_stdev: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        comparable の一括版（RunningStats.remove・stdev と同じ演算を配列で行う）
+
+        Args:
+            names: {level: 物件ごとのエリア名（なしは空文字）}
+            own: 物件ごとの指標値（metric_values と同じ条件。値がなければ NaN）
+            counted: 物件ごとに集計に自分自身が含まれるか
+            ids, with_stdev: StationComparables.comparable_many と揃えるための引数（使わない）
+
+        Returns:
+            (比較対象があるか, 平均, 標準偏差) の配列
+        """
+        n = len(own)
+        found = np.zeros(n, dtype=bool)
+        means = np.zeros(n)
+        stdevs = np.zeros(n)
+        remove = counted & ~np.isnan(own)
+        for level in self.levels:
+            level_names = names.get(level)
+            if level_names is None:
+                continue
+            prefix = f"{level}:"
+            table = {
+                code[len(prefix):]: metrics[metric]
+                for code, metrics in self.stats.items() if code.startswith(prefix) and metric in metrics
+            }
+            # エリア名ごとに1回だけ引いて物件に配る
+            positions = {}
+            inverse = np.fromiter((positions.setdefault(name, len(positions)) for name in level_names),
+                                  dtype=np.int64, count=n)
+            looked_up = [table.get(name) if name else None for name in positions]
+            has = np.array([stats is not None for stats in looked_up])[inverse]
+            count = np.array([stats.count if stats else 0 for stats in looked_up], dtype=float)[inverse]
+            mean = np.array([stats.mean if stats else 0.0 for stats in looked_up])[inverse]
+            m2 = np.array([stats.m2 if stats else 0.0 for stats in looked_up])[inverse]
+
+            # 自分自身を除く（RunningStats.remove）
+            with np.errstate(divide='ignore', invalid='ignore'):
+                count_out = count - 1
+                mean_out = (mean * count - own) / count_out
+                m2_out = np.maximum(0.0, m2 - (own - mean) * (own - mean_out))
+            empty = count_out <= 0
+            drop = remove & has
+            count = np.where(drop, np.where(empty, 0.0, count_out), count)
+            mean = np.where(drop, np.where(empty, 0.0, mean_out), mean)
+            m2 = np.where(drop, np.where(empty, 0.0, m2_out), m2)
+
+            # 標本標準偏差（RunningStats.stdev）
+            with np.errstate(divide='ignore', invalid='ignore'):
+                variance = np.maximum(0.0, m2) / (count - 1)
+                tolerance = mean * 1e-6
+                stdev = np.where((count <= 1) | (variance <= tolerance * tolerance), 0.0, np.sqrt(variance))
+
+            take = has & ~found & (count >= self.min_samples)
+            found |= take
+            means[take] = mean[take]
+            stdevs[take] = stdev[take]
+        return found, means, stdevs
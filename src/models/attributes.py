@@ -0,0 +1,177 @@
+"""
+物件の派生属性（取り込み時に1回だけ算出）
+
+住所・物件名・間取り・設備JSONといった生の文字列から、スコアリングと絞り込みで
+使う事実を型付きの列として求める。
+
+- ward: 正規化した市区町村（例: "港区", "横浜市西区"）
+- brand: 物件名から判定したマンションブランド（例: "パークハウス"）
+- rooms: 間取りの部屋数（例: "3LDK" → 3, "ワンルーム" → 1）
+- feature_flags: 設備の有無のビットマスク（FEATURE_BITS）
+
+スコアラーは列があればそれを読み、なければ（取り込み前の詳細データなど）
+ここの関数でその場で算出する。
+"""
+
+import json
+import re
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, select, update
+
+from .database import Property
+
+DERIVED_FIELDS = ('ward', 'brand', 'rooms', 'feature_flags')
+
+# 設備フラグ（features JSON のキー → ビット）
+FEATURE_BITS = {
+    'auto_lock': 1,
+    'delivery_box': 2,
+    'pet_ok': 4,
+    'floor_heating': 8,
+    'disposer': 16,
+    'renovation': 32,
+}
+
+# 大手ブランドマップ（デベロッパー → シリーズ名）
+BRAND_MAP = {
+    '三井不動産': ['パークホームズ', 'パークタワー', 'パークコート', 'パークマンション'],
+    '三菱地所': ['パークハウス', 'ザ・パークハウス'],
+    '住友不動産': ['シティハウス', 'シティタワー', 'グランドヒルズ', 'シティテラス'],
+    '野村不動産': ['プラウド', 'PROUD'],
+    '東急不動産': ['ブランズ', 'BRANZ'],
+    '東京建物': ['ブリリア', 'Brillia'],
+    '旭化成': ['アトラス', 'ATLAS']
+}
+MAJOR_BRANDS = frozenset(s for series in BRAND_MAP.values() for s in series)
+
+# 準大手・その他優良デベロッパー
+SUB_BRANDS = ['クレヴィア', 'ライオンズ', 'ピアース', 'ディアナ']
+
+_PREFECTURE_RE = re.compile(r'^(?:東京都|北海道|(?:京都|大阪)府|.{2,3}県)')
+_WARD_RE = re.compile(r'^(?:[^市]+市[^市区]+区|[^市区町村]+?区|.+?[市町村])')
+_ROOMS_RE = re.compile(r'^(\d+)')
+
+
+def normalize_ward(city: Optional[str], address: Optional[str] = None) -> Optional[str]:
+    """市区町村を正規化（city が空なら住所から切り出す）"""
+    ward = (city or '').strip()
+    if not ward and address:
+        m = _WARD_RE.match(_PREFECTURE_RE.sub('', address.strip()))
+        ward = m.group(0) if m else ''
+    return ward or None
+
+
+def detect_brand(title: Optional[str]) -> Optional[str]:
+    """物件名からブランドを判定（大手を優先。該当なしは None）"""
+    if not title:
+        return None
+    for series in BRAND_MAP.values():
+        for name in series:
+            if name in title:
+                return name
+    for name in SUB_BRANDS:
+        if name in title:
+            return name
+    return None
+
+
+def layout_rooms(layout: Optional[str]) -> Optional[int]:
+    """間取りの部屋数（"2LDK+S（納戸）" → 2、読めなければ None）"""
+    if not layout:
+        return None
+    if layout.startswith('ワンルーム'):
+        return 1
+    m = _ROOMS_RE.match(layout.strip())
+    return int(m.group(1)) if m else None
+
+
+def feature_flags(features) -> int:
+    """設備JSON（文字列または辞書）をビットマスクに変換"""
+    if not features:
+        return 0
+    try:
+        equipment = json.loads(features) if isinstance(features, str) else features
+    except (TypeError, ValueError):
+        return 0
+    if not isinstance(equipment, dict):
+        return 0
+    flags = 0
+    for key, bit in FEATURE_BITS.items():
+        if equipment.get(key):
+            flags |= bit
+    return flags
+
+
+def derive_attributes(data: Dict) -> Dict:
+    """物件データ（詳細データ・Property の辞書）から派生属性を算出"""
+    return {
+        'ward': normalize_ward(data.get('city'), data.get('address')),
+        'brand': detect_brand(data.get('title')),
+        'rooms': layout_rooms(data.get('layout')),
+        'feature_flags': feature_flags(data.get('features')),
+    }
+
+
+def ward_of(data: Dict) -> str:
+    """派生列 ward（なければその場で算出）"""
+    if 'ward' in data:
+        return data['ward'] or ''
+    return normalize_ward(data.get('city'), data.get('address')) or ''
+
+
+def ward_in(data: Dict, names: Iterable[str]) -> bool:
+    """
+    市区町村（ward_of）が names のいずれかを含むか
+
+    完全一致ではなく部分一致で、「中央区」は千葉市中央区・さいたま市中央区にも一致する
+    （市区町村列を導入する前の住所の部分一致と同じ判定）。
+    """
+    ward = ward_of(data)
+    return any(name in ward for name in names)
+
+
+def brand_of(data: Dict) -> Optional[str]:
+    """派生列 brand（なければその場で算出）"""
+    if 'brand' in data:
+        return data['brand']
+    return detect_brand(data.get('title'))
+
+
+def feature_flags_of(data: Dict) -> int:
+    """派生列 feature_flags（なければその場で算出）"""
+    if data.get('feature_flags') is not None:
+        return data['feature_flags']
+    return feature_flags(data.get('features'))
+
+
+def backfill_derived_attributes(conn, property_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    既存物件の派生属性を算出して保存（コミットは呼び出し側）
+
+    Args:
+        conn: Connection または Session
+        property_ids: 対象の物件ID（省略時は全件）
+
+    Returns:
+        更新した件数
+    """
+    stmt = select(Property.id, Property.city, Property.address, Property.title,
+                  Property.layout, Property.features)
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        if not property_ids:
+            return 0
+        stmt = stmt.where(Property.id.in_(property_ids))
+    rows = [
+        dict(derive_attributes(row._mapping), _id=row.id)
+        for row in conn.execute(stmt)
+    ]
+    if rows:
+        table = Property.__table__
+        conn.execute(
+            update(table).where(table.c.id == bindparam('_id'))
+            .values(last_updated=table.c.last_updated),  # 派生列だけの更新では更新日時を変えない
+            rows
+        )
+    return len(rows)
@@ -2,7 +2,9 @@
 Database models for property data
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+import os
+
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -13,6 +15,18 @@ Base = declarative_base()
 class Property(Base):
     """物件情報モデル"""
     __tablename__ = 'properties'
+    # app.get_properties_from_db の絞り込み・get_unique_stations / get_locations の DISTINCT 用
+    __table_args__ = (
+        Index('ix_properties_active_price', 'is_active', 'price'),
+        Index('ix_properties_active_layout_price', 'is_active', 'layout', 'price'),
+        Index('ix_properties_active_age', 'is_active', 'building_age'),
+        Index('ix_properties_station_name', 'station_name'),
+        Index('ix_properties_prefecture_city', 'prefecture', 'city'),
+        Index('ix_properties_active_brand', 'is_active', 'brand'),
+        Index('ix_properties_active_rooms_price', 'is_active', 'rooms', 'price'),
+        Index('ix_properties_ward', 'ward'),
+        Index('ix_properties_crawl_area_active', 'crawl_area', 'is_active'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -29,6 +43,7 @@ class Property(Base):
     
     # 物件詳細
     building_age = Column(Integer)  # 築年数
+    built_year = Column(Integer)  # 築年（西暦。取得年で変わらないので一覧カードとの照合に使う）
     floor = Column(Integer)  # 階数
     direction = Column(String(10))  # 向き（南、東、西、北）
     layout = Column(String(20))  # 間取り（3LDK等）
@@ -48,11 +63,27 @@ class Property(Base):
     # 設備（JSON形式で保存）
     features = Column(Text)  # {"auto_lock": true, "pet_ok": false, ...}
     
+    # 派生属性（取り込み時に attributes.derive_attributes で算出）
+    ward = Column(String(50))  # 正規化した市区町村（横浜市西区 等）
+    brand = Column(String(50))  # マンションブランド（パークハウス 等）
+    rooms = Column(Integer)  # 間取りの部屋数
+    feature_flags = Column(Integer, default=0)  # 設備のビットマスク（attributes.FEATURE_BITS）
+    
+    # 価格推移の集計（価格履歴の記録時に更新。スコアリングで履歴を読まないため）
+    first_price = Column(Integer)  # 初回価格（万円）
+    price_cut_count = Column(Integer, default=0)  # 値下げ回数
+    last_price_cut_at = Column(DateTime)  # 最後に値下げした日時
+    
     # メタデータ
     first_seen = Column(DateTime, default=datetime.now)
     last_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     is_active = Column(Boolean, default=True)  # 販売中かどうか
     
+    # 掲載終了の判定（delisting.DelistingSweeper）
+    crawl_area = Column(String(200))  # 最後に見つかった巡回エリア（検索URL）
+    last_seen_at = Column(DateTime)  # そのエリアの巡回で最後に見つかった日時（巡回の開始日時）
+    delisted_at = Column(DateTime)  # 掲載終了と判定した日時
+    
     def __repr__(self):
         return f"<Property(id={self.id}, title='{self.title}', price={self.price}万円)>"
 
@@ -60,6 +91,11 @@ class Property(Base):
 class PropertyScore(Base):
     """物件スコア情報モデル"""
     __tablename__ = 'property_scores'
+    __table_args__ = (
+        Index('ix_property_scores_property', 'property_id', 'target_type'),
+        Index('ix_property_scores_rank', 'target_type', 'scorer_version', 'total_score'),
+        Index('ix_property_scores_key', 'score_key'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     property_id = Column(Integer, nullable=False)  # Property.id への参照
@@ -75,6 +111,11 @@ class PropertyScore(Base):
     # ターゲット層
     target_type = Column(String(20))  # 'family' or 'dinks'
     
+    # 算出したスコアラーの版と表示用の内訳（スコア結果のJSON）
+    scorer_version = Column(String(20))
+    detail = Column(Text)
+    score_key = Column(String(32))  # 採点の入力・比較対象の集計・版の指紋（score_cache）
+    
     # メタデータ
     calculated_at = Column(DateTime, default=datetime.now)
     
@@ -83,29 +124,46 @@ class PropertyScore(Base):
 
 
 class AreaStats(Base):
-    """エリア統計情報モデル"""
+    """エリア統計情報モデル（販売中物件の駅・市区町村・都道府県ごとの集計）
+    
+    指標ごとに件数・平均・偏差平方和（Welford）を持ち、物件の追加・更新・掲載終了の
+    たびに差分で更新する（area_stats.update_area_stats）。
+    """
     __tablename__ = 'area_stats'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    area_code = Column(String(50), unique=True, nullable=False)  # 市区町村コード
+    area_code = Column(String(150), unique=True, nullable=False)  # "<level>:<エリア名>"（例: "station:恵比寿"）
+    level = Column(String(20))  # station / ward / prefecture
     area_name = Column(String(100))  # エリア名
     
-    # 統計情報
-    avg_price_per_sqm = Column(Float)  # 平均㎡単価
-    median_price = Column(Float)  # 中央値価格
-    std_price_per_sqm = Column(Float)  # ㎡単価の標準偏差
-    sample_count = Column(Integer)  # サンプル数
+    # ㎡単価（円/㎡）
+    sqm_count = Column(Integer, default=0)
+    sqm_mean = Column(Float, default=0.0)
+    sqm_m2 = Column(Float, default=0.0)
+    
+    # 総額（万円）
+    price_count = Column(Integer, default=0)
+    price_mean = Column(Float, default=0.0)
+    price_m2 = Column(Float, default=0.0)
+    
+    # 管理費＋修繕積立金の㎡あたり月額（円/㎡）
+    cost_count = Column(Integer, default=0)
+    cost_mean = Column(Float, default=0.0)
+    cost_m2 = Column(Float, default=0.0)
     
     # メタデータ
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     
     def __repr__(self):
-        return f"<AreaStats(area={self.area_name}, avg_price={self.avg_price_per_sqm:.0f}円/㎡)>"
+        return f"<AreaStats(area={self.area_code}, avg_price={self.sqm_mean or 0:.0f}円/㎡, n={self.sqm_count})>"
 
 
 class PriceHistory(Base):
     """物件価格履歴モデル"""
     __tablename__ = 'price_history'
+    __table_args__ = (
+        Index('ix_price_history_property_recorded', 'property_id', 'recorded_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     property_id = Column(Integer, nullable=False)  # Property.id への参照
@@ -116,26 +174,154 @@ class PriceHistory(Base):
         return f"<PriceHistory(property_id={self.property_id}, price={self.price}万円, date={self.recorded_at})>"
 
 
-def get_engine(db_path='data/mansion_scientist.db'):
-    """データベースエンジンを取得"""
-    return create_engine(f'sqlite:///{db_path}')
+class PropertyAccess(Base):
+    """物件のアクセス情報（access_info を1駅1行に正規化）"""
+    __tablename__ = 'property_access'
+    __table_args__ = (
+        Index('ix_property_access_line', 'line', 'walk_minutes', 'property_id'),
+        Index('ix_property_access_station', 'station', 'walk_minutes', 'property_id'),
+        Index('ix_property_access_property', 'property_id'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    property_id = Column(Integer, nullable=False)  # Property.id への参照
+    line = Column(String(100))  # 路線名（ＪＲ山手線 等。バス会社の場合もある）
+    station = Column(String(100))  # 駅名（バス停の場合もある）
+    walk_minutes = Column(Integer)  # 徒歩分数（駅までバス利用の場合は None）
+    rank = Column(Integer)  # 物件概要での記載順（1始まり）
+    
+    def __repr__(self):
+        return f"<PropertyAccess(property_id={self.property_id}, line='{self.line}', station='{self.station}', walk={self.walk_minutes})>"
+
+
+class FrontierEntry(Base):
+    """クロール待ちURL（クロールフロンティア）モデル"""
+    __tablename__ = 'crawl_frontier'
+    __table_args__ = (
+        Index('ix_crawl_frontier_claim', 'state', 'priority', 'id'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    url = Column(Text, unique=True, nullable=False)  # 物件概要ページURL
+    source_id = Column(String(100))
+    priority = Column(Integer, default=0, nullable=False)  # 大きいほど先に取得
+    state = Column(String(10), default='pending', nullable=False)  # pending / leased / done / failed
+    attempts = Column(Integer, default=0, nullable=False)  # 取得を試みた回数
+    lease_until = Column(DateTime)  # この時刻を過ぎたリースは他のワーカーが再取得できる
+    worker = Column(String(100))  # リース中のワーカー
+    updated_at = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<FrontierEntry(url='{self.url}', state={self.state}, attempts={self.attempts})>"
+
+
+class AreaCrawl(Base):
+    """エリア（検索URL）ごとの一覧巡回の記録モデル"""
+    __tablename__ = 'area_crawls'
+    __table_args__ = (
+        Index('ix_area_crawls_area_started', 'area', 'started_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    area = Column(String(200), nullable=False)  # 検索URL
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    complete = Column(Boolean, default=False, nullable=False)  # 最終ページまでエラーなく巡回できたか
+    seen_count = Column(Integer, default=0)  # 見つかった物件数
+    
+    def __repr__(self):
+        return f"<AreaCrawl(area='{self.area}', started_at={self.started_at}, complete={self.complete})>"
+
+
+class ScoreRun(Base):
+    """変更された物件の再採点（score_updater）の実行記録モデル"""
+    __tablename__ = 'score_runs'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False)  # 次回はこれより後に更新された物件を読む
+    finished_at = Column(DateTime)
+    changed_count = Column(Integer, default=0)  # 変更された物件数
+    property_count = Column(Integer, default=0)  # 比較対象の駅に広げて採点した物件数
+    written_count = Column(Integer, default=0)  # 書き込んだスコア行数
+    
+    def __repr__(self):
+        return f"<ScoreRun(started_at={self.started_at}, changed={self.changed_count}, written={self.written_count})>"
+
+
+# 接続ごとに設定するSQLiteのPRAGMA
+# WAL: 書き込み中も読み取りをブロックしない / busy_timeout: ロック時に即エラーにせず待つ
+# synchronous=NORMAL: WALではコミットごとのfsyncを省略しても破損しない
+SQLITE_PRAGMAS = {
+    'busy_timeout': 30000,       # ミリ秒
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,      # 256MB
+    'cache_size': -65536,        # 64MB（負値はKB単位）
+    'temp_store': 'MEMORY',
+}
+
+_engines = {}
+_sessionmakers = {}
+
+
+def _set_sqlite_pragmas(dbapi_connection, readonly):
+    cursor = dbapi_connection.cursor()
+    if not readonly:
+        cursor.execute("PRAGMA journal_mode=WAL")  # DBファイルに記録され、読み取り専用接続にも効く
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    if readonly:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def get_engine(db_path='data/mansion_scientist.db', readonly=False):
+    """
+    データベースエンジンを取得（同じDB・モードなら同じエンジンを返す）
+    
+    readonly=True は読み取り専用の接続（アプリの閲覧用）。WALモードのため、
+    収集スクリプトの書き込み中も待たずに読める。
+    """
+    key = (os.path.abspath(db_path), readonly)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    
+    if readonly:
+        engine = create_engine(f'sqlite:///file:{key[0]}?mode=ro&uri=true')
+    else:
+        engine = create_engine(f'sqlite:///{db_path}')
+    event.listen(engine, 'connect', lambda conn, _record: _set_sqlite_pragmas(conn, readonly))
+    _engines[key] = engine
+    return engine
+
+
+def is_readonly(engine) -> bool:
+    """get_engine(readonly=True) で作った読み取り専用のエンジンか"""
+    return engine.url.query.get('mode') == 'ro'
 
 
 def init_db(db_path='data/mansion_scientist.db'):
-    """データベースを初期化"""
+    """データベースを初期化（既存DBは未適用のマイグレーションで更新）"""
+    from .migrations import run_migrations
     engine = get_engine(db_path)
     Base.metadata.create_all(engine)
+    run_migrations(engine)
     return engine
 
 
 def get_session(engine):
-    """データベースセッションを取得"""
-    Session = sessionmaker(bind=engine)
+    """データベースセッションを取得（sessionmaker はエンジンごとに1つを使い回す）"""
+    Session = _sessionmakers.get(engine)
+    if Session is None:
+        Session = _sessionmakers.setdefault(engine, sessionmaker(bind=engine))
     return Session()
 
 
 def save_or_update_property(session, detail, source_id):
     """物件情報を保存または更新（価格履歴付き）"""
+    # ページ未変更（HTTPキャッシュヒット）ならDBには触れない
+    if detail.get('unchanged'):
+        return "unchanged"
     try:
         from src.models.database import Property, PriceHistory
         existing = session.query(Property).filter_by(source_id=source_id).first()
@@ -144,6 +330,9 @@ def save_or_update_property(session, detail, source_id):
             # 価格変更のチェック
             new_price = detail.get('price')
             if new_price and existing.price != new_price:
+                from .area_stats import snapshot, update_area_stats
+                before = snapshot(existing)
+                
                 # 履歴に追加
                 history = PriceHistory(
                     property_id=existing.id,
@@ -152,14 +341,26 @@ def save_or_update_property(session, detail, source_id):
                 session.add(history)
                 
                 # 主要な数値を更新
+                from .price_history import apply_price_change
+                now = datetime.now()
+                apply_price_change(existing, new_price, now)
                 existing.price = new_price
                 existing.price_per_sqm = detail.get('price_per_sqm')
-                existing.last_updated = datetime.now()
+                existing.last_updated = now
+                update_area_stats(session, [before], [snapshot(existing)])
+                if _card_key_changed(existing, detail):
+                    refresh_property_fields(session, detail, source_id)
+                session.commit()
+                return "updated"
+            if _card_key_changed(existing, detail):
+                # 一覧カードで主要項目の変化が分かって再取得した物件は詳細の値で上書き
+                refresh_property_fields(session, detail, source_id)
                 session.commit()
                 return "updated"
             return "exists"
         else:
             # 新規保存
+            from .attributes import derive_attributes
             property_obj = Property(
                 source=detail.get('source', 'SUUMO'),
                 source_id=source_id,
@@ -170,6 +371,7 @@ def save_or_update_property(session, detail, source_id):
                 price_per_sqm=detail.get('price_per_sqm'),
                 layout=detail.get('layout'),
                 building_age=detail.get('building_age'),
+                built_year=detail.get('built_year'),
                 floor=detail.get('floor'),
                 direction=detail.get('direction'),
                 address=detail.get('address'),
@@ -181,9 +383,12 @@ def save_or_update_property(session, detail, source_id):
                 management_fee=detail.get('management_fee'),
                 repair_reserve=detail.get('repair_reserve'),
                 features=detail.get('features', '{}'),
+                first_price=detail.get('price'),
+                price_cut_count=0,
                 is_active=True,
                 first_seen=datetime.now(),
-                last_updated=datetime.now()
+                last_updated=datetime.now(),
+                **derive_attributes(detail)
             )
             session.add(property_obj)
             session.flush() # IDを取得するためにフラッシュ
@@ -195,9 +400,294 @@ def save_or_update_property(session, detail, source_id):
                     price=property_obj.price
                 )
                 session.add(history)
+            
+            # アクセス情報を駅ごとの行に展開
+            from .access import replace_property_access
+            replace_property_access(session, [(property_obj.id, property_obj.access_info)])
+            
+            from .area_stats import snapshot, update_area_stats
+            update_area_stats(session, added=[snapshot(property_obj)])
                 
             session.commit()
             return "saved"
     except Exception as e:
         session.rollback()
         raise e
+
+
+def source_id_from_url(url):
+    """物件URL（.../nc_<ID>/...）から source_id を取り出す"""
+    if not url or '/nc_' not in url:
+        return None
+    return url.split('/nc_')[1].split('/')[0] or None
+
+
+# 1文のINSERTに含める最大行数（SQLiteのバインド変数上限に収まる件数）
+BULK_CHUNK_SIZE = 500
+
+
+def save_properties_bulk(session, details):
+    """
+    複数物件をまとめて保存または更新（価格履歴付き、1トランザクション）
+    
+    save_or_update_property と同じ規則で、新規は全項目を保存し、既存は価格が
+    変わった場合のみ価格・㎡単価を更新する（主要項目 CARD_KEY_FIELDS が保存済みの値と
+    食い違う既存物件は refresh_property_fields で詳細の値に上書きする）。複数行の
+    INSERT ... ON CONFLICT(source_id) DO UPDATE で書き込み、価格履歴とエリア統計は
+    新規と価格変更の行だけに反映する。
+    
+    Args:
+        details: パース済みの詳細データのリスト（source_id がなければ url から取得）
+    
+    Returns:
+        details と同じ順の結果リスト
+        "saved" / "updated" / "exists" / "unchanged"（ページ未変更） / "skip"（保存対象外）
+    """
+    from sqlalchemy import case, func, select, insert as core_insert
+    from sqlalchemy.dialects.sqlite import insert
+    from .attributes import derive_attributes
+    from .area_stats import STAT_FIELDS, update_area_stats
+    
+    outcomes = [None] * len(details)
+    rows = {}  # source_id -> (index, row)。同じ物件が重複したら後のものを採用
+    now = datetime.now()
+    for i, detail in enumerate(details):
+        if not detail or detail.get('unchanged'):
+            outcomes[i] = "unchanged" if detail else "skip"
+            continue
+        source_id = detail.get('source_id') or source_id_from_url(detail.get('url'))
+        if not source_id or not detail.get('url'):
+            outcomes[i] = "skip"
+            continue
+        if source_id in rows:
+            outcomes[rows[source_id][0]] = "exists"
+        row = {field: detail.get(field) for field in DETAIL_FIELDS}
+        row.update(
+            source=detail.get('source', 'SUUMO'),
+            source_id=source_id,
+            url=detail.get('url'),
+            features=detail.get('features', '{}'),
+            first_price=detail.get('price'),
+            price_cut_count=0,
+            is_active=True,
+            first_seen=now,
+            last_updated=now,
+        )
+        row.update(derive_attributes(row))
+        rows[source_id] = (i, row)
+    
+    if not rows:
+        return outcomes
+    
+    table = Property.__table__
+    try:
+        source_ids = list(rows)
+        before = {}  # source_id -> 既存物件の統計用の項目
+        keys = {}  # source_id -> 既存物件の主要項目
+        stat_columns = [table.c[field] for field in STAT_FIELDS]
+        key_columns = [table.c[field] for field in CARD_KEY_FIELDS if field not in STAT_FIELDS]
+        for start in range(0, len(source_ids), BULK_CHUNK_SIZE):
+            chunk = source_ids[start:start + BULK_CHUNK_SIZE]
+            for row in session.execute(
+                select(table.c.source_id, *stat_columns, *key_columns).where(table.c.source_id.in_(chunk))
+            ):
+                before[row.source_id] = {field: row._mapping[field] for field in STAT_FIELDS}
+                keys[row.source_id] = {field: row._mapping[field] for field in CARD_KEY_FIELDS}
+        
+        values = [row for _, row in rows.values()]
+        for start in range(0, len(values), BULK_CHUNK_SIZE):
+            stmt = insert(table).values(values[start:start + BULK_CHUNK_SIZE])
+            # 既存物件は価格が変わったときだけ価格・㎡単価を更新（save_or_update_property と同じ）
+            # 右辺の列は更新前の値（価格推移の集計は price_history.apply_price_change と同じ規則）
+            price_cut = stmt.excluded.price < table.c.price
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['source_id'],
+                set_={
+                    'price': stmt.excluded.price,
+                    'price_per_sqm': stmt.excluded.price_per_sqm,
+                    'last_updated': stmt.excluded.last_updated,
+                    'first_price': func.coalesce(table.c.first_price, table.c.price),
+                    'price_cut_count': func.coalesce(table.c.price_cut_count, 0) + case((price_cut, 1), else_=0),
+                    'last_price_cut_at': case((price_cut, stmt.excluded.last_updated),
+                                              else_=table.c.last_price_cut_at),
+                },
+                where=(stmt.excluded.price.isnot(None)) & (table.c.price.isnot(stmt.excluded.price))
+            )
+            session.execute(stmt)
+        
+        # 価格履歴は新規・価格変更の行のみ
+        priced = {}
+        saved = []
+        removed, added = [], []
+        for source_id, (i, row) in rows.items():
+            if source_id not in before:
+                outcomes[i] = "saved"
+                saved.append(source_id)
+                added.append(row)
+            elif row['price'] and before[source_id]['price'] != row['price']:
+                outcomes[i] = "updated"
+                removed.append(before[source_id])
+                added.append(dict(before[source_id], price=row['price'], price_per_sqm=row['price_per_sqm']))
+            else:
+                outcomes[i] = "exists"
+                continue
+            if row['price']:
+                priced[source_id] = row['price']
+        
+        lookup = list(set(priced) | set(saved))
+        ids = {}
+        for start in range(0, len(lookup), BULK_CHUNK_SIZE):
+            chunk = lookup[start:start + BULK_CHUNK_SIZE]
+            ids.update(session.execute(
+                select(table.c.source_id, table.c.id).where(table.c.source_id.in_(chunk))
+            ).all())
+        
+        if priced:
+            session.execute(core_insert(PriceHistory.__table__), [
+                {'property_id': ids[source_id], 'price': price, 'recorded_at': now}
+                for source_id, price in priced.items()
+            ])
+        
+        # 新規物件のアクセス情報を駅ごとの行に展開
+        from .access import replace_property_access
+        replace_property_access(session, [(ids[source_id], rows[source_id][1]['access_info']) for source_id in saved])
+        
+        update_area_stats(session, removed, added)
+        
+        # 主要項目が変わった既存物件（一覧カードで変化が分かって再取得したもの）は詳細の値で上書き
+        for source_id, (i, row) in rows.items():
+            if source_id in keys and _card_key_changed(keys[source_id], row):
+                refresh_property_fields(session, rows[source_id][1], source_id)
+                outcomes[i] = "updated"
+        
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        raise e
+    return outcomes
+
+
+# パーサーが出力する物件項目（再パース時に上書きする対象）
+DETAIL_FIELDS = [
+    'title', 'price', 'area', 'price_per_sqm', 'building_age', 'built_year', 'floor', 'direction', 'layout',
+    'address', 'prefecture', 'city', 'station_name', 'station_distance', 'access_info',
+    'management_fee', 'repair_reserve', 'features'
+]
+
+
+def refresh_property_fields(session, detail, source_id):
+    """
+    再パース結果で既存物件の項目を上書き（コミットは呼び出し側）
+    
+    取得日時の異なるページからの再構築なので価格履歴には記録しない。
+    
+    Returns:
+        "updated" / "unchanged" / "missing"（未登録物件）
+    """
+    existing = session.query(Property).filter_by(source_id=source_id).first()
+    if not existing:
+        return "missing"
+    
+    from .area_stats import snapshot, update_area_stats
+    before = snapshot(existing)
+    changed = False
+    access_changed = False
+    for field in DETAIL_FIELDS:
+        value = detail.get(field)
+        if value is None or value == '':
+            continue  # パースできなかった項目は既存値を残す
+        if getattr(existing, field) != value:
+            setattr(existing, field, value)
+            changed = True
+            access_changed = access_changed or field == 'access_info'
+    
+    if access_changed:
+        from .access import replace_property_access
+        replace_property_access(session, [(existing.id, existing.access_info)])
+    
+    if changed:
+        from .attributes import derive_attributes
+        for field, value in derive_attributes({f: getattr(existing, f) for f in DETAIL_FIELDS}).items():
+            setattr(existing, field, value)
+        existing.last_updated = datetime.now()
+        after = snapshot(existing)
+        if after != before:
+            update_area_stats(session, [before], [after])
+        return "updated"
+    return "unchanged"
+
+
+# 一覧カードと保存済み物件を比較する主要項目（価格以外）
+# 築年数は取得した年で変わるので、築年（西暦）で比較する
+CARD_KEY_FIELDS = ['area', 'layout', 'built_year']
+
+
+def _card_key_changed(existing, card):
+    """カードの主要項目が保存済みの値と食い違うか（どちらかが不明な項目は比較しない）"""
+    for field in CARD_KEY_FIELDS:
+        new_value = card.get(field)
+        old_value = existing.get(field) if isinstance(existing, dict) else getattr(existing, field)
+        if new_value is None or old_value is None:
+            continue
+        if field == 'area':
+            if abs(new_value - old_value) > 0.01:
+                return True
+        elif new_value != old_value:
+            return True
+    return False
+
+
+def apply_listing_cards(session, cards):
+    """
+    一覧カードを保存済み物件と照合し、詳細取得が必要かを判定
+    
+    カードで価格変更が分かった物件は詳細ページを見ずに価格履歴へ記録する。
+    
+    Returns:
+        cards と同じ順の判定結果リスト
+        "new"（未登録） / "changed"（主要項目が変化） / "price_changed" / "unchanged"
+    """
+    source_ids = [card['source_id'] for card in cards]
+    existing_map = {
+        p.source_id: p
+        for p in session.query(Property).filter(Property.source_id.in_(source_ids))
+    } if source_ids else {}
+    
+    from .area_stats import snapshot, update_area_stats
+    from .price_history import apply_price_change
+    
+    results = []
+    removed, added = [], []
+    try:
+        for card in cards:
+            existing = existing_map.get(card['source_id'])
+            if existing is None:
+                results.append("new")
+                continue
+            
+            price_changed = False
+            new_price = card.get('price')
+            if new_price and existing.price != new_price:
+                removed.append(snapshot(existing))
+                session.add(PriceHistory(property_id=existing.id, price=new_price))
+                now = datetime.now()
+                apply_price_change(existing, new_price, now)
+                existing.price = new_price
+                if existing.area:
+                    existing.price_per_sqm = (new_price * 10000) / existing.area
+                existing.last_updated = now
+                added.append(snapshot(existing))
+                price_changed = True
+            
+            if _card_key_changed(existing, card):
+                results.append("changed")
+            elif price_changed:
+                results.append("price_changed")
+            else:
+                results.append("unchanged")
+        update_area_stats(session, removed, added)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        raise e
+    return results
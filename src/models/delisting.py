@@ -0,0 +1,170 @@
+"""
+掲載終了の検出（エリア巡回ごとのマーク・アンド・スイープ）
+
+エリア（検索URL）の一覧を巡回するたびに見つかった source_id を記録し（マーク）、
+巡回後にそのエリアの物件のうち続けて見つからなかったものを販売終了にする（スイープ）。
+
+- 最終ページまでエラーなく巡回できた回（complete）に max_missed 回続けて
+  見つからなかった物件は、1文の UPDATE でまとめて is_active=False にする
+- ページ数の上限や取得エラーで途中までしか見ていない回を含めて max_missed 回
+  見つからなかった物件は掲載終了とは言い切れないので、詳細ページを取得せずに
+  HEAD で確認し、404/410 のものだけ販売終了にする（200 なら見つかった扱い）
+
+販売終了にした物件はエリア統計（area_stats）から寄与を差し引き、再び一覧に
+現れた物件は販売中に戻して寄与を足し直す。
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+
+from .area_stats import STAT_FIELDS, update_area_stats
+from .database import AreaCrawl, Property
+
+CHUNK_SIZE = 500
+
+# HEAD の応答でページがなくなったと判断するステータス
+GONE_STATUSES = (404, 410)
+
+
+class DelistingSweeper:
+    """1エリア1回分の巡回で見つかった物件を記録し、巡回後に掲載終了の物件を片付ける"""
+
+    def __init__(self, session, area: str, ward: Optional[str] = None, max_missed: int = 3,
+                 probe_limit: int = 100):
+        """
+        Args:
+            session: 書き込みに使うセッション
+            area: 巡回エリアの識別子（検索URL）
+            ward: エリアの市区町村（例: "港区"）。指定すると、まだどの巡回でも見つかって
+                  いない既存物件（crawl_area が空）のうちこの市区町村のものもエリアの物件とする
+            max_missed: この回数続けて見つからなければ掲載終了とみなす
+            probe_limit: 1回のスイープで HEAD 確認する最大件数
+        """
+        self.session = session
+        self.area = area
+        self.ward = ward
+        self.max_missed = max_missed
+        self.probe_limit = probe_limit
+        self.started_at = datetime.now()
+        self.seen = set()
+        self.counts = {'seen': 0, 'relisted': 0, 'swept': 0, 'probed': 0, 'gone': 0}
+
+    def saw(self, source_ids: Iterable[str]) -> None:
+        """一覧で見つかった物件を記録（DBへの反映は finish でまとめて行う）"""
+        self.seen.update(source_id for source_id in source_ids if source_id)
+
+    def _members(self):
+        """このエリアの販売中の物件"""
+        belongs = Property.crawl_area == self.area
+        if self.ward:
+            belongs = or_(belongs, and_(Property.crawl_area == None, Property.ward == self.ward))
+        return and_(Property.is_active == True, belongs)
+
+    def _missed(self, complete_only: bool):
+        """最後に見つかってから後のこのエリアの巡回回数（物件ごとの相関サブクエリ）"""
+        seen_at = func.coalesce(Property.last_seen_at, Property.last_updated, Property.first_seen)
+        query = select(func.count(AreaCrawl.id)).where(AreaCrawl.area == self.area, AreaCrawl.started_at > seen_at)
+        if complete_only:
+            query = query.where(AreaCrawl.complete == True)
+        return query.correlate(Property).scalar_subquery()
+
+    def _mark_seen(self) -> None:
+        """見つかった物件の last_seen_at・crawl_area を更新し、販売終了だったものは販売中に戻す"""
+        table = Property.__table__
+        source_ids = sorted(self.seen)
+        relisted = []
+        for start in range(0, len(source_ids), CHUNK_SIZE):
+            chunk = source_ids[start:start + CHUNK_SIZE]
+            relisted += self.session.execute(
+                update(table)
+                .where(table.c.source_id.in_(chunk), table.c.is_active == False)
+                .values(is_active=True, delisted_at=None, last_updated=table.c.last_updated)
+                .returning(*[table.c[field] for field in STAT_FIELDS])
+            ).mappings().all()
+            self.session.execute(
+                update(table)
+                .where(table.c.source_id.in_(chunk))
+                .values(crawl_area=self.area, last_seen_at=self.started_at, last_updated=table.c.last_updated)
+            )
+        update_area_stats(self.session, added=[dict(row) for row in relisted])
+        self.counts['seen'] = len(source_ids)
+        self.counts['relisted'] = len(relisted)
+
+    def _delist(self, condition) -> List[int]:
+        """条件に合う販売中の物件を1文で販売終了にし、エリア統計から差し引く"""
+        table = Property.__table__
+        rows = self.session.execute(
+            update(table)
+            .where(table.c.is_active == True, condition)
+            .values(is_active=False, delisted_at=datetime.now(), last_updated=table.c.last_updated)
+            .returning(table.c.id, *[table.c[field] for field in STAT_FIELDS])
+        ).mappings().all()
+        # RETURNING は更新後の値なので、差し引く寄与は販売中として計算する
+        update_area_stats(self.session, removed=[
+            dict({field: row[field] for field in STAT_FIELDS}, is_active=True) for row in rows
+        ])
+        return [row['id'] for row in rows]
+
+    def finish(self, complete: bool, probe: Optional[Callable[[str], Optional[int]]] = None) -> Dict[str, int]:
+        """
+        巡回を記録してスイープ（コミットまで行う）
+
+        Args:
+            complete: 最終ページまでエラーなく巡回できたか（False の回は HEAD 確認の対象を選ぶだけに使う）
+            probe: URL を受け取り HEAD のステータスを返す関数（SuumoScraper.probe_status）。
+                   省略時は HEAD 確認をしない
+
+        Returns:
+            件数 {'seen', 'relisted', 'swept', 'probed', 'gone'}
+        """
+        try:
+            self._mark_seen()
+            self.session.add(AreaCrawl(area=self.area, started_at=self.started_at, finished_at=datetime.now(),
+                                       complete=complete, seen_count=len(self.seen)))
+            self.session.flush()
+
+            # 最終ページまで見た回で続けて見つからなかった物件
+            self.counts['swept'] = len(self._delist(and_(
+                self._members(), self._missed(complete_only=True) >= self.max_missed
+            )))
+
+            # 途中までしか見ていない回を含めて続けて見つからなかった物件は HEAD で確認
+            if probe is not None:
+                candidates = self.session.execute(
+                    select(Property.id, Property.url)
+                    .where(self._members(), self._missed(complete_only=False) >= self.max_missed)
+                    .order_by(func.coalesce(Property.last_seen_at, Property.last_updated))
+                    .limit(self.probe_limit)
+                ).all()
+                gone, alive = [], []
+                for property_id, url in candidates:
+                    status = probe(url)
+                    if status in GONE_STATUSES:
+                        gone.append(property_id)
+                    elif status is not None and status < 400:
+                        alive.append(property_id)
+                self.counts['probed'] = len(candidates)
+                if gone:
+                    self.counts['gone'] = len(self._delist(Property.id.in_(gone)))
+                if alive:
+                    # ページが残っている物件は見つかった扱い（次の確認は max_missed 回後）
+                    self.session.execute(
+                        update(Property).where(Property.id.in_(alive))
+                        .values(crawl_area=self.area, last_seen_at=self.started_at,
+                                last_updated=Property.last_updated)
+                    )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return dict(self.counts)
+
+    def summary(self) -> str:
+        """集計結果の文字列表現"""
+        c = self.counts
+        return (
+            f"掲載確認: 発見{c['seen']}件（再掲載{c['relisted']}件） / 掲載終了{c['swept']}件"
+            f" / HEAD確認{c['probed']}件中 終了{c['gone']}件"
+        )
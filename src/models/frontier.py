@@ -0,0 +1,179 @@
+"""
+永続化されたクロールフロンティア（取得待ちURLキュー）
+
+発見した物件URLをプロジェクトDBの crawl_frontier テーブルに積み、ワーカーは
+期限付きリースでまとめて取り出して取得後に完了を記録する。途中で止まっても
+未完了のURLはテーブルに残るので、再実行すればその続きから再開できる。
+複数プロセスが同じテーブルを使っても、1件のURLを同時にリースできるのは
+1ワーカーだけなので重複取得しない。
+"""
+
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import FrontierEntry
+
+
+class CrawlFrontier:
+    """crawl_frontier テーブルを使ったリース付きURLキュー"""
+
+    def __init__(self, engine, worker_id: Optional[str] = None, lease_seconds: int = 600,
+                 max_attempts: int = 3):
+        """
+        Args:
+            engine: プロジェクトDBのエンジン
+            worker_id: ワーカー識別子（省略時は ホスト名:PID）
+            lease_seconds: リースの有効期間。期限切れのURLは他のワーカーが再取得する
+            max_attempts: これだけ失敗したURLは failed にして以後取り出さない
+        """
+        self.engine = engine
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        FrontierEntry.__table__.create(engine, checkfirst=True)
+
+    def add(self, entries: Iterable[Tuple[str, Optional[str]]], priority: int = 0,
+            revisit_after: Optional[timedelta] = None) -> int:
+        """
+        URLをキューに追加（登録済みのURLはそのまま）
+
+        Args:
+            entries: [(url, source_id), ...]
+            priority: 大きいほど先に取り出される
+            revisit_after: 完了・失敗（failed）からこれ以上経ったURLは再び pending に戻す
+
+        Returns:
+            追加・再投入した件数
+        """
+        now = datetime.now()
+        rows = [
+            {'url': url, 'source_id': source_id, 'priority': priority, 'state': 'pending',
+             'attempts': 0, 'updated_at': now}
+            for url, source_id in entries
+        ]
+        if not rows:
+            return 0
+
+        stmt = insert(FrontierEntry)
+        if revisit_after is not None:
+            table = FrontierEntry.__table__
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['url'],
+                set_={'state': 'pending', 'attempts': 0, 'priority': stmt.excluded.priority,
+                      'updated_at': stmt.excluded.updated_at},
+                where=and_(or_(table.c.state == 'done', table.c.state == 'failed'),
+                           table.c.updated_at < now - revisit_after)
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['url'])
+
+        with self.engine.begin() as conn:
+            return conn.execute(stmt, rows).rowcount
+
+    def claim(self, batch_size: int) -> List[Tuple[str, Optional[str]]]:
+        """
+        取得待ちのURLを最大 batch_size 件リースする（優先度の高い順）
+
+        未着手のURLと、リース期限が切れたURLが対象。選択と更新を1文で行うので、
+        同時に呼ばれても同じURLが2つのワーカーに渡ることはない。
+
+        Returns:
+            [(url, source_id), ...]
+        """
+        now = datetime.now()
+        self._expire_exhausted(now)
+        claimable = (
+            select(FrontierEntry.id)
+            .where(or_(
+                FrontierEntry.state == 'pending',
+                and_(FrontierEntry.state == 'leased', FrontierEntry.lease_until < now),
+            ))
+            .order_by(FrontierEntry.priority.desc(), FrontierEntry.id)
+            .limit(batch_size)
+        )
+        stmt = (
+            update(FrontierEntry)
+            .where(FrontierEntry.id.in_(claimable.scalar_subquery()))
+            .values(state='leased', worker=self.worker_id, attempts=FrontierEntry.attempts + 1,
+                    lease_until=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            .returning(FrontierEntry.url, FrontierEntry.source_id)
+        )
+        with self.engine.begin() as conn:
+            return [tuple(row) for row in conn.execute(stmt)]
+
+    def _expire_exhausted(self, now: datetime) -> None:
+        """試行回数を使い切ったままリース期限が切れたURLを failed にする"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(FrontierEntry)
+                .where(FrontierEntry.state == 'leased', FrontierEntry.lease_until < now,
+                       FrontierEntry.attempts >= self.max_attempts)
+                .values(state='failed', lease_until=None, updated_at=now)
+            )
+
+    def complete(self, urls: List[str]) -> None:
+        """
+        取得済みとして記録（このワーカーがリース中のURLのみ）
+
+        リース期限切れ後に他のワーカーが取り直したURLは、そのワーカーの完了を待つ。
+        """
+        if not urls:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(FrontierEntry)
+                .where(FrontierEntry.url.in_(urls), FrontierEntry.worker == self.worker_id,
+                       FrontierEntry.state == 'leased')
+                .values(state='done', lease_until=None, updated_at=datetime.now())
+            )
+
+    def fail(self, urls: List[str]) -> None:
+        """取得失敗を記録（試行回数が残っていれば pending に戻す）"""
+        if not urls:
+            return
+        now = datetime.now()
+        with self.engine.begin() as conn:
+            for state, condition in (
+                ('failed', FrontierEntry.attempts >= self.max_attempts),
+                ('pending', FrontierEntry.attempts < self.max_attempts),
+            ):
+                conn.execute(
+                    update(FrontierEntry)
+                    .where(FrontierEntry.url.in_(urls), FrontierEntry.worker == self.worker_id,
+                           FrontierEntry.state == 'leased', condition)
+                    .values(state=state, lease_until=None, updated_at=now)
+                )
+
+    def release(self, urls: List[str]) -> None:
+        """処理せずに返却（中断時用。試行回数は数えない）"""
+        if not urls:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(FrontierEntry)
+                .where(FrontierEntry.url.in_(urls), FrontierEntry.worker == self.worker_id,
+                       FrontierEntry.state == 'leased')
+                .values(state='pending', attempts=FrontierEntry.attempts - 1, lease_until=None,
+                        updated_at=datetime.now())
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """状態ごとの件数"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(FrontierEntry.state, func.count()).group_by(FrontierEntry.state)
+            ).all()
+        return {state: count for state, count in rows}
+
+    def summary(self) -> str:
+        """集計結果の文字列表現"""
+        c = self.counts()
+        return (
+            f"フロンティア: 待ち{c.get('pending', 0)}件 / リース中{c.get('leased', 0)}件 "
+            f"/ 完了{c.get('done', 0)}件 / 失敗{c.get('failed', 0)}件"
+        )
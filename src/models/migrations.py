@@ -0,0 +1,238 @@
+"""
+スキーマのマイグレーション
+
+バージョン番号付きの変更を schema_migrations テーブルで管理し、既存の
+data/mansion_scientist.db を作り直さずにその場で更新する。新しいDBは
+create_all で最新の定義から作られるため、各マイグレーションは適用済みの
+状態に対しても安全に実行できる（IF NOT EXISTS 等）ように書く。
+
+スキーマを変える場合は MIGRATIONS の末尾に次の番号で追加する。
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable  # upgrade(conn): トランザクション内で実行される
+
+
+def _columns(conn, table: str) -> Set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _add_access_info(conn) -> None:
+    """properties.access_info（全アクセス情報）を追加"""
+    if 'access_info' not in _columns(conn, 'properties'):
+        conn.exec_driver_sql("ALTER TABLE properties ADD COLUMN access_info TEXT")
+
+
+def _create_query_indexes(conn) -> None:
+    """物件一覧の絞り込み・DISTINCT・物件IDでの参照に合わせたインデックス"""
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_properties_active_price ON properties (is_active, price)",
+        "CREATE INDEX IF NOT EXISTS ix_properties_active_layout_price ON properties (is_active, layout, price)",
+        "CREATE INDEX IF NOT EXISTS ix_properties_active_age ON properties (is_active, building_age)",
+        "CREATE INDEX IF NOT EXISTS ix_properties_station_name ON properties (station_name)",
+        "CREATE INDEX IF NOT EXISTS ix_properties_prefecture_city ON properties (prefecture, city)",
+        "CREATE INDEX IF NOT EXISTS ix_price_history_property_recorded ON price_history (property_id, recorded_at)",
+        "CREATE INDEX IF NOT EXISTS ix_property_scores_property ON property_scores (property_id, target_type)",
+    ):
+        conn.exec_driver_sql(statement)
+    conn.exec_driver_sql("ANALYZE")
+
+
+def _create_property_access(conn) -> None:
+    """property_access を作成し、既存物件の access_info から投入"""
+    from .database import PropertyAccess
+    from .access import backfill_property_access
+    PropertyAccess.__table__.create(conn, checkfirst=True)
+    for index in PropertyAccess.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    count = backfill_property_access(conn)
+    logger.info(f"Backfilled {count} property_access rows")
+
+
+def _create_property_fts(conn) -> None:
+    """物件名・住所・駅・アクセスの全文検索（FTS5 trigram）と同期用トリガー"""
+    columns = 'title, address, station_name, access_info'
+    old_values = 'old.id, old.title, old.address, old.station_name, old.access_info'
+    new_values = 'new.id, new.title, new.address, new.station_name, new.access_info'
+    for statement in (
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS property_fts USING fts5(
+                {columns}, content='properties', content_rowid='id', tokenize='trigram')""",
+        f"""CREATE TRIGGER IF NOT EXISTS properties_fts_insert AFTER INSERT ON properties BEGIN
+                INSERT INTO property_fts (rowid, {columns}) VALUES ({new_values});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS properties_fts_delete AFTER DELETE ON properties BEGIN
+                INSERT INTO property_fts (property_fts, rowid, {columns}) VALUES ('delete', {old_values});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS properties_fts_update AFTER UPDATE OF {columns} ON properties BEGIN
+                INSERT INTO property_fts (property_fts, rowid, {columns}) VALUES ('delete', {old_values});
+                INSERT INTO property_fts (rowid, {columns}) VALUES ({new_values});
+            END""",
+        "INSERT INTO property_fts (property_fts) VALUES ('rebuild')",
+    ):
+        conn.exec_driver_sql(statement)
+
+
+def _add_derived_attributes(conn) -> None:
+    """派生属性の列（ward, brand, rooms, feature_flags）を追加して既存物件に算出"""
+    from .attributes import backfill_derived_attributes
+    existing = _columns(conn, 'properties')
+    for column, sql_type in (('ward', 'VARCHAR(50)'), ('brand', 'VARCHAR(50)'),
+                             ('rooms', 'INTEGER'), ('feature_flags', 'INTEGER DEFAULT 0')):
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE properties ADD COLUMN {column} {sql_type}")
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_properties_active_brand ON properties (is_active, brand)",
+        "CREATE INDEX IF NOT EXISTS ix_properties_active_rooms_price ON properties (is_active, rooms, price)",
+        "CREATE INDEX IF NOT EXISTS ix_properties_ward ON properties (ward)",
+    ):
+        conn.exec_driver_sql(statement)
+    count = backfill_derived_attributes(conn)
+    logger.info(f"Derived attributes for {count} properties")
+
+
+def _add_score_versions(conn) -> None:
+    """property_scores に算出スコアラーの版・内訳JSONと、並べ替え用インデックスを追加"""
+    existing = _columns(conn, 'property_scores')
+    for column, sql_type in (('scorer_version', 'VARCHAR(20)'), ('detail', 'TEXT')):
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE property_scores ADD COLUMN {column} {sql_type}")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_property_scores_rank "
+        "ON property_scores (target_type, scorer_version, total_score)"
+    )
+
+
+def _add_area_stats_aggregates(conn) -> None:
+    """area_stats を駅・市区町村・都道府県ごとの件数・平均・偏差平方和に作り直す"""
+    from .area_stats import METRICS, rebuild_area_stats
+    existing = _columns(conn, 'area_stats')
+    columns = [('level', 'VARCHAR(20)')]
+    for metric in METRICS:
+        columns += [(f"{metric}_count", 'INTEGER DEFAULT 0'), (f"{metric}_mean", 'FLOAT DEFAULT 0.0'),
+                    (f"{metric}_m2", 'FLOAT DEFAULT 0.0')]
+    for column, sql_type in columns:
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE area_stats ADD COLUMN {column} {sql_type}")
+    count = rebuild_area_stats(conn)
+    logger.info(f"Rebuilt {count} area_stats rows")
+
+
+def _add_price_aggregates(conn) -> None:
+    """物件に価格推移の集計列（初回価格・値下げ回数・最終値下げ日時）を追加して価格履歴から算出"""
+    from .price_history import backfill_price_aggregates
+    existing = _columns(conn, 'properties')
+    for column, sql_type in (('first_price', 'INTEGER'), ('price_cut_count', 'INTEGER DEFAULT 0'),
+                             ('last_price_cut_at', 'DATETIME')):
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE properties ADD COLUMN {column} {sql_type}")
+    count = backfill_price_aggregates(conn)
+    logger.info(f"Backfilled price aggregates from {count} price histories")
+
+
+def _add_delisting_tracking(conn) -> None:
+    """掲載終了の検出用に巡回エリア・最終確認日時・掲載終了日時と巡回記録 area_crawls を追加"""
+    from .database import AreaCrawl
+    existing = _columns(conn, 'properties')
+    for column, sql_type in (('crawl_area', 'VARCHAR(200)'), ('last_seen_at', 'DATETIME'),
+                             ('delisted_at', 'DATETIME')):
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE properties ADD COLUMN {column} {sql_type}")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_properties_crawl_area_active ON properties (crawl_area, is_active)"
+    )
+    AreaCrawl.__table__.create(conn, checkfirst=True)
+
+
+
+def _add_score_keys(conn) -> None:
+    """property_scores に採点の入力の指紋（score_cache のキー）を追加"""
+    if 'score_key' not in _columns(conn, 'property_scores'):
+        conn.exec_driver_sql("ALTER TABLE property_scores ADD COLUMN score_key VARCHAR(32)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_property_scores_key ON property_scores (score_key)")
+
+
+def _create_score_runs(conn) -> None:
+    """変更された物件の再採点の実行記録 score_runs を追加"""
+    from .database import ScoreRun
+    ScoreRun.__table__.create(conn, checkfirst=True)
+
+
+def _add_built_year(conn) -> None:
+    """
+    properties に築年（西暦）を追加
+
+    既存行は築年数を記録した年が分からず推定すると1年ずれるので空のままにする
+    （一覧カードとの照合では比較しない）。scripts/reparse.py でアーカイブから埋まる。
+    """
+    if 'built_year' not in _columns(conn, 'properties'):
+        conn.exec_driver_sql("ALTER TABLE properties ADD COLUMN built_year INTEGER")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'properties.access_info を追加', _add_access_info),
+    Migration(2, '検索用インデックスを追加', _create_query_indexes),
+    Migration(3, '駅アクセス表 property_access を追加', _create_property_access),
+    Migration(4, '全文検索 property_fts を追加', _create_property_fts),
+    Migration(5, '派生属性（市区町村・ブランド・部屋数・設備）を追加', _add_derived_attributes),
+    Migration(6, 'property_scores にスコアラーの版を追加', _add_score_versions),
+    Migration(7, 'area_stats を差分更新する集計に変更', _add_area_stats_aggregates),
+    Migration(8, '価格推移の集計列（初回価格・値下げ回数）を追加', _add_price_aggregates),
+    Migration(9, '掲載終了の検出（巡回エリア・巡回記録 area_crawls）を追加', _add_delisting_tracking),
+    Migration(10, 'property_scores にスコアのキャッシュキーを追加', _add_score_keys),
+    Migration(11, '変更された物件の再採点の記録 score_runs を追加', _create_score_runs),
+    Migration(12, '物件に築年（西暦）を追加', _add_built_year),
+]
+
+
+def _ensure_table(conn) -> None:
+    conn.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+
+
+def current_version(engine) -> int:
+    """適用済みの最新バージョン（未適用なら 0）"""
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        return conn.exec_driver_sql("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").scalar()
+
+
+def run_migrations(engine) -> List[Migration]:
+    """
+    未適用のマイグレーションを番号順に適用
+
+    1件ずつ別トランザクションで実行し、途中で失敗してもそれまでの分は記録される。
+
+    Returns:
+        今回適用したマイグレーション
+    """
+    applied = []
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        done = {row[0] for row in conn.exec_driver_sql("SELECT version FROM schema_migrations")}
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        logger.info(f"Applying migration {migration.version}: {migration.name}")
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.exec_driver_sql(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, datetime.now().isoformat())
+            )
+        applied.append(migration)
+    return applied
@@ -0,0 +1,174 @@
+"""
+価格履歴の一括読み込みと要約
+
+一覧の1ページ分の物件の価格履歴を (property_id, recorded_at) のインデックスで
+1回のクエリにまとめて読む（物件ごとに問い合わせない）。要約（初回価格・最新価格・
+値下げ回数・最大下落率）はウィンドウ関数で SQL 側で求めるので、履歴の全行を
+読まずに表示できる。
+
+スコアリング用の集計（初回価格・値下げ回数・最終値下げ日時）は Property の列に
+持ち、価格を記録するたびに apply_price_change と同じ規則で更新する。
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from .database import PriceHistory, Property
+
+CHUNK_SIZE = 500
+
+
+class PriceSeries(NamedTuple):
+    """1物件の価格履歴（古い順）"""
+    dates: List[datetime]
+    prices: List[int]
+
+
+class PriceSummary(NamedTuple):
+    """1物件の価格履歴の要約"""
+    points: int                  # 記録数
+    first_price: Optional[int]   # 初回価格（万円）
+    latest_price: Optional[int]  # 最新価格（万円）
+    drops: int                   # 値下げ回数（直前の記録より下がった回数）
+    max_drawdown_pct: float      # それまでの最高値からの最大下落率（%）
+
+    @classmethod
+    def of(cls, prices: List[int]) -> 'PriceSummary':
+        """古い順の価格から要約を求める（SQL の集計と同じ規則）"""
+        drops = 0
+        peak = None
+        drawdown = 0.0
+        for i, price in enumerate(prices):
+            if i > 0 and price < prices[i - 1]:
+                drops += 1
+            peak = price if peak is None else max(peak, price)
+            if peak:
+                drawdown = max(drawdown, (peak - price) * 100.0 / peak)
+        return cls(len(prices), prices[0] if prices else None, prices[-1] if prices else None, drops, drawdown)
+
+    def summary(self) -> str:
+        if self.points <= 1 or self.drops == 0:
+            return "値下げなし"
+        return f"値下げ{self.drops}回（{self.first_price:,}万円→{self.latest_price:,}万円, 最大-{self.max_drawdown_pct:.1f}%）"
+
+
+def _chunks(property_ids: Iterable[int]):
+    ids = sorted(set(property_ids))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def load_price_histories(session, property_ids: Iterable[int]) -> Dict[int, PriceSeries]:
+    """
+    物件ごとの価格履歴（古い順）。履歴のない物件は含めない
+
+    Returns:
+        {物件ID: PriceSeries}
+    """
+    histories = {}
+    for chunk in _chunks(property_ids):
+        rows = session.execute(
+            select(PriceHistory.property_id, PriceHistory.recorded_at, PriceHistory.price)
+            .where(PriceHistory.property_id.in_(chunk))
+            .order_by(PriceHistory.property_id, PriceHistory.recorded_at, PriceHistory.id)
+        )
+        for property_id, recorded_at, price in rows:
+            series = histories.get(property_id)
+            if series is None:
+                series = histories[property_id] = PriceSeries([], [])
+            series.dates.append(recorded_at)
+            series.prices.append(price)
+    return histories
+
+
+def load_price_summaries(session, property_ids: Iterable[int]) -> Dict[int, PriceSummary]:
+    """
+    物件ごとの価格履歴の要約（SQL で集計し、履歴の行は読まない）。履歴のない物件は含めない
+
+    Returns:
+        {物件ID: PriceSummary}
+    """
+    summaries = {}
+    for chunk in _chunks(property_ids):
+        order = (PriceHistory.recorded_at, PriceHistory.id)
+        steps = (
+            select(
+                PriceHistory.property_id,
+                PriceHistory.price,
+                func.lag(PriceHistory.price).over(partition_by=PriceHistory.property_id, order_by=order)
+                .label('prev_price'),
+                func.max(PriceHistory.price).over(partition_by=PriceHistory.property_id, order_by=order,
+                                                  rows=(None, 0))
+                .label('peak'),
+                func.row_number().over(partition_by=PriceHistory.property_id, order_by=order).label('seq'),
+                func.count().over(partition_by=PriceHistory.property_id).label('points'),
+            )
+            .where(PriceHistory.property_id.in_(chunk))
+            .subquery()
+        )
+        rows = session.execute(
+            select(
+                steps.c.property_id,
+                func.max(steps.c.points),
+                func.max(case((steps.c.seq == 1, steps.c.price))),
+                func.max(case((steps.c.seq == steps.c.points, steps.c.price))),
+                func.sum(case((steps.c.price < steps.c.prev_price, 1), else_=0)),
+                func.max(case((steps.c.peak > 0, (steps.c.peak - steps.c.price) * 100.0 / steps.c.peak),
+                              else_=0.0)),
+            ).group_by(steps.c.property_id)
+        )
+        for property_id, points, first_price, latest_price, drops, drawdown in rows:
+            summaries[property_id] = PriceSummary(points, first_price, latest_price, drops or 0, drawdown or 0.0)
+    return summaries
+
+
+def apply_price_change(prop, new_price: int, changed_at: datetime) -> None:
+    """
+    価格変更を物件の価格推移の集計列に反映（prop.price の更新は呼び出し側で、この後に行う）
+
+    値下げは直前の価格より下がった変更だけを数える。
+    """
+    if prop.first_price is None:
+        prop.first_price = prop.price
+    if prop.price and new_price < prop.price:
+        prop.price_cut_count = (prop.price_cut_count or 0) + 1
+        prop.last_price_cut_at = changed_at
+
+
+def backfill_price_aggregates(conn) -> int:
+    """
+    価格履歴から全物件の価格推移の集計列を作り直す（コミットは呼び出し側）
+
+    履歴のない物件は初回価格＝現在価格・値下げなしとする。
+
+    Returns:
+        履歴から集計した物件数
+    """
+    property_ids = [row[0] for row in conn.execute(select(PriceHistory.property_id).distinct())]
+    rows = []
+    for property_id, series in load_price_histories(conn, property_ids).items():
+        cuts = [
+            series.dates[i] for i in range(1, len(series.prices))
+            if series.prices[i] < series.prices[i - 1]
+        ]
+        rows.append({
+            '_id': property_id,
+            'first_price': series.prices[0],
+            'price_cut_count': len(cuts),
+            'last_price_cut_at': cuts[-1] if cuts else None,
+        })
+
+    table = Property.__table__
+    # 集計列だけの更新では更新日時を変えない
+    conn.execute(
+        update(table).values(first_price=table.c.price, price_cut_count=0, last_price_cut_at=None,
+                             last_updated=table.c.last_updated)
+    )
+    if rows:
+        conn.execute(
+            update(table).where(table.c.id == bindparam('_id')).values(last_updated=table.c.last_updated),
+            rows
+        )
+    return len(rows)
@@ -0,0 +1,89 @@
+"""
+物件の全文検索（物件名・住所・駅名・アクセス）
+
+property_fts（FTS5, trigram トークナイザー）を使う。trigram は3文字以上の
+語を索引で引けるため、空白区切りの各語のうち3文字以上は MATCH、2文字以下
+（「渋谷」等）は LIKE で絞り込む。結果は bm25 の関連度順（物件名の一致を重視）。
+
+2文字以下の語は索引では引けない。3文字以上の語と組み合わせたときは MATCH で
+絞った行だけを LIKE で調べるが、2文字以下の語だけの検索は properties の全行を
+LIKE で走査する（10万件で数十ミリ秒。scripts/bench_search.py）。
+
+件数の上限はない。他の条件と組み合わせるときは search_select をサブクエリとして
+渡し、SQLの中で絞り込む（一致した物件IDをPythonに読み出さない）。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import column, text
+
+# bm25 の列ごとの重み（title, address, station_name, access_info）
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+FTS_COLUMNS = ('title', 'address', 'station_name', 'access_info')
+
+
+def _phrase(term: str) -> str:
+    """FTS5 の構文として解釈されないよう語を引用符で囲む"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _search_sql(query: str, ordered: bool = True) -> Optional[Tuple[str, Dict]]:
+    """キーワードに一致する物件ID（列 id）を返すSQLとパラメータ（キーワードがなければ None）"""
+    terms = [t for t in query.split() if t]
+    if not terms:
+        return None
+
+    long_terms = [t for t in terms if len(t) >= 3]
+    short_terms = [t for t in terms if len(t) < 3]
+
+    conditions = []
+    params = {}
+    if long_terms:
+        conditions.append("property_fts MATCH :match")
+        params['match'] = ' AND '.join(_phrase(t) for t in long_terms)
+    for i, term in enumerate(short_terms):
+        # 値は properties から直接読む（外部コンテンツの FTS 経由で読むより速い）
+        conditions.append('(' + ' OR '.join(f"p.{col} LIKE :short{i}" for col in FTS_COLUMNS) + ')')
+        params[f'short{i}'] = f"%{term}%"
+
+    if long_terms:
+        source = "property_fts JOIN properties p ON p.id = property_fts.rowid" if short_terms else "property_fts"
+        order = f"bm25(property_fts, {', '.join(map(str, BM25_WEIGHTS))})"
+        sql = f"SELECT property_fts.rowid AS id FROM {source} WHERE {' AND '.join(conditions)}"
+    else:
+        order = 'p.id DESC'
+        sql = f"SELECT p.id AS id FROM properties p WHERE {' AND '.join(conditions)}"
+    if ordered:
+        sql += f" ORDER BY {order}"
+    return sql, params
+
+
+def search_select(query: str):
+    """
+    キーワードに一致する物件IDのサブクエリ（Property.id.in_() に渡す）
+
+    キーワードがなければ None。
+    """
+    found = _search_sql(query, ordered=False)
+    if found is None:
+        return None
+    sql, params = found
+    return text(sql).bindparams(**params).columns(column('id'))
+
+
+def search_property_ids(session, query: str, limit: Optional[int] = None) -> List[int]:
+    """
+    キーワードに一致する物件IDを関連度順に返す（全語を含むもの）
+
+    Args:
+        query: 空白区切りのキーワード（例: "パークハウス 恵比寿"）
+        limit: 返す最大件数（省略時は全件）
+    """
+    found = _search_sql(query)
+    if found is None:
+        return []
+    sql, params = found
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params['limit'] = limit
+    return [row[0] for row in session.execute(text(sql), params)]
@@ -0,0 +1,145 @@
+"""
+物件データの書き込みバッファ（write-behind）
+
+取得した詳細データを溜めておき、max_rows 件たまるか最初の1件から
+max_seconds 秒経った時点で save_properties_bulk でまとめて書き込む。
+1件ごとのコミット（SQLiteでは毎回 fsync）をバッチ単位に減らす。
+
+経過時間の判定は add のたびに行うほか、タイマーでも行う（取得が遅く add が
+途切れても、溜まった分は max_seconds 後に書き込まれる）。タイマーは別スレッドで
+書き込むので、書き込みには渡されたセッションと同じエンジンの専用セッションを使う。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .database import get_session, save_properties_bulk
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ('saved', 'updated', 'exists', 'unchanged', 'skip')
+
+
+class WriteBehindBuffer:
+    """詳細データを溜めて一括保存するバッファ（スレッドセーフ）"""
+
+    def __init__(self, session, max_rows: int = 200, max_seconds: float = 5.0,
+                 on_flush: Optional[Callable[[List[Tuple[Dict, str]]], None]] = None,
+                 idle_flush: bool = True):
+        """
+        Args:
+            session: 書き込み先のDBのセッション（書き込みは同じエンジンの専用セッションで行う）
+            max_rows: この件数たまったら書き込む
+            max_seconds: 最初の1件からこの秒数経ったら書き込む
+            on_flush: 書き込み後に [(詳細データ, 結果), ...] を受け取るコールバック
+                      （タイマーによる書き込みではタイマーのスレッドから呼ばれる）
+            idle_flush: False ならタイマーを使わず、add・flush_if_due の呼び出し時だけ判定する
+        """
+        self.session = get_session(session.get_bind())
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.on_flush = on_flush
+        self.idle_flush = idle_flush
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: List[Dict] = []
+        self._first_added: Optional[float] = None
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, detail: Dict) -> None:
+        """詳細データを追加（条件を満たせばその場で書き込む）"""
+        with self._lock:
+            if not self._pending:
+                self._first_added = time.monotonic()
+                self._schedule(self.max_seconds)
+            self._pending.append(detail)
+            self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """件数または経過時間の条件を満たしていれば書き込む"""
+        with self._lock:
+            if not self._pending:
+                return
+            if len(self._pending) >= self.max_rows or time.monotonic() - self._first_added >= self.max_seconds:
+                self.flush()
+
+    def _schedule(self, delay: float) -> None:
+        """delay 秒後に経過時間の判定を予約（ロックは呼び出し側）"""
+        if not self.idle_flush:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            if self._timer is not threading.current_thread():
+                return  # 予約し直された・書き込み済み
+            self._timer = None
+            try:
+                self.flush_if_due()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed, retrying in {self.max_seconds:.0f}s: {e}")
+                if self._pending:
+                    self._schedule(self.max_seconds)
+                return
+            if self._pending:
+                # 最初の1件からまだ max_seconds 経っていない（flush 後に追加された分）
+                self._schedule(max(0.0, self._first_added + self.max_seconds - time.monotonic()))
+
+    def flush(self) -> List[Tuple[Dict, str]]:
+        """溜まっている分を書き込み、[(詳細データ, 結果), ...] を返す"""
+        with self._lock:
+            if self._timer is not None and self._timer is not threading.current_thread():
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return []
+            batch, self._pending = self._pending, []
+            self._first_added = None
+
+            try:
+                outcomes = save_properties_bulk(self.session, batch)
+            except Exception:
+                self._pending = batch + self._pending  # 書き込めなかった分は残して次回に再試行
+                self._first_added = time.monotonic()
+                raise
+            results = list(zip(batch, outcomes))
+            for outcome in outcomes:
+                self.counts[outcome] += 1
+            self.flushes += 1
+            if self.on_flush:
+                self.on_flush(results)
+            return results
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self) -> str:
+        """集計結果の文字列表現"""
+        c = self.counts
+        return (
+            f"書き込み: {self.flushes}回 / 新規{c['saved']}件・更新{c['updated']}件"
+            f"・既存{c['exists']}件・未変更{c['unchanged']}件"
+        )
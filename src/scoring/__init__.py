@@ -8,6 +8,10 @@ from .location_scorer import LocationScorer
 from .spec_scorer import SpecScorer
 from .cost_scorer import CostScorer
 from .future_scorer import FutureScorer
+from .safe_scorer import SafePropertyScorer
+from .batch_scorer import BatchScorer, BatchScores
+from .comparables import AreaComparables, StationComparables
+from .score_cache import ScoreCache
 
 __all__ = [
     'PropertyScorer',
@@ -15,5 +19,11 @@ __all__ = [
     'LocationScorer',
     'SpecScorer',
     'CostScorer',
-    'FutureScorer'
+    'FutureScorer',
+    'SafePropertyScorer',
+    'BatchScorer',
+    'BatchScores',
+    'StationComparables',
+    'AreaComparables',
+    'ScoreCache'
 ]
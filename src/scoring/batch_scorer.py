@@ -0,0 +1,571 @@
+"""
+一括スコアリング（N件の物件をまとめて採点）
+
+SafePropertyScorer の calculate_score と同じ規則を、物件の DataFrame の
+列ごとに NumPy の配列演算（np.select の閾値表・np.where）で評価する。四則演算の順序まで
+スカラー版に合わせてあるので、結果はスカラー版と1ビットも違わない。
+
+- 駅距離・築年数などの閾値の段は np.select
+- 方角など値の種類が少ない文字列は種類ごとに1回だけ判定して配る
+- 住所の部分一致は pandas の str.contains（語ごとではなく正規表現1本）
+- 価格・維持コストの比較対象は集計の一括参照（AreaComparables / StationComparables / AreaStatsLookup の comparable_many）
+- 重みプロファイルごとの総合スコアはカテゴリ別スコア (N×5) と重み (5×P) の積で一度に求める
+
+比較対象物件のリストを渡す採点（calculate_score の comparable_properties）には対応しない。
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from ..models.attributes import (FEATURE_BITS, MAJOR_BRANDS, brand_of, detect_brand, feature_flags,
+                                 feature_flags_of, normalize_ward, ward_of)
+from ..models.database import Property
+from .cost_scorer import CostScorer
+from .future_scorer import FutureScorer
+from .location_scorer import LocationScorer
+from .price_scorer import PriceScorer
+from .profiles import WEIGHT_PROFILES, profile_weights
+from .safe_scorer import SafePropertyScorer
+from .spec_scorer import SpecScorer
+
+CATEGORIES = ('price', 'location', 'spec', 'cost', 'future')
+
+# カテゴリごとの詳細スコアの項目（calculate_score の detail と同じ順）
+DETAIL_FIELDS = {
+    'price': ('sqm_score', 'total_score', 'discount_score'),
+    'location': ('station_score', 'facility_score', 'area_score'),
+    'spec': ('age_score', 'area_score', 'floor_score', 'equipment_score'),
+    'cost': ('management_score', 'fixed_tax_score', 'total_cost_score'),
+    'future': ('location_asset_score', 'brand_score', 'management_score', 'area_score'),
+}
+
+MAX_SCORES = {
+    'price': PriceScorer.MAX_SCORE,
+    'location': LocationScorer.MAX_SCORE,
+    'spec': SpecScorer.MAX_SCORE,
+    'cost': CostScorer.MAX_SCORE,
+    'future': FutureScorer.MAX_SCORE,
+}
+
+# 採点に使う Property の列
+FRAME_COLUMNS = (
+    'id', 'is_active', 'price', 'area', 'price_per_sqm', 'building_age', 'floor', 'direction',
+    'address', 'city', 'prefecture', 'station_name', 'station_distance', 'management_fee',
+    'repair_reserve', 'features', 'ward', 'brand', 'feature_flags', 'first_price',
+    'price_cut_count', 'last_price_cut_at', 'first_seen',
+)
+
+
+def property_frame(records: List[Dict]) -> pd.DataFrame:
+    """
+    物件辞書（property_record・詳細データ）のリストを採点用の DataFrame に変換
+
+    派生属性（ward・brand・feature_flags）はスカラー版と同じく、辞書になければその場で算出する。
+    """
+    frame = pd.DataFrame.from_records(records) if records else pd.DataFrame(columns=FRAME_COLUMNS)
+    frame['ward'] = [ward_of(r) for r in records]
+    frame['brand'] = [brand_of(r) for r in records]
+    frame['feature_flags'] = [feature_flags_of(r) for r in records]
+    return frame
+
+
+def load_property_frame(session, property_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """物件を ORM オブジェクトにせず採点用の DataFrame に読み込む（省略時は販売中の全物件）"""
+    stmt = select(*[getattr(Property, column) for column in FRAME_COLUMNS])
+    if property_ids is None:
+        stmt = stmt.where(Property.is_active == True)
+    else:
+        stmt = stmt.where(Property.id.in_(list(property_ids)))
+    rows = session.execute(stmt.order_by(Property.id)).all()
+    return pd.DataFrame.from_records(rows, columns=FRAME_COLUMNS)
+
+
+def _numbers(frame: pd.DataFrame, column: str) -> np.ndarray:
+    """数値列（None は NaN）"""
+    if column not in frame:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+
+
+def _texts(frame: pd.DataFrame, column: str) -> pd.Series:
+    """文字列列（None は空文字）"""
+    if column not in frame:
+        return pd.Series([''] * len(frame), index=frame.index, dtype=object)
+    return frame[column].fillna('').astype(str)
+
+
+def _truthy(values: np.ndarray) -> np.ndarray:
+    """数値の真偽（None・0 は偽）"""
+    return ~np.isnan(values) & (values != 0)
+
+
+def _contains_any(texts: pd.Series, words: Iterable[str]) -> np.ndarray:
+    """いずれかの語を含むか（同じ文字列は1回だけ照合）"""
+    words = list(words)
+    if not words or not len(texts):
+        return np.zeros(len(texts), dtype=bool)
+    pattern = re.compile('|'.join(re.escape(word) for word in words))
+    codes, uniques = pd.factorize(texts)
+    return np.array([pattern.search(text) is not None for text in uniques], dtype=bool)[codes]
+
+
+def _per_value(texts: pd.Series, func) -> np.ndarray:
+    """値の種類ごとに1回だけ func を評価して配る（方角・市区町村など種類の少ない列）"""
+    codes, uniques = pd.factorize(texts)
+    if not len(uniques):
+        return np.zeros(len(texts))
+    return np.array([func(value) for value in uniques], dtype=float)[codes]
+
+
+def _days_since(frame: pd.DataFrame, column: str, now: datetime):
+    """(日時があるか, 経過日数) の配列。経過日数は timedelta.days と同じく切り捨て"""
+    if column not in frame:
+        n = len(frame)
+        return np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64)
+    values = frame[column]
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        # datetime と ISO 形式の文字列だけを日時とする（_as_datetime と同じ）
+        values = pd.to_datetime(values.where(values.map(lambda v: isinstance(v, (datetime, str)))),
+                                errors='coerce', format='ISO8601')
+    stamps = values.to_numpy(dtype='datetime64[us]')
+    valid = ~np.isnat(stamps)
+    delta = np.datetime64(now, 'us') - np.where(valid, stamps, np.datetime64(now, 'us'))
+    return valid, delta // np.timedelta64(1, 'D')
+
+
+def _ward_column(frame: pd.DataFrame) -> pd.Series:
+    """市区町村（ward_of と同じく列がなければ市区町村・住所から算出）"""
+    if 'ward' in frame:
+        return _texts(frame, 'ward')
+    wards = [normalize_ward(city, address) or ''
+             for city, address in zip(_texts(frame, 'city'), _texts(frame, 'address'))]
+    return pd.Series(wards, index=frame.index, dtype=object)
+
+
+def _brand_column(frame: pd.DataFrame) -> pd.Series:
+    """ブランド（brand_of と同じく列がなければ物件名から判定。なしは空文字）"""
+    if 'brand' in frame:
+        return _texts(frame, 'brand')
+    return pd.Series([detect_brand(title) or '' for title in _texts(frame, 'title')], index=frame.index, dtype=object)
+
+
+def _flag_column(frame: pd.DataFrame) -> np.ndarray:
+    flags = _numbers(frame, 'feature_flags')
+    missing = np.isnan(flags)
+    if missing.any():
+        features = frame['features'] if 'features' in frame else pd.Series([None] * len(frame))
+        flags[missing] = [feature_flags(f) for f in features[missing]]
+    return flags.astype(np.int64)
+
+
+def _recency_points(frame: pd.DataFrame, now: datetime):
+    """値下げスコアのうち経過日数で決まる加点（直近の値下げ, 掲載日数）の配列"""
+    has_cut, cut_days = _days_since(frame, 'last_price_cut_at', now)
+    listed, listed_days = _days_since(frame, 'first_seen', now)
+    return (
+        np.select([has_cut & (cut_days <= 30), has_cut & (cut_days <= 90)], [1.0, 0.5], 0.0),
+        np.select([listed & (listed_days >= 180), listed & (listed_days >= 90)], [1.0, 0.5], 0.0),
+    )
+
+
+def _inactive(frame: pd.DataFrame) -> np.ndarray:
+    """is_active が False の物件（比較対象の集計に含まれていない）"""
+    active = frame['is_active'] if 'is_active' in frame else pd.Series([None] * len(frame))
+    return active.map(lambda v: isinstance(v, (bool, np.bool_)) and not v).to_numpy(dtype=bool)
+
+
+# 採点の入力（score_inputs）に含める列
+INPUT_NUMBERS = ('id', 'price', 'area', 'price_per_sqm', 'building_age', 'floor', 'station_distance',
+                 'management_fee', 'repair_reserve', 'first_price', 'price_cut_count')
+INPUT_TEXTS = ('direction', 'address', 'city', 'prefecture', 'station_name')
+
+
+def score_inputs(frame: pd.DataFrame, now: Optional[datetime] = None) -> List[tuple]:
+    """
+    物件ごとの採点の入力（BatchScorer が読む値を正規化したタプル）
+
+    この値と比較対象の集計が同じなら採点結果も同じになる（スコアのキャッシュキーに使う）。
+    日時の列は経過日数で決まる加点に置き換えるので、段が変わる日だけ値が変わる。
+    """
+    cut_points, listed_points = _recency_points(frame, now or datetime.now())
+    columns = [_numbers(frame, name).tolist() for name in INPUT_NUMBERS]
+    columns += [_texts(frame, name).tolist() for name in INPUT_TEXTS]
+    columns += [
+        _ward_column(frame).tolist(), _brand_column(frame).tolist(), _flag_column(frame).tolist(),
+        _inactive(frame).tolist(), cut_points.tolist(), listed_points.tolist(),
+    ]
+    return list(zip(*columns))
+
+
+class BatchScores:
+    """一括採点の結果（物件ごとの配列）"""
+
+    def __init__(self, ids: np.ndarray, detail: Dict[str, Dict[str, np.ndarray]],
+                 weighted: Dict[str, np.ndarray], total: np.ndarray, rank, shared: Optional[Dict] = None):
+        """
+        Args:
+            ids: 物件ID（なければ None）
+            detail: {カテゴリ: {詳細項目: 配列, 'score': 配列}}
+            weighted: {カテゴリ: 重み付け後のスコア}（丸める前）
+            total: 100点満点に正規化した総合スコア（丸める前）
+            rank: スコア → ランク文字列
+            shared: 同じ detail の他の重みプロファイルの結果と共有するキャッシュ
+        """
+        self.ids = ids
+        self.detail = detail
+        self.weighted = weighted
+        self.total = total
+        self._rank = rank
+        self._shared = shared if shared is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.total)
+
+    @property
+    def total_scores(self) -> List[float]:
+        """総合スコア（calculate_score の total_score と同じく小数1桁に丸めた値）"""
+        return [round(v, 1) for v in self.total.tolist()]
+
+    def category_scores(self, category: str) -> List[float]:
+        """カテゴリ別スコア（小数1桁に丸めた値）"""
+        return [round(v, 1) for v in self.weighted[category].tolist()]
+
+    def _detail_rows(self) -> List[Dict]:
+        """物件ごとの詳細スコアの辞書（重みプロファイル間で共有）"""
+        rows = self._shared.get('detail_rows')
+        if rows is None:
+            details = {
+                c: [(field, self.detail[c][field].tolist()) for field in DETAIL_FIELDS[c] + ('score',)]
+                for c in CATEGORIES
+            }
+            rows = [
+                {c: {field: values[i] for field, values in details[c]} for c in CATEGORIES}
+                for i in range(len(self.total))
+            ]
+            self._shared['detail_rows'] = rows
+        return rows
+
+    def results(self) -> List[Dict]:
+        """物件ごとの calculate_score と同じ形の辞書"""
+        totals = self.total.tolist()
+        rounded = self.total_scores
+        categories = {c: self.category_scores(c) for c in CATEGORIES}
+        details = self._detail_rows()
+        return [
+            {
+                'total_score': rounded[i],
+                'rank': self._rank(totals[i]),
+                'category_scores': {c: categories[c][i] for c in CATEGORIES},
+                'detail': details[i],
+            }
+            for i in range(len(totals))
+        ]
+
+
+class BatchScorer:
+    """スカラー版のスコアラーと同じ規則・重み・エリア統計で N 件をまとめて採点"""
+
+    def __init__(self, scorer=None):
+        """
+        Args:
+            scorer: 規則の元にする SafePropertyScorer / PropertyScorer（省略時は比較対象の集計なしの
+                    SafePropertyScorer）。重みプロファイル・設備の加点・上限・比較対象の集計をここから引く
+        """
+        scorer = scorer or SafePropertyScorer()
+        self.profile = scorer.profile
+        self.equipment_points = scorer.EQUIPMENT_POINTS
+        self.max_total = scorer.MAX_TOTAL
+        self.comparables = scorer.price_scorer.comparables
+        self._rank = scorer._get_rank
+
+    def score(self, frame: pd.DataFrame, now: Optional[datetime] = None) -> BatchScores:
+        """
+        物件の DataFrame（property_frame / load_property_frame）をスコアラーの重みプロファイルで採点
+
+        Args:
+            now: 値下げ・掲載日数の基準日時（省略時は現在）
+        """
+        return self.score_profiles(frame, [self.profile], now)[self.profile]
+
+    def score_profiles(self, frame: pd.DataFrame, profiles: Optional[Iterable[str]] = None,
+                       now: Optional[datetime] = None) -> Dict[str, BatchScores]:
+        """
+        カテゴリ別スコアを1回だけ算出し、重みプロファイルごとの総合スコアを求める
+
+        Args:
+            profiles: 重みプロファイル名（省略時は全プロファイル）
+            now: 値下げ・掲載日数の基準日時（省略時は現在）
+
+        Returns:
+            {プロファイル名: BatchScores}（詳細スコアの配列は共有）
+        """
+        n = len(frame)
+        cols = {
+            name: _numbers(frame, name)
+            for name in ('id', 'price', 'area', 'price_per_sqm', 'building_age', 'floor', 'station_distance',
+                         'management_fee', 'repair_reserve', 'first_price', 'price_cut_count')
+        }
+        ward = _ward_column(frame)
+        address = _texts(frame, 'address')
+        station = _texts(frame, 'station_name')
+
+        comparables = self._comparables(frame, cols, ward, station)
+        detail = {
+            'price': self._price(frame, cols, comparables, now or datetime.now()),
+            'location': self._location(cols, ward, address, _texts(frame, 'city')),
+            'spec': self._spec(frame, cols),
+            'cost': self._cost(cols, comparables),
+            'future': self._future(frame, cols, ward, address),
+        }
+
+        names = list(WEIGHT_PROFILES if profiles is None else profiles)
+        ids = frame['id'].to_numpy() if 'id' in frame else np.full(n, None)
+        weighted, totals = self._totals(detail, names)
+        shared = {}
+        return {
+            name: BatchScores(ids, detail, {c: weighted[c][:, j] for c in CATEGORIES}, totals[:, j], self._rank,
+                              shared)
+            for j, name in enumerate(names)
+        }
+
+    def _totals(self, detail, names):
+        """
+        カテゴリ別スコア (N×5) と重み (5×P) の積で全プロファイルの総合スコア (N×P) を求める
+
+        積和はスカラー版の sum と同じくカテゴリ順に足し、丸めまで calculate_score と揃える。
+        """
+        weights = np.array([[profile_weights(name)[c] for name in names] for c in CATEGORIES])
+        weighted = {c: detail[c]['score'][:, None] * weights[k] for k, c in enumerate(CATEGORIES)}
+        total_max = np.array([sum([MAX_SCORES[c] * profile_weights(name)[c] for c in CATEGORIES]) for name in names])
+        total_score = np.zeros((len(detail['price']['score']), len(names)))
+        for c in CATEGORIES:
+            total_score = total_score + weighted[c]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total = np.where(total_max > 0, (total_score / total_max) * 100, 0.0)
+        if self.max_total is not None:
+            total = np.minimum(self.max_total, total)
+        return weighted, total
+
+    # --- 比較対象 ---
+
+    def _comparables(self, frame, cols, ward, station) -> Dict[str, tuple]:
+        """指標ごとの (比較対象があるか, 平均, 標準偏差)（スカラー版の comparable と同じ）"""
+        n = len(frame)
+        area = cols['area']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cost = (np.nan_to_num(cols['management_fee']) + np.nan_to_num(cols['repair_reserve'])) / area
+        own = {
+            'sqm': np.where(_truthy(cols['price_per_sqm']), cols['price_per_sqm'], np.nan),
+            'price': np.where(_truthy(cols['price']), cols['price'], np.nan),
+            'cost': np.where(~np.isnan(area) & (area > 0), cost, np.nan),
+        }
+        if self.comparables is None:
+            return {metric: (np.zeros(n, dtype=bool), np.zeros(n), np.zeros(n)) for metric in own}
+
+        counted = ~np.isnan(cols['id']) & ~_inactive(frame)
+        names = {
+            'station': station.to_numpy(dtype=object),
+            'ward': ward.to_numpy(dtype=object),
+            'prefecture': _texts(frame, 'prefecture').to_numpy(dtype=object),
+        }
+        ids = [None if np.isnan(i) else int(i) for i in cols['id']]
+        # 維持コストは平均だけを使う
+        return {
+            metric: self.comparables.comparable_many(names, own[metric], counted, metric, ids=ids,
+                                                     with_stdev=metric != 'cost')
+            for metric in own
+        }
+
+    # --- 価格適正性（PriceScorer） ---
+
+    def _price(self, frame, cols, comparables, now) -> Dict[str, np.ndarray]:
+        price, sqm = cols['price'], cols['price_per_sqm']
+
+        def deviation_score(values, metric, center, slope, upper):
+            found, mean, stdev = comparables[metric]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                deviation = np.where(stdev > 0, (mean - values) / stdev, 0.0)
+            score = np.maximum(0.0, np.minimum(upper, center + (deviation * slope)))
+            return np.where(_truthy(values), np.where(found, score, center), 0.0)
+
+        sqm_score = deviation_score(sqm, 'sqm', 7.5, 3.75, 15.0)
+        total_score = deviation_score(price, 'price', 5.0, 2.5, 10.0)
+        discount_score = self._discount(frame, cols, now)
+        return {
+            'sqm_score': sqm_score,
+            'total_score': total_score,
+            'discount_score': discount_score,
+            'score': np.minimum(sqm_score + total_score + discount_score, PriceScorer.MAX_SCORE),
+        }
+
+    def _discount(self, frame, cols, now) -> np.ndarray:
+        """値下げスコア（PriceScorer._calculate_discount_score）"""
+        price = cols['price']
+        first_price = np.where(_truthy(cols['first_price']), cols['first_price'], price)
+        valid = _truthy(price) & _truthy(first_price)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cut_rate = (first_price - price) / first_price * 100
+        cuts = np.nan_to_num(cols['price_cut_count'])
+        score = np.select([cut_rate >= 10, cut_rate >= 5, (cut_rate > 0) | (cuts > 0)], [3.0, 2.0, 1.0], 0.0)
+
+        cut_points, listed_points = _recency_points(frame, now)
+        score = score + cut_points
+        score = score + listed_points
+        return np.where(valid, np.minimum(5.0, score), 0.0)
+
+    # --- 立地（LocationScorer） ---
+
+    def _location(self, cols, ward, address, city) -> Dict[str, np.ndarray]:
+        dist = cols['station_distance']
+        base = np.select(
+            [dist <= 5, dist <= 10, dist <= 15, dist <= 20],
+            [10.0, 7.0, 4.0, 2.0],
+            np.maximum(0.0, 10.0 - (dist - 20) * 0.5)
+        )
+        # 駅近（10分以内）は1.1倍ボーナス
+        base = np.where(dist <= 10, np.minimum(10.0, base * 1.1), base)
+        station_score = np.where(np.isnan(dist), 5.0, base)
+
+        terminal = (_contains_any(address, LocationScorer.MAJOR_TERMINALS)
+                    | _contains_any(city, LocationScorer.MAJOR_TERMINALS))
+        high_potential = _contains_any(ward, LocationScorer.HIGH_POTENTIAL_WARDS)
+        facility_score = np.minimum(8.0, 4.0 + np.where(terminal, 2.0, 0.0) + np.where(high_potential, 2.0, 0.0))
+
+        tier1 = _contains_any(ward, LocationScorer.TIER1_WARDS) | _contains_any(address, LocationScorer.TIER1_TOWNS)
+        tier2 = _contains_any(ward, LocationScorer.TIER2_WARDS)
+        area_score = np.select([tier1, tier2], [7.0, 5.5], 3.5)
+        return {
+            'station_score': station_score,
+            'facility_score': facility_score,
+            'area_score': area_score,
+            'score': np.minimum(station_score + facility_score + area_score, LocationScorer.MAX_SCORE),
+        }
+
+    # --- 物件スペック（SpecScorer / SafePropertyScorer の緩和版） ---
+
+    def _spec(self, frame, cols) -> Dict[str, np.ndarray]:
+        age = cols['building_age']
+        age_score = np.select(
+            [np.isnan(age), age <= 5, age <= 15, age <= 25, age <= 35],
+            [4.0, 8.0, 7.0, 5.0, 3.0],
+            np.maximum(1.0, 3.0 - (age - 35) * 0.1)
+        )
+
+        area = cols['area']
+        area_score = np.select(
+            [np.isnan(area), (50 <= area) & (area <= 100),
+             ((40 <= area) & (area < 50)) | ((100 < area) & (area <= 120)), area > 120],
+            [2.5, 5.0, 4.0, 3.0],
+            2.0
+        )
+
+        floor = cols['floor']
+        floor_points = np.select([np.isnan(floor), floor >= 10, floor >= 3, floor >= 2], [1.5, 3.0, 2.5, 2.0], 1.0)
+
+        def direction_points(direction):
+            if not direction:
+                return 1.0
+            if '南' in direction or '東' in direction or '西' in direction:
+                return 2.0
+            if '北' in direction:
+                return 1.0
+            return 0.0
+
+        floor_score = np.minimum(5.0, floor_points + _per_value(_texts(frame, 'direction'), direction_points))
+
+        flags = _flag_column(frame)
+        equipment_score = np.full(len(frame), 2.0)
+        for key, points in self.equipment_points.items():
+            equipment_score = np.where(flags & FEATURE_BITS[key], equipment_score + points, equipment_score)
+        equipment_score = np.minimum(7.0, equipment_score)
+
+        return {
+            'age_score': age_score,
+            'area_score': area_score,
+            'floor_score': floor_score,
+            'equipment_score': equipment_score,
+            'score': np.minimum(age_score + area_score + floor_score + equipment_score, SpecScorer.MAX_SCORE),
+        }
+
+    # --- 維持コスト（CostScorer） ---
+
+    def _cost(self, cols, comparables) -> Dict[str, np.ndarray]:
+        area, price, age = cols['area'], cols['price'], cols['building_age']
+        monthly = np.nan_to_num(cols['management_fee']) + np.nan_to_num(cols['repair_reserve'])
+
+        has_area = ~np.isnan(area) & (area > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cost = monthly / area
+        found, avg, _ = comparables['cost']
+        relative = np.select(
+            [cost <= avg * 0.9, cost <= avg * 1.05, cost <= avg * 1.2, cost <= avg * 1.4], [10.0, 8.0, 6.0, 4.0], 2.0
+        )
+        absolute = np.select([cost <= 350, cost <= 450, cost <= 550, cost <= 650], [10.0, 8.0, 6.0, 4.0], 2.0)
+        management_score = np.where(has_area, np.where(found, relative, absolute), 5.0)
+
+        tax_score = np.select(
+            [np.isnan(age) | np.isnan(price), age >= 20, age >= 15, age >= 10], [1.0, 2.0, 1.5, 1.0], 0.5
+        )
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (monthly * 12) / (price * 10000) * 100
+        ratio_score = np.select([ratio <= 0.5, ratio <= 0.7, ratio <= 1.0, ratio <= 1.5], [3.0, 2.5, 2.0, 1.0], 0.5)
+        total_cost_score = np.where(_truthy(price) & (price > 0), ratio_score, 1.5)
+        return {
+            'management_score': management_score,
+            'fixed_tax_score': tax_score,
+            'total_cost_score': total_cost_score,
+            'score': np.minimum(management_score + tax_score + total_cost_score, CostScorer.MAX_SCORE),
+        }
+
+    # --- 将来性（FutureScorer） ---
+
+    def _future(self, frame, cols, ward, address) -> Dict[str, np.ndarray]:
+        dist = cols['station_distance']
+        dist_points = np.select(
+            [np.isnan(dist), dist <= 1, dist <= 3, dist <= 5, dist <= 7, dist <= 10],
+            [0.5, 1.5, 1.3, 1.0, 0.7, 0.4], 0.0
+        )
+        central = _contains_any(ward, FutureScorer.CENTRAL_WARDS)
+        location_asset_score = np.minimum(2.0, dist_points + np.where(central, 0.5, 0.0))
+
+        brand_score = _per_value(
+            _brand_column(frame), lambda b: 1.0 if b in MAJOR_BRANDS else (0.7 if b else 0.3)
+        )
+
+        m_fee, r_fee = cols['management_fee'], cols['repair_reserve']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fee_ratio = np.where(m_fee > 0, r_fee / m_fee, 0.0)
+        management_score = np.where(
+            _truthy(m_fee) & _truthy(r_fee),
+            np.select([(0.8 <= fee_ratio) & (fee_ratio <= 1.5), (0.5 <= fee_ratio) & (fee_ratio <= 2.0),
+                       fee_ratio < 0.3], [1.0, 0.8, 0.3], 0.6),
+            0.5
+        )
+
+        # 再開発エリアは辞書の順に最初に含まれるものの点数（同じ点数の続きは1本の正規表現にまとめる）
+        conditions, points = [], []
+        for area, point in FutureScorer.REDEVELOPMENT_AREAS.items():
+            if points and points[-1] == point:
+                conditions[-1].append(area)
+            else:
+                conditions.append([area])
+                points.append(point)
+        ward_base = ward.str.endswith('区').to_numpy(dtype=bool)
+        area_score = np.select(
+            [_contains_any(address, words) for words in conditions], points, np.where(ward_base, 0.5, 0.3)
+        )
+
+        return {
+            'location_asset_score': location_asset_score,
+            'brand_score': brand_score,
+            'management_score': management_score,
+            'area_score': area_score,
+            'score': np.minimum(location_asset_score + brand_score + management_score + area_score,
+                                FutureScorer.MAX_SCORE),
+        }
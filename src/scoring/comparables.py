@@ -0,0 +1,292 @@
+"""
+同じ駅の比較対象の統計（自分を除く）
+
+販売中物件を1回だけ走査して駅ごとに件数・合計・二乗和を持ち、各物件の比較対象
+（同じ駅の他の販売中物件）の平均・標準偏差を、自分の寄与を引いて O(1) で求める。
+物件ごとに比較対象のリストを作って statistics.mean / stdev にかける方法（O(n²)）と
+同じ数値になるよう、合計・二乗和は値を2のべき乗倍した整数で正確に持ち、平均・
+標準偏差は最後に1回だけ丸める（statistics と同じく正確な有理数の正しい丸め）。
+
+駅の比較対象が min_samples 件に満たない物件（駅の物件が少ない・駅名がない）は、
+AreaComparables が差分更新されるエリア統計（area_stats）の市区町村・都道府県の集計で
+比べる。スコアラー（PriceScorer / CostScorer / BatchScorer）には AreaStatsLookup と同じ
+comparable / comparable_many で渡す。
+"""
+
+import math
+import sys
+from fractions import Fraction
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ..models.area_stats import METRICS, AreaStatsLookup, metric_values
+from ..models.database import Property
+
+CHUNK_SIZE = 500
+
+# 比較に必要な件数（従来どおり3件）
+MIN_SAMPLES = 3
+
+# 駅の比較対象が足りないときに参照するエリアの順
+FALLBACK_LEVELS = ('ward', 'prefecture')
+
+# 比較対象の統計に使う Property の列
+COMPARABLE_FIELDS = ('id', 'station_name', 'price', 'price_per_sqm', 'area', 'management_fee', 'repair_reserve')
+
+_SQRT_BIT_WIDTH = 2 * sys.float_info.mant_dig + 3
+
+
+def _sqrt_of_frac(n: int, m: int) -> float:
+    """n/m の平方根を正しく丸めた float（statistics.stdev と同じ方法）"""
+    def rto(n, m):
+        # 丸めを奇数方向に寄せた整数平方根
+        a = math.isqrt(n // m)
+        return a | (a * a * m != n)
+
+    q = (n.bit_length() - m.bit_length() - _SQRT_BIT_WIDTH) // 2
+    if q >= 0:
+        return float(rto(n, m << 2 * q) << q)
+    return rto(n << -2 * q, m) / (1 << -q)
+
+
+class ExactStats:
+    """比較対象の件数・平均・標本標準偏差（合計・二乗和は scale 倍した整数）"""
+
+    __slots__ = ('count', 'total', 'sumsq', 'scale')
+
+    def __init__(self, count: int, total: int, sumsq: int, scale: int):
+        self.count = count
+        self.total = total
+        self.sumsq = sumsq
+        self.scale = scale
+
+    @property
+    def mean(self) -> float:
+        return self.total / (self.count * self.scale)
+
+    @property
+    def stdev(self) -> float:
+        """標本標準偏差（n-1 で割る）"""
+        n = self.count
+        if n <= 1:
+            return 0.0
+        return _sqrt_of_frac(n * self.sumsq - self.total * self.total, n * (n - 1) * self.scale * self.scale)
+
+
+class StationComparables:
+    """駅ごとの比較対象の統計（自分を除いた同じ駅の販売中物件）"""
+
+    def __init__(self, rows: Iterable[Dict], min_samples: int = MIN_SAMPLES):
+        """
+        Args:
+            rows: 販売中物件の辞書（COMPARABLE_FIELDS を持つもの）
+            min_samples: 比較に必要な件数
+        """
+        self.min_samples = min_samples
+        ratios = []
+        for row in rows:
+            values = metric_values(row)
+            station = row.get('station_name')
+            if station and values:
+                ratios.append((row.get('id'), station,
+                               {metric: value.as_integer_ratio() for metric, value in values.items()}))
+
+        # 指標ごとに全ての値が整数になる倍率（分母は2のべき乗なので最大の分母）
+        self.scales = {metric: 1 for metric in METRICS}
+        for _, _, values in ratios:
+            for metric, (_, denominator) in values.items():
+                if denominator > self.scales[metric]:
+                    self.scales[metric] = denominator
+
+        self.groups: Dict[str, Dict[str, List[int]]] = {metric: {} for metric in METRICS}
+        self.members: Dict[int, Tuple[str, Dict[str, int]]] = {}
+        for property_id, station, values in ratios:
+            scaled = {}
+            for metric, (numerator, denominator) in values.items():
+                x = numerator * (self.scales[metric] // denominator)
+                group = self.groups[metric].setdefault(station, [0, 0, 0])
+                group[0] += 1
+                group[1] += x
+                group[2] += x * x
+                scaled[metric] = x
+            if property_id is not None:
+                self.members[property_id] = (station, scaled)
+        self._versions: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, session, stations: Optional[Iterable[str]] = None, **kwargs) -> 'StationComparables':
+        """
+        販売中物件から作成（stations を指定するとその駅の物件だけを読む）
+        """
+        columns = [getattr(Property, field) for field in COMPARABLE_FIELDS]
+        query = select(*columns).where(Property.is_active == True)
+        if stations is None:
+            rows = [row._mapping for row in session.execute(query)]
+        else:
+            names = sorted({name for name in stations if name})
+            rows = []
+            for start in range(0, len(names), CHUNK_SIZE):
+                chunk = names[start:start + CHUNK_SIZE]
+                rows += [row._mapping for row in session.execute(query.where(Property.station_name.in_(chunk)))]
+        return cls(rows, **kwargs)
+
+    def group_version(self, station, ward: str = '', prefecture: str = '') -> str:
+        """
+        駅の集計の版（件数・合計・二乗和が変わると変わる。スコアのキャッシュキーに使う）
+
+        合計・二乗和は倍率によらない有理数で表すので、他の駅の値で倍率が変わっても版は変わらない。
+        ward・prefecture は AreaComparables.group_version と揃えるための引数（使わない）。
+        """
+        if not station:
+            return ''
+        version = self._versions.get(station)
+        if version is None:
+            parts = []
+            for metric in METRICS:
+                group = self.groups[metric].get(station)
+                if group is not None:
+                    count, total, sumsq = group
+                    scale = self.scales[metric]
+                    parts.append(f"{metric}:{count}:{Fraction(total, scale)}:{Fraction(sumsq, scale * scale)}")
+            version = self._versions[station] = '|'.join(parts)
+        return version
+
+    def may_fall_back(self, station) -> bool:
+        """駅の物件に比較対象が min_samples 件に満たないものがありうるか（駅名がない・件数が少ない指標がある）"""
+        if not station:
+            return True
+        for metric in METRICS:
+            group = self.groups[metric].get(station)
+            if group is None or group[0] <= self.min_samples:
+                return True
+        return False
+
+    def _group(self, station, property_id, metric: str) -> Optional[Tuple[int, int, int]]:
+        """自分を除いた (件数, 合計, 二乗和)。駅がない・比較対象が min_samples 未満なら None"""
+        group = self.groups[metric].get(station) if station else None
+        if group is None:
+            return None
+        count, total, sumsq = group
+        member = self.members.get(property_id)
+        if member is not None and member[0] == station and metric in member[1]:
+            x = member[1][metric]
+            count, total, sumsq = count - 1, total - x, sumsq - x * x
+        if count < self.min_samples:
+            return None
+        return count, total, sumsq
+
+    def comparable(self, property_data: Dict, metric: str) -> Optional[ExactStats]:
+        """物件と比較する同じ駅の他の物件の集計（件数が min_samples 未満なら None）"""
+        found = self._group(property_data.get('station_name'), property_data.get('id'), metric)
+        if found is None:
+            return None
+        return ExactStats(*found, self.scales[metric])
+
+    def comparable_many(self, names: Dict[str, Sequence[str]], own: np.ndarray, counted: np.ndarray,
+                        metric: str, ids: Optional[Sequence] = None,
+                        with_stdev: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        comparable の一括版（BatchScorer 用）
+
+        Args:
+            names: {'station': 物件ごとの駅名}
+            ids: 物件ごとの物件ID（自分を除くのに使う。own・counted は使わない）
+            with_stdev: 標準偏差も求めるか（平均だけでよい指標は省く）
+
+        Returns:
+            (比較対象があるか, 平均, 標準偏差) の配列
+        """
+        stations = names['station']
+        n = len(stations)
+        ids = ids if ids is not None else [None] * n
+        found = np.zeros(n, dtype=bool)
+        means = np.zeros(n)
+        stdevs = np.zeros(n)
+        groups = self.groups[metric]
+        members = self.members
+        scale = self.scales[metric]
+        minimum = self.min_samples
+        # 駅と除く値が同じなら結果も同じなので1回だけ丸める（除かない場合は値 None）
+        results = {}
+        for i, (station, property_id) in enumerate(zip(stations, ids)):
+            member = members.get(property_id)
+            x = member[1].get(metric) if member is not None and member[0] == station else None
+            key = (station, x)
+            result = results.get(key, False)
+            if result is False:
+                group = groups.get(station) if station else None
+                result = None
+                if group is not None:
+                    count, total, sumsq = group
+                    if x is not None:
+                        count, total, sumsq = count - 1, total - x, sumsq - x * x
+                    if count >= minimum:
+                        stats = ExactStats(count, total, sumsq, scale)
+                        result = (stats.mean, stats.stdev if with_stdev else 0.0)
+                results[key] = result
+            if result is not None:
+                found[i] = True
+                means[i], stdevs[i] = result
+        return found, means, stdevs
+
+
+class AreaComparables:
+    """
+    同じ駅の比較対象（StationComparables）と、駅の比較対象が足りない物件の
+    市区町村・都道府県の比較対象（AreaStatsLookup）
+    """
+
+    def __init__(self, stations: StationComparables, areas: AreaStatsLookup):
+        """
+        Args:
+            stations: 駅ごとの正確な集計
+            areas: 駅で見つからなかったときに参照するエリア統計（levels の順に見る）
+        """
+        self.stations = stations
+        self.areas = areas
+        self._versions: Dict[Tuple[str, str, str], str] = {}
+
+    @classmethod
+    def load(cls, session, stations: Optional[Iterable[str]] = None,
+             levels: Tuple[str, ...] = FALLBACK_LEVELS) -> 'AreaComparables':
+        """販売中物件とエリア統計（levels の行）から作成（stations は StationComparables.load と同じ）"""
+        return cls(StationComparables.load(session, stations),
+                   AreaStatsLookup.load(session, levels=levels, min_samples=MIN_SAMPLES))
+
+    def group_version(self, station, ward: str = '', prefecture: str = '') -> str:
+        """駅の集計の版（駅の比較対象が足りない物件がありうる駅は、参照するエリアの集計の版も含む）"""
+        key = (station or '', ward or '', prefecture or '')
+        version = self._versions.get(key)
+        if version is None:
+            version = self.stations.group_version(station)
+            if self.stations.may_fall_back(station):
+                version += '||' + self.areas.area_version({'ward': ward, 'prefecture': prefecture})
+            self._versions[key] = version
+        return version
+
+    def comparable(self, property_data: Dict, metric: str):
+        """同じ駅の他の物件の集計（足りなければ市区町村・都道府県の集計。どれも足りなければ None）"""
+        stats = self.stations.comparable(property_data, metric)
+        if stats is None:
+            stats = self.areas.comparable(property_data, metric)
+        return stats
+
+    def comparable_many(self, names: Dict[str, Sequence[str]], own: np.ndarray, counted: np.ndarray,
+                        metric: str, ids: Optional[Sequence] = None,
+                        with_stdev: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """comparable の一括版（駅で見つからなかった物件だけエリア統計を引く）"""
+        found, means, stdevs = self.stations.comparable_many(names, own, counted, metric, ids=ids,
+                                                             with_stdev=with_stdev)
+        rest = np.flatnonzero(~found)
+        if len(rest):
+            area_found, area_means, area_stdevs = self.areas.comparable_many(
+                {level: np.asarray(values, dtype=object)[rest] for level, values in names.items()},
+                np.asarray(own)[rest], np.asarray(counted)[rest], metric
+            )
+            take = rest[area_found]
+            found[take] = True
+            means[take] = area_means[area_found]
+            stdevs[take] = area_stdevs[area_found]
+        return found, means, stdevs
@@ -3,7 +3,7 @@
 """
 
 import logging
-from typing import Dict
+from typing import Dict, Optional
 import statistics
 
 logger = logging.getLogger(__name__)
@@ -14,13 +14,21 @@ class CostScorer:
     
     MAX_SCORE = 15.0
     
+    def __init__(self, comparables=None):
+        """
+        Args:
+            comparables: 比較対象の集計（comparables.AreaComparables / StationComparables / area_stats.AreaStatsLookup）。
+                         比較対象物件のリストが渡されなかったときに平均をここから引く
+        """
+        self.comparables = comparables
+    
     def calculate(self, property_data: Dict, comparable_properties: list = None) -> Dict[str, float]:
         """
         維持コストスコアを算出
         
         Args:
             property_data: 物件データ
-            comparable_properties: 比較対象物件のリスト
+            comparable_properties: 比較対象物件のリスト（None ならエリア統計を使う）
             
         Returns:
             スコア詳細
@@ -73,29 +81,19 @@ class CostScorer:
         monthly_cost_per_sqm = (mgmt_fee + repair_reserve) / area
         
         # 比較対象がある場合
-        if comparable_properties and len(comparable_properties) >= 3:
-            costs = []
-            for prop in comparable_properties:
-                p_mgmt = prop.get('management_fee', 0) or 0
-                p_repair = prop.get('repair_reserve', 0) or 0
-                p_area = prop.get('area')
-                if p_area and p_area > 0:
-                    costs.append((p_mgmt + p_repair) / p_area)
-            
-            if len(costs) >= 3:
-                avg_cost = statistics.mean(costs)
-                
-                # 平均より安いほど高得点（基準を緩和）
-                if monthly_cost_per_sqm <= avg_cost * 0.9:
-                    return 10.0  # 平均の90%以下
-                elif monthly_cost_per_sqm <= avg_cost * 1.05:
-                    return 8.0   # 平均ちょい上までOK
-                elif monthly_cost_per_sqm <= avg_cost * 1.2:
-                    return 6.0   # 平均の1.2倍まで標準
-                elif monthly_cost_per_sqm <= avg_cost * 1.4:
-                    return 4.0   # 平均の1.4倍まで許容
-                else:
-                    return 2.0   # それ以上は高い
+        avg_cost = self._comparable_mean(property_data, comparable_properties)
+        if avg_cost is not None:
+            # 平均より安いほど高得点（基準を緩和）
+            if monthly_cost_per_sqm <= avg_cost * 0.9:
+                return 10.0  # 平均の90%以下
+            elif monthly_cost_per_sqm <= avg_cost * 1.05:
+                return 8.0   # 平均ちょい上までOK
+            elif monthly_cost_per_sqm <= avg_cost * 1.2:
+                return 6.0   # 平均の1.2倍まで標準
+            elif monthly_cost_per_sqm <= avg_cost * 1.4:
+                return 4.0   # 平均の1.4倍まで許容
+            else:
+                return 2.0   # それ以上は高い
         
         # 比較対象がない場合は絶対値で評価（基準を緩和）
         # 市場実勢：都心部は400-500円/㎡も普通
@@ -110,6 +108,28 @@ class CostScorer:
         else:
             return 2.0
     
+    def _comparable_mean(self, property_data: Dict, comparable_properties: Optional[list]) -> Optional[float]:
+        """比較対象の㎡あたり月額コストの平均。3件未満なら None"""
+        if comparable_properties is not None:
+            if len(comparable_properties) >= 3:
+                costs = []
+                for prop in comparable_properties:
+                    p_mgmt = prop.get('management_fee', 0) or 0
+                    p_repair = prop.get('repair_reserve', 0) or 0
+                    p_area = prop.get('area')
+                    if p_area and p_area > 0:
+                        costs.append((p_mgmt + p_repair) / p_area)
+                if len(costs) >= 3:
+                    return statistics.mean(costs)
+            return None
+        
+        # 比較対象の集計（自分を除いた同じ駅の集計）
+        if self.comparables is not None:
+            stats = self.comparables.comparable(property_data, 'cost')
+            if stats:
+                return stats.mean
+        return None
+    
     def _calculate_tax_score(self, property_data: Dict) -> float:
         """
         固定資産税スコア算出（2点満点）
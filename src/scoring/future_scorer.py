@@ -5,6 +5,8 @@
 import logging
 from typing import Dict
 
+from ..models.attributes import BRAND_MAP, MAJOR_BRANDS, brand_of, ward_in, ward_of
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,15 +15,17 @@ class FutureScorer:
     
     MAX_SCORE = 5.0
     
-    # 大手ブランドマップ
-    BRAND_MAP = {
-        '三井不動産': ['パークホームズ', 'パークタワー', 'パークコート', 'パークマンション'],
-        '三菱地所': ['パークハウス', 'ザ・パークハウス'],
-        '住友不動産': ['シティハウス', 'シティタワー', 'グランドヒルズ', 'シティテラス'],
-        '野村不動産': ['プラウド', 'PROUD'],
-        '東急不動産': ['ブランズ', 'BRANZ'],
-        '東京建物': ['ブリリア', 'Brillia'],
-        '旭化成': ['アトラス', 'ATLAS']
+    # 大手ブランドマップ（判定は取り込み時に attributes.detect_brand で行う）
+    BRAND_MAP = BRAND_MAP
+    
+    # 都心5区（ward_in で部分一致）
+    CENTRAL_WARDS = frozenset(['千代田区', '中央区', '港区', '新宿区', '渋谷区'])
+    
+    # 再開発重点エリア（住所に含まれる最初のものの点数）
+    REDEVELOPMENT_AREAS = {
+        '品川': 1.0, '高輪': 1.0, '虎ノ門': 1.0, '麻布台': 1.0,
+        '渋谷': 1.0, '日本橋': 0.9, '八重洲': 0.9, '中野': 0.8,
+        '下北沢': 0.8, '池袋': 0.7, '晴海': 0.7, '勝どき': 0.7
     }
     
     def calculate(self, property_data: Dict) -> Dict[str, float]:
@@ -77,25 +81,21 @@ class FutureScorer:
             score += 0.5
             
         # 都心5区ボーナス (0.5点)
-        address = property_data.get('address', '')
-        central_wards = ['千代田区', '中央区', '港区', '新宿区', '渋谷区']
-        if any(ward in address for ward in central_wards):
+        if ward_in(property_data, self.CENTRAL_WARDS):
             score += 0.5
             
         return min(2.0, score)
     
     def _calculate_brand_score(self, property_data: Dict) -> float:
         """ブランド価値算出 (1.0点満点)"""
-        title = property_data.get('title', '')
+        brand = brand_of(property_data)
         
-        # タイトルから大手ブランドを検索
-        for developer, series in self.BRAND_MAP.items():
-            if any(s in title for s in series):
-                return 1.0
+        # 大手ブランド
+        if brand in MAJOR_BRANDS:
+            return 1.0
                 
-        # 準大手・その他優良デベロッパー（簡易）
-        sub_brands = ['クレヴィア', 'ライオンズ', 'ピアース', 'ディアナ']
-        if any(sb in title for sb in sub_brands):
+        # 準大手・その他優良デベロッパー（attributes.SUB_BRANDS）
+        if brand:
             return 0.7
             
         return 0.3
@@ -126,18 +126,12 @@ class FutureScorer:
         address = property_data.get('address', '')
         
         # 再開発重点エリア
-        dev_map = {
-            '品川': 1.0, '高輪': 1.0, '虎ノ門': 1.0, '麻布台': 1.0,
-            '渋谷': 1.0, '日本橋': 0.9, '八重洲': 0.9, '中野': 0.8,
-            '下北沢': 0.8, '池袋': 0.7, '晴海': 0.7, '勝どき': 0.7
-        }
-        
-        for area, point in dev_map.items():
+        for area, point in self.REDEVELOPMENT_AREAS.items():
             if area in address:
                 return point
         
-        # 23区内であれば基礎点
-        if '区' in address:
+        # 区内であれば基礎点
+        if ward_of(property_data).endswith('区'):
             return 0.5
             
         return 0.3
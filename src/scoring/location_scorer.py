@@ -5,6 +5,8 @@
 import logging
 from typing import Dict
 
+from ..models.attributes import ward_in
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,6 +15,24 @@ class LocationScorer:
     
     MAX_SCORE = 25.0
     
+    # 文教・生活利便・商業エリア（市区町村。ward_in で部分一致）
+    HIGH_POTENTIAL_WARDS = frozenset([
+        '文京区', '目黒区', '世田谷区', '杉並区', '武蔵野市',  # 生活・文教
+        '港区', '中央区', '千代田区'  # 商業・中心地
+    ])
+    
+    # 人気エリア（ティア1: 市区町村・町名、ティア2: 市区町村。市区町村は ward_in で部分一致）
+    TIER1_WARDS = frozenset(['港区', '渋谷区', '目黒区', '世田谷区', '文京区'])
+    TIER1_TOWNS = ['みなとみらい', '武蔵小杉']
+    TIER2_WARDS = frozenset([
+        '品川区', '新宿区', '中野区', '杉並区', '大田区',
+        '横浜市西区', '横浜市中区', '川崎市中原区',
+        'さいたま市浦和区', '千葉市中央区'
+    ])
+    
+    # 主要ターミナル駅（住所・市区町村に含まれれば周辺施設ボーナス）
+    MAJOR_TERMINALS = ['渋谷', '新宿', '池袋', '品川', '横浜', '大宮']
+    
     def calculate(self, property_data: Dict) -> Dict[str, float]:
         """
         立地スコアを算出
@@ -93,16 +113,11 @@ class LocationScorer:
         score = 4.0  # ベーススコア
         
         # 主要ターミナル駅周辺にボーナス
-        major_terminal_areas = ['渋谷', '新宿', '池袋', '品川', '横浜', '大宮']
-        if any(area in address or area in city for area in major_terminal_areas):
+        if any(area in address or area in city for area in self.MAJOR_TERMINALS):
             score += 2.0
         
         # 文教・生活利便・商業エリアの統合判定
-        high_potential_areas = [
-            '文京区', '目黒区', '世田谷区', '杉並区', '武蔵野市', # 生活・文教
-            '港区', '中央区', '千代田区' # 商業・中心地
-        ]
-        if any(area in address for area in high_potential_areas):
+        if ward_in(property_data, self.HIGH_POTENTIAL_WARDS):
             score += 2.0
         
         return min(8.0, score)
@@ -113,34 +128,14 @@ class LocationScorer:
         
         現時点では簡易実装（人気エリアの判定）
         """
-        address = property_data.get('address', '')
-        prefecture = property_data.get('prefecture', '')
-        city = property_data.get('city', '')
-        
-        score = 3.5  # ベーススコア
+        address = property_data.get('address') or ''
         
         # 人気エリア判定（ティア1）
-        tier1_areas = [
-            '港区', '渋谷区', '目黒区', '世田谷区', '文京区',
-            'みなとみらい', '武蔵小杉'
-        ]
+        if ward_in(property_data, self.TIER1_WARDS) or any(town in address for town in self.TIER1_TOWNS):
+            return 7.0
         
         # 人気エリア判定（ティア2）
-        tier2_areas = [
-            '品川区', '新宿区', '中野区', '杉並区', '大田区',
-            '横浜市西区', '横浜市中区', '川崎市中原区',
-            'さいたま市浦和区', '千葉市中央区'
-        ]
-        
-        for area in tier1_areas:
-            if area in address or area in city:
-                score = 7.0
-                break
-        
-        if score == 3.5:  # ティア1でない場合
-            for area in tier2_areas:
-                if area in address or area in city:
-                    score = 5.5
-                    break
+        if ward_in(property_data, self.TIER2_WARDS):
+            return 5.5
         
-        return score
+        return 3.5  # ベーススコア
@@ -3,7 +3,8 @@
 """
 
 import logging
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, Optional, Tuple
 import statistics
 
 logger = logging.getLogger(__name__)
@@ -14,12 +15,13 @@ class PriceScorer:
     
     MAX_SCORE = 30.0
     
-    def __init__(self, area_stats: Optional[Dict] = None):
+    def __init__(self, comparables=None):
         """
         Args:
-            area_stats: エリア統計データ {area_code: {'avg_price_per_sqm': float, 'std': float}}
+            comparables: 比較対象の集計（comparables.AreaComparables / StationComparables / area_stats.AreaStatsLookup）。
+                         比較対象物件のリストが渡されなかったときに平均・標準偏差をここから引く
         """
-        self.area_stats = area_stats or {}
+        self.comparables = comparables
     
     def calculate(self, property_data: Dict, comparable_properties: list = None) -> Dict[str, float]:
         """
@@ -27,7 +29,8 @@ class PriceScorer:
         
         Args:
             property_data: 物件データ
-            comparable_properties: 比較対象物件のリスト（同エリア・同築年数帯）
+            comparable_properties: 比較対象物件のリスト（同エリア・同築年数帯）。
+                                   None ならエリア統計を使う
             
         Returns:
             スコア詳細 {'score': float, 'sqm_score': float, 'total_score': float, 'discount_score': float}
@@ -46,8 +49,8 @@ class PriceScorer:
             # 2. 総額偏差値スコア（10点）
             scores['total_score'] = self._calculate_total_price_score(property_data, comparable_properties)
             
-            # 3. 値下げスコア（5点）- 現時点では実装スキップ
-            scores['discount_score'] = 0.0
+            # 3. 値下げスコア（5点）
+            scores['discount_score'] = self._calculate_discount_score(property_data)
             
             # 合計
             scores['score'] = min(
@@ -71,27 +74,23 @@ class PriceScorer:
         
         property_sqm = property_data['price_per_sqm']
         
-        # 比較対象物件がある場合
-        if comparable_properties and len(comparable_properties) >= 3:
-            sqm_prices = [p.get('price_per_sqm') for p in comparable_properties if p.get('price_per_sqm')]
+        comparable = self._comparable_stats(property_data, comparable_properties, 'price_per_sqm', 'sqm')
+        if comparable:
+            avg_sqm, std_sqm = comparable
             
-            if len(sqm_prices) >= 3:
-                avg_sqm = statistics.mean(sqm_prices)
-                std_sqm = statistics.stdev(sqm_prices) if len(sqm_prices) > 1 else avg_sqm * 0.15
-                
-                # 偏差値的なスコア算出
-                # 平均より安いほど高得点、高いほど低得点
-                deviation = (avg_sqm - property_sqm) / std_sqm if std_sqm > 0 else 0
-                
-                # deviation:
-                # +2.0 = かなり安い -> 15点
-                # +1.0 = やや安い -> 11点
-                # 0.0 = 平均 -> 7.5点
-                # -1.0 = やや高い -> 4点
-                # -2.0 = かなり高い -> 0点
-                
-                score = 7.5 + (deviation * 3.75)  # 7.5点を中心に±7.5点
-                return max(0.0, min(15.0, score))
+            # 偏差値的なスコア算出
+            # 平均より安いほど高得点、高いほど低得点
+            deviation = (avg_sqm - property_sqm) / std_sqm if std_sqm > 0 else 0
+            
+            # deviation:
+            # +2.0 = かなり安い -> 15点
+            # +1.0 = やや安い -> 11点
+            # 0.0 = 平均 -> 7.5点
+            # -1.0 = やや高い -> 4点
+            # -2.0 = かなり高い -> 0点
+            
+            score = 7.5 + (deviation * 3.75)  # 7.5点を中心に±7.5点
+            return max(0.0, min(15.0, score))
         
         # 比較対象がない場合は中間点
         return 7.5
@@ -107,19 +106,88 @@ class PriceScorer:
         
         property_price = property_data['price']
         
-        # 比較対象物件がある場合
-        if comparable_properties and len(comparable_properties) >= 3:
-            prices = [p.get('price') for p in comparable_properties if p.get('price')]
+        comparable = self._comparable_stats(property_data, comparable_properties, 'price', 'price')
+        if comparable:
+            avg_price, std_price = comparable
+            
+            deviation = (avg_price - property_price) / std_price if std_price > 0 else 0
             
-            if len(prices) >= 3:
-                avg_price = statistics.mean(prices)
-                std_price = statistics.stdev(prices) if len(prices) > 1 else avg_price * 0.15
-                
-                deviation = (avg_price - property_price) / std_price if std_price > 0 else 0
-                
-                # deviation範囲を10点満点でスコアリング
-                score = 5.0 + (deviation * 2.5)
-                return max(0.0, min(10.0, score))
+            # deviation範囲を10点満点でスコアリング
+            score = 5.0 + (deviation * 2.5)
+            return max(0.0, min(10.0, score))
         
         # 比較対象がない場合は中間点
         return 5.0
+    
+    def _calculate_discount_score(self, property_data: Dict, now: Optional[datetime] = None) -> float:
+        """
+        値下げスコア算出（5点満点）
+        
+        物件の価格推移の集計列（first_price, price_cut_count, last_price_cut_at）と
+        掲載日数から評価する（価格履歴は読まない）
+        """
+        price = property_data.get('price')
+        first_price = property_data.get('first_price') or price
+        if not price or not first_price:
+            return 0.0
+        now = now or datetime.now()
+        score = 0.0
+        
+        # 初回価格からの累積値下げ率（3点）
+        cut_rate = (first_price - price) / first_price * 100
+        if cut_rate >= 10:
+            score += 3.0
+        elif cut_rate >= 5:
+            score += 2.0
+        elif cut_rate > 0 or (property_data.get('price_cut_count') or 0) > 0:
+            score += 1.0
+        
+        # 直近の値下げ（1点）: 売り急ぎのサイン
+        last_cut = _as_datetime(property_data.get('last_price_cut_at'))
+        if last_cut:
+            days = (now - last_cut).days
+            if days <= 30:
+                score += 1.0
+            elif days <= 90:
+                score += 0.5
+        
+        # 掲載日数（1点）: 長く売れ残っているほど交渉の余地がある
+        first_seen = _as_datetime(property_data.get('first_seen'))
+        if first_seen:
+            days = (now - first_seen).days
+            if days >= 180:
+                score += 1.0
+            elif days >= 90:
+                score += 0.5
+        
+        return min(5.0, score)
+    
+    def _comparable_stats(self, property_data: Dict, comparable_properties: Optional[list],
+                          field: str, metric: str) -> Optional[Tuple[float, float]]:
+        """比較対象の (平均, 標準偏差)。3件未満なら None"""
+        # 比較対象物件のリストがある場合
+        if comparable_properties is not None:
+            if len(comparable_properties) >= 3:
+                values = [p.get(field) for p in comparable_properties if p.get(field)]
+                if len(values) >= 3:
+                    return statistics.mean(values), statistics.stdev(values)
+            return None
+        
+        # 比較対象の集計（自分を除いた同じ駅の集計）
+        if self.comparables is not None:
+            stats = self.comparables.comparable(property_data, metric)
+            if stats:
+                return stats.mean, stats.stdev
+        return None
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    """datetime または ISO 形式の文字列（保存済みスコアの JSON 等）を datetime に"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
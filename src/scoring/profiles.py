@@ -0,0 +1,37 @@
+"""
+重みプロファイル（ターゲット層ごとのカテゴリの重み）
+
+カテゴリ別スコア（価格・立地・スペック・維持コスト・将来性）の規則は全プロファイル共通で、
+総合スコアだけをプロファイルの重みで求める。property_scores にはプロファイル名を
+target_type として保存する。
+"""
+
+from typing import Dict
+
+DEFAULT_PROFILE = 'default'
+
+WEIGHT_PROFILES: Dict[str, Dict[str, float]] = {
+    # 標準（全て1.0。アプリの既定）
+    'default': {'price': 1.0, 'location': 1.0, 'spec': 1.0, 'cost': 1.0, 'future': 1.0},
+    # ファミリー向け（広さ・設備と毎月の維持費を重視、駅近・資産性は控えめ）
+    'family': {'price': 1.0, 'location': 0.9, 'spec': 1.2, 'cost': 1.1, 'future': 0.9},
+    # DINKS向け（駅近・都心と資産性を重視、広さ・設備は控えめ）
+    'dinks': {'price': 1.0, 'location': 1.3, 'spec': 0.8, 'cost': 0.9, 'future': 1.1},
+    # 資産性と居住性のバランス重視（旧 PropertyScorer の重み）
+    'balanced': {'price': 1.0, 'location': 1.1, 'spec': 1.0, 'cost': 1.0, 'future': 1.1},
+}
+
+PROFILE_LABELS = {
+    'default': '標準',
+    'family': 'ファミリー向け',
+    'dinks': 'DINKS向け',
+    'balanced': '資産性・居住性バランス',
+}
+
+
+def profile_weights(name: str) -> Dict[str, float]:
+    """プロファイル名から重みを引く（未知の名前は ValueError）"""
+    try:
+        return WEIGHT_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown weight profile: {name}") from None
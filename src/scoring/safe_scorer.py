@@ -0,0 +1,114 @@
+"""
+アプリ用の総合スコアリング（Safe Version）
+
+カテゴリ別スコアの規則はここに一本化し、ターゲット層ごとの違いは重みプロファイル
+（profiles.WEIGHT_PROFILES）だけで表す。アプリの表示と property_scores への保存
+（score_store）・一括採点（BatchScorer）はこのスコアラーの規則で行う。
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from .price_scorer import PriceScorer
+from .location_scorer import LocationScorer
+from .spec_scorer import SpecScorer
+from .cost_scorer import CostScorer
+from .future_scorer import FutureScorer
+from .profiles import DEFAULT_PROFILE, WEIGHT_PROFILES, profile_weights
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_MAX_SCORES = {
+    'price': PriceScorer.MAX_SCORE,
+    'location': LocationScorer.MAX_SCORE,
+    'spec': SpecScorer.MAX_SCORE,
+    'cost': CostScorer.MAX_SCORE,
+    'future': FutureScorer.MAX_SCORE,
+}
+
+
+class SafePropertyScorer:
+    """物件の総合お得度スコアを算出（Safe Version）"""
+
+    # 算出方法を変えたら上げる（保存済みのスコアは古い版として再計算の対象になる）
+    VERSION = 'safe-6'
+
+    # 標準の重み係数（全て1.0に統一して100点超えを防止）
+    WEIGHTS = WEIGHT_PROFILES[DEFAULT_PROFILE]
+
+    # 設備の加点（一括採点 BatchScorer が参照）
+    EQUIPMENT_POINTS = SpecScorer.EQUIPMENT_POINTS
+
+    # 総合スコアの上限（100点超えを防止）
+    MAX_TOTAL = 100.0
+
+    def __init__(self, comparables=None, profile: str = DEFAULT_PROFILE):
+        """
+        Args:
+            comparables: 比較対象の集計（comparables.AreaComparables / StationComparables / area_stats.AreaStatsLookup）。
+                         calculate_score に比較対象物件のリストを渡さないときは価格・維持コストの比較にこれを使う
+            profile: calculate_score で使う重みプロファイル（profiles.WEIGHT_PROFILES のキー）
+        """
+        self.profile = profile
+        self.weights = profile_weights(profile)
+        self.price_scorer = PriceScorer(comparables)
+        self.location_scorer = LocationScorer()
+        self.spec_scorer = SpecScorer()
+        self.cost_scorer = CostScorer(comparables)
+        self.future_scorer = FutureScorer()
+
+    def calculate_details(self, property_data: Dict, comparable_properties: Optional[List[Dict]] = None) -> Dict:
+        """カテゴリ別の詳細スコア（重みを掛ける前。全プロファイル共通）"""
+        return {
+            'price': self.price_scorer.calculate(property_data, comparable_properties),
+            'location': self.location_scorer.calculate(property_data),
+            'spec': self.spec_scorer.calculate(property_data),
+            'cost': self.cost_scorer.calculate(property_data, comparable_properties),
+            'future': self.future_scorer.calculate(property_data),
+        }
+
+    def combine(self, details: Dict, weights: Dict[str, float]) -> Dict:
+        """詳細スコアに重みを掛けて総合スコアの結果にする"""
+        weighted_scores = {category: details[category]['score'] * weights[category] for category in details}
+
+        # 総合スコアを100点満点に正規化
+        total_max = sum([CATEGORY_MAX_SCORES[category] * weights[category] for category in CATEGORY_MAX_SCORES])
+        total_score = sum(weighted_scores.values())
+        raw_normalized_score = (total_score / total_max) * 100 if total_max > 0 else 0
+        normalized_score = min(self.MAX_TOTAL, raw_normalized_score)  # 上限を100点にキャップ
+
+        return {
+            'total_score': round(normalized_score, 1),
+            'rank': self._get_rank(normalized_score),
+            'category_scores': {category: round(score, 1) for category, score in weighted_scores.items()},
+            'detail': details
+        }
+
+    def calculate_score(self, property_data: Dict, comparable_properties: Optional[List[Dict]] = None) -> Dict:
+        """
+        物件の総合お得度スコアを算出（このスコアラーの重みプロファイルで）
+
+        Args:
+            property_data: 物件データ
+            comparable_properties: 比較対象物件のリスト（省略時は comparables の集計）
+        """
+        return self.combine(self.calculate_details(property_data, comparable_properties), self.weights)
+
+    def calculate_profiles(self, property_data: Dict, comparable_properties: Optional[List[Dict]] = None,
+                           profiles: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        詳細スコアを1回だけ算出し、重みプロファイルごとの結果を返す
+
+        Returns:
+            {プロファイル名: calculate_score と同じ形の辞書}（省略時は全プロファイル）
+        """
+        details = self.calculate_details(property_data, comparable_properties)
+        names = WEIGHT_PROFILES if profiles is None else profiles
+        return {name: self.combine(details, profile_weights(name)) for name in names}
+
+    def _get_rank(self, score: float) -> str:
+        if score >= 90: return '🌟🌟🌟 超お得！即決レベル'
+        elif score >= 80: return '🌟🌟 かなりお得'
+        elif score >= 70: return '🌟 お得'
+        elif score >= 60: return '⭕ 標準的'
+        else: return '△ 割高の可能性'
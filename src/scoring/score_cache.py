@@ -0,0 +1,116 @@
+"""
+スコアのキャッシュ（採点の入力の指紋をキーにしたメモ化）
+
+キーは次のハッシュで、どれかが変わった物件だけを採点し直せばよい。
+
+- 採点の入力（batch_scorer.score_inputs。日時は経過日数で決まる加点に置き換えたもの）
+- 比較対象の集計の版（AreaComparables.group_version。駅の比較対象が足りない物件は市区町村・都道府県の集計も）
+- スコアラーの版（SafePropertyScorer.VERSION）と重みプロファイル（名前と重み）
+
+メモリ上は件数上限付きの LRU（プロセス内で共有するのでアプリの再実行をまたいで効く）で持ち、
+永続化は property_scores.score_key に採点結果と一緒に書き込む（write-through。score_store）。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .batch_scorer import score_inputs
+from .profiles import profile_weights
+
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def score_keys(frame: pd.DataFrame, scorer, target_types: Iterable[str],
+               now: Optional[datetime] = None) -> Dict[str, List[str]]:
+    """
+    物件ごとのキャッシュキー
+
+    Args:
+        scorer: 採点に使う SafePropertyScorer（比較対象の集計と版をここから引く）
+        target_types: 重みプロファイル
+
+    Returns:
+        {重みプロファイル: 物件ごとのキー}
+    """
+    comparables = scorer.price_scorer.comparables
+    areas = [
+        frame[column].fillna('').tolist() if column in frame else [''] * len(frame)
+        for column in ('station_name', 'ward', 'prefecture')
+    ]
+    bases = []
+    for inputs, station, ward, prefecture in zip(score_inputs(frame, now), *areas):
+        version = comparables.group_version(station, ward, prefecture) if comparables is not None else ''
+        bases.append(repr((scorer.VERSION, inputs, version)))
+    return {
+        target_type: [
+            hashlib.blake2b(f"{prefix}|{base}".encode(), digest_size=16).hexdigest() for base in bases
+        ]
+        for target_type, prefix in ((t, f"{t}|{sorted(profile_weights(t).items())}") for t in target_types)
+    }
+
+
+class ScoreCache:
+    """キー → スコア結果の LRU（スレッドセーフ）と命中率の集計"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            max_entries: メモリに持つ件数の上限（超えたら最も古く使われたものから捨てる）
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # hits: メモリで命中 / stored: 保存済みの行のキーが同じ（採点も書き込みも不要） / misses: 採点した
+        self.stats = {'hits': 0, 'stored': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """キーの結果（なければ None。命中・不命中を集計）"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """結果を記録（上限を超えたら古いものを捨てる）"""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def record_stored(self, count: int = 1) -> None:
+        """保存済みの行のキーが同じだった件数を集計"""
+        with self._lock:
+            self.stats['stored'] += count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """採点せずに済んだ割合（メモリ命中 + 保存済み）"""
+        s = self.stats
+        total = s['hits'] + s['stored'] + s['misses']
+        return (s['hits'] + s['stored']) / total if total else 0.0
+
+    def summary(self) -> str:
+        """集計結果の文字列表現"""
+        s = self.stats
+        return (
+            f"スコアキャッシュ: 命中率{self.hit_rate:.1%}（保存済み{s['stored']}件 / メモリ{s['hits']}件 / "
+            f"採点{s['misses']}件） 保持{len(self)}件・破棄{s['evictions']}件"
+        )
@@ -0,0 +1,417 @@
+"""
+スコアの保存と読み出し
+
+SafePropertyScorer の結果を property_scores に物件・ターゲット層（重みプロファイル）ごとに1行で保存する。
+行にはスコアラーの版（SafePropertyScorer.VERSION）と算出日時を持たせ、版が違う行や
+算出後に物件が更新された行は古いものとして扱う。アプリは新しい行を SQL で
+total_score 順に読み、古い行・未算出の物件だけをその場で計算する。
+
+価格・維持コストの比較対象（同じ駅の他の販売中物件）は、販売中物件を1回読んで作る
+駅ごとの正確な集計（StationComparables）から自分を除いて引き、駅の比較対象が足りない物件は
+エリア統計（area_stats）の市区町村・都道府県の集計で比べる（AreaComparables）。採点は BatchScorer で配列にまとめて行い、
+全件の再計算では物件を ORM オブジェクトにせず DataFrame に読み込み、カテゴリ別スコアを1回だけ
+算出して全プロファイルの総合スコアを求める。
+
+採点はスコアのキャッシュ（score_cache）を通し、採点の入力・比較対象の集計・版の指紋
+（score_key）が保存済みの行と変わった物件だけを採点して書き込む。
+"""
+
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, case, delete, func, insert, or_, select, update
+
+from ..models.database import Property, PropertyScore, is_readonly
+from .batch_scorer import BatchScorer, load_property_frame, property_frame
+from .comparables import AreaComparables
+from .profiles import DEFAULT_PROFILE, WEIGHT_PROFILES
+from .safe_scorer import SafePropertyScorer
+from .score_cache import ScoreCache, score_keys
+
+DEFAULT_TARGET = DEFAULT_PROFILE
+CHUNK_SIZE = 500
+SCORE_BATCH_SIZE = 5000  # 再計算で一度に採点する件数
+
+# プロセス内で共有するスコアのキャッシュ（アプリの再実行・再計算の繰り返しをまたいで使う）
+SCORE_CACHE = ScoreCache()
+
+
+def property_record(prop) -> Dict:
+    """Property をスコアラー・表示用の辞書に変換（保存時とアプリで共通）"""
+    return {
+        'id': prop.id,
+        'source_id': prop.source_id,
+        'title': prop.title or '',
+        'price': prop.price,
+        'area': prop.area,
+        'price_per_sqm': prop.price_per_sqm,
+        'building_age': prop.building_age,
+        'floor': prop.floor,
+        'direction': prop.direction or '',
+        'layout': prop.layout or '',
+        'address': prop.address or '',
+        'prefecture': prop.prefecture or '',
+        'city': prop.city or '',
+        'station_name': prop.station_name or '',
+        'station_distance': prop.station_distance,
+        'access_info': prop.access_info or '',
+        'management_fee': prop.management_fee,
+        'repair_reserve': prop.repair_reserve,
+        'features': prop.features or '{}',
+        'is_active': prop.is_active,
+        'ward': prop.ward,
+        'brand': prop.brand,
+        'rooms': prop.rooms,
+        'feature_flags': prop.feature_flags,
+        'first_price': prop.first_price,
+        'price_cut_count': prop.price_cut_count,
+        'last_price_cut_at': prop.last_price_cut_at,
+        'url': prop.url,
+        'first_seen': prop.first_seen,
+        'last_updated': prop.last_updated
+    }
+
+
+def score_join_condition(target_type: str = DEFAULT_TARGET, version: str = SafePropertyScorer.VERSION):
+    """Property と現行版のスコア行を結ぶ条件（outerjoin 用）"""
+    return and_(
+        PropertyScore.property_id == Property.id,
+        PropertyScore.target_type == target_type,
+        PropertyScore.scorer_version == version,
+    )
+
+
+# 経過日数で値下げスコアの加点が変わる日数（PriceScorer._discount: 直近の値下げは30日・90日以内、
+# 掲載日数は90日・180日以上で加点。経過日数は切り捨てなので値下げは31日目・91日目に変わる）
+RECENCY_STEPS = (
+    (Property.last_price_cut_at, (31, 91)),
+    (Property.first_seen, (90, 180)),
+)
+
+
+def recency_step_crossed(after, until):
+    """after より後・until 以前に経過日数の加点の段が変わった物件の条件（after・until は日時または列）"""
+    conditions = []
+    for column, days in RECENCY_STEPS:
+        for day in days:
+            crossed = func.datetime(column, f'+{day} days', type_=DateTime)
+            conditions.append(and_(column != None, crossed > after, crossed <= until))
+    return or_(*conditions)
+
+
+def fresh_score_condition(now: Optional[datetime] = None):
+    """結合したスコア行が最新か（存在し、物件の最終更新より後に算出し、その後に経過日数の段が変わっていない）"""
+    return and_(
+        PropertyScore.id != None,
+        or_(Property.last_updated == None, PropertyScore.calculated_at >= Property.last_updated),
+        ~recency_step_crossed(PropertyScore.calculated_at, now or datetime.now()),
+    )
+
+
+def load_scorer(session, records: Optional[List[Dict]] = None,
+                target_type: str = DEFAULT_TARGET) -> SafePropertyScorer:
+    """
+    比較対象の集計を読み込んだスコアラー
+
+    Args:
+        records: 採点する物件辞書（指定するとその駅の販売中物件だけを読む。省略時は全駅）
+        target_type: 重みプロファイル（ターゲット層）
+    """
+    stations = None if records is None else [r.get('station_name') for r in records]
+    return SafePropertyScorer(AreaComparables.load(session, stations), profile=target_type)
+
+
+def score_records(records: List[Dict], scorer: SafePropertyScorer) -> List[Dict]:
+    """物件辞書ごとのスコア結果（比較対象は scorer の集計。calculate_score と同じ値）"""
+    if not records:
+        return []
+    return BatchScorer(scorer).score(property_frame(records)).results()
+
+
+def score_from_row(score_row) -> Dict:
+    """保存済みのスコア行をスコア結果の辞書に戻す"""
+    return json.loads(score_row.detail)
+
+
+def save_scores(session, scored: Iterable[Tuple[int, Dict, Optional[str]]], target_type: str = DEFAULT_TARGET,
+                version: str = SafePropertyScorer.VERSION) -> int:
+    """
+    (物件ID, スコア結果, キャッシュキー) を保存（同じ物件・ターゲット層の既存行は置き換え、コミットは呼び出し側）
+
+    Returns:
+        保存した件数
+    """
+    now = datetime.now()
+    rows = [
+        {
+            'property_id': property_id,
+            'total_score': score['total_score'],
+            'price_score': score['category_scores']['price'],
+            'location_score': score['category_scores']['location'],
+            'spec_score': score['category_scores']['spec'],
+            'cost_score': score['category_scores']['cost'],
+            'future_score': score['category_scores']['future'],
+            'target_type': target_type,
+            'scorer_version': version,
+            'detail': json.dumps(score, ensure_ascii=False, default=str),
+            'score_key': score_key,
+            'calculated_at': now,
+        }
+        for property_id, score, score_key in scored
+    ]
+    if not rows:
+        return 0
+    property_ids = [row['property_id'] for row in rows]
+    for start in range(0, len(property_ids), CHUNK_SIZE):
+        session.execute(
+            delete(PropertyScore).where(
+                PropertyScore.property_id.in_(property_ids[start:start + CHUNK_SIZE]),
+                PropertyScore.target_type == target_type,
+            )
+        )
+    session.execute(insert(PropertyScore), rows)
+    return len(rows)
+
+
+def stored_score_keys(session, property_ids: List[int],
+                      target_types: Iterable[str]) -> Dict[Tuple[int, str], Tuple[int, Optional[str], bool]]:
+    """保存済みの現行版の行 {(物件ID, ターゲット層): (行ID, キャッシュキー, 最新か)}"""
+    fresh = or_(Property.last_updated == None, PropertyScore.calculated_at >= Property.last_updated)
+    target_types = set(target_types)
+    stored = {}
+    for start in range(0, len(property_ids), CHUNK_SIZE):
+        # ターゲット層は Python で絞る（SQL で絞ると ix_property_scores_rank で版の全行を読む）
+        rows = session.execute(
+            select(PropertyScore.id, PropertyScore.property_id, PropertyScore.target_type,
+                   PropertyScore.score_key, fresh)
+            .join(Property, Property.id == PropertyScore.property_id)
+            .where(PropertyScore.property_id.in_(property_ids[start:start + CHUNK_SIZE]),
+                   PropertyScore.scorer_version == SafePropertyScorer.VERSION)
+        )
+        for row_id, property_id, target_type, score_key, is_fresh in rows:
+            if target_type in target_types:
+                stored[(property_id, target_type)] = (row_id, score_key, bool(is_fresh))
+    return stored
+
+
+def refresh_scores(session, frame, scorer: SafePropertyScorer, target_types: Iterable[str],
+                   cache: Optional[ScoreCache] = None, now: Optional[datetime] = None,
+                   load_stored: bool = False, write: bool = True) -> Tuple[Dict[str, List[Optional[Dict]]], int]:
+    """
+    物件の DataFrame のスコアをキャッシュを通して求め、キーが変わった行だけを保存（コミットは呼び出し側）
+
+    - 保存済みの行とキーが同じ物件は採点も書き込みもしない（最終更新より古い行は算出日時だけ更新）
+    - キーが変わった物件はメモリのキャッシュにあればそれを、なければ採点した結果を書き込む
+
+    Args:
+        load_stored: キーが同じ保存済みの行の結果も読み込んで返す
+        write: 保存する（False ならキャッシュだけを使って結果を返す）
+
+    Returns:
+        ({ターゲット層: 物件ごとのスコア結果}, 書き込んだ行数)。load_stored でなければ
+        キーが同じ保存済みの行の結果は None
+    """
+    cache = SCORE_CACHE if cache is None else cache
+    now = now or datetime.now()
+    target_types = list(target_types)
+    ids = frame['id'].tolist()
+    keys = score_keys(frame, scorer, target_types, now)
+    stored = stored_score_keys(session, ids, target_types) if write or load_stored else {}
+
+    results = {target_type: [None] * len(ids) for target_type in target_types}
+    changed = {target_type: [] for target_type in target_types}
+    missing = {target_type: [] for target_type in target_types}
+    reused, touched = {}, []
+    for target_type in target_types:
+        for i, (property_id, key) in enumerate(zip(ids, keys[target_type])):
+            row = stored.get((property_id, target_type))
+            if row is not None and row[1] == key:
+                cache.record_stored()
+                if not row[2]:
+                    touched.append(row[0])
+                if load_stored:
+                    reused[row[0]] = (target_type, i)
+                continue
+            changed[target_type].append(i)
+            results[target_type][i] = cache.get(key)
+            if results[target_type][i] is None:
+                missing[target_type].append(i)
+
+    # キャッシュにない物件だけを採点（カテゴリ別スコアは全ターゲット層で1回）
+    rows = sorted({i for positions in missing.values() for i in positions})
+    if rows:
+        needed = [target_type for target_type in target_types if missing[target_type]]
+        subset = frame.iloc[rows].reset_index(drop=True)
+        position = {i: j for j, i in enumerate(rows)}
+        for target_type, scores in BatchScorer(scorer).score_profiles(subset, needed, now).items():
+            computed = scores.results()
+            for i in missing[target_type]:
+                result = computed[position[i]]
+                results[target_type][i] = result
+                cache.put(keys[target_type][i], result)
+
+    for row_id, detail in (session.execute(
+            select(PropertyScore.id, PropertyScore.detail).where(PropertyScore.id.in_(list(reused)))
+    ) if reused else ()):
+        target_type, i = reused[row_id]
+        results[target_type][i] = json.loads(detail)
+
+    written = 0
+    if write:
+        for target_type in target_types:
+            written += save_scores(session, [
+                (ids[i], results[target_type][i], keys[target_type][i]) for i in changed[target_type]
+            ], target_type)
+        for start in range(0, len(touched), CHUNK_SIZE):
+            session.execute(
+                update(PropertyScore).where(PropertyScore.id.in_(touched[start:start + CHUNK_SIZE]))
+                .values(calculated_at=now)
+            )
+    return results, written
+
+
+def rescore_properties(session, property_ids: Optional[Iterable[int]] = None, stale_only: bool = False,
+                       target_types: Optional[Iterable[str]] = None, batch_size: int = SCORE_BATCH_SIZE,
+                       cache: Optional[ScoreCache] = None) -> int:
+    """
+    販売中物件のスコアを算出してターゲット層ごとに保存（キーが変わった行だけを採点・保存）
+
+    Args:
+        property_ids: 対象の物件ID（省略時は販売中の全物件）
+        stale_only: いずれかのターゲット層で未算出・古いスコアの物件だけを対象にする
+        target_types: 保存する重みプロファイル（省略時は全プロファイル）
+        cache: スコアのキャッシュ（省略時はプロセス内で共有するもの）
+
+    Returns:
+        書き込んだ行数
+    """
+    target_types = list(WEIGHT_PROFILES if target_types is None else target_types)
+    query = session.query(Property.id).filter(Property.is_active == True)
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        if not property_ids:
+            return 0
+        query = query.filter(Property.id.in_(property_ids))
+    if stale_only:
+        ids = sorted({
+            row[0]
+            for target_type in target_types
+            for row in query.outerjoin(PropertyScore, score_join_condition(target_type)).filter(
+                ~fresh_score_condition()
+            )
+        })
+    else:
+        ids = [row[0] for row in query.order_by(Property.id)]
+
+    if property_ids is None:
+        scorer = load_scorer(session)
+    else:
+        # 対象の物件の駅の集計だけを読む（駅ごとの集計なので全駅を読んだときと同じ結果）
+        stations = set()
+        for start in range(0, len(ids), CHUNK_SIZE):
+            stations.update(station for (station,) in session.query(Property.station_name)
+                            .filter(Property.id.in_(ids[start:start + CHUNK_SIZE])))
+        scorer = load_scorer(session, [{'station_name': station} for station in stations])
+
+    if property_ids is None and not stale_only:
+        # 全件の再計算では他の版・版なし（旧スクリプト）の行を片付ける
+        session.execute(delete(PropertyScore).where(or_(
+            PropertyScore.scorer_version == None, PropertyScore.scorer_version != scorer.VERSION
+        )))
+
+    now = datetime.now()
+    saved = 0
+    for start in range(0, len(ids), batch_size):
+        frame = load_property_frame(session, ids[start:start + batch_size])
+        saved += refresh_scores(session, frame, scorer, target_types, cache, now)[1]
+        session.commit()
+    return saved
+
+
+class ScoredListing:
+    """
+    絞り込み済み物件をスコアの高い順（または指定の順位順）にページ単位で返す
+
+    最新の保存済みスコアを持つ物件は SQL で並べて必要な件数だけ読み、
+    未算出・古いスコアの物件だけをその場で計算して順序を保ったまま合流させる。
+    """
+
+    def __init__(self, session, property_ids, relevance: Optional[Dict[int, int]] = None,
+                 target_type: str = DEFAULT_TARGET):
+        """
+        Args:
+            property_ids: 対象物件IDの SELECT（絞り込み・名寄せ済み）
+            relevance: {物件ID: 順位}。指定するとその順（省略時はスコアの高い順）
+            target_type: 並べるスコアのターゲット層（重みプロファイル）
+        """
+        self.relevance = relevance
+        base = (
+            session.query(Property)
+            .filter(Property.id.in_(property_ids))
+            .outerjoin(PropertyScore, score_join_condition(target_type))
+        )
+        fresh = fresh_score_condition()
+        self._fresh_query = base.filter(fresh)
+
+        total, fresh_sum, avg_price, avg_price_per_sqm = base.with_entities(
+            func.count(Property.id),
+            func.sum(case((fresh, PropertyScore.total_score), else_=0.0)),
+            func.avg(Property.price),
+            func.avg(Property.price_per_sqm),
+        ).one()
+
+        stale_records = [property_record(p) for p in base.filter(~fresh).all()]
+        stale_scores = self._score_stale(session, stale_records, target_type) if stale_records else []
+        self._stale = sorted(
+            ({'property': r, 'score': s} for r, s in zip(stale_records, stale_scores)),
+            key=self._sort_key
+        )
+
+        self.total = total
+        self.stale_count = len(self._stale)
+        score_sum = (fresh_sum or 0.0) + sum(r['score']['total_score'] for r in self._stale)
+        self.avg_score = score_sum / total if total else None
+        self.avg_price = avg_price
+        self.avg_price_per_sqm = avg_price_per_sqm
+
+    @staticmethod
+    def _score_stale(session, records: List[Dict], target_type: str) -> List[Dict]:
+        """
+        未算出・古いスコアの物件を採点（キーが同じ保存済みの行・キャッシュにある結果は採点しない）
+
+        書き込める接続なら保存する。アプリの読み取り専用の接続では保存せず
+        （保存は scripts/rescore_changed.py の役目）、結果はプロセス内のキャッシュに残る。
+        """
+        scorer = load_scorer(session, records, target_type)
+        write = not is_readonly(session.get_bind())
+        scored, _ = refresh_scores(session, property_frame(records), scorer, [target_type],
+                                   load_stored=True, write=write)
+        if write:
+            session.commit()
+        return scored[target_type]
+
+    def _sort_key(self, result: Dict):
+        property_id = result['property']['id']
+        if self.relevance is not None:
+            return (self.relevance.get(property_id, len(self.relevance)), property_id)
+        return (-result['score']['total_score'], property_id)
+
+    def _order_by(self):
+        if self.relevance is not None:
+            return [case(self.relevance, value=Property.id, else_=len(self.relevance)), Property.id]
+        return [PropertyScore.total_score.desc(), Property.id]
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """[{'property': 物件辞書, 'score': スコア結果}, ...] の offset 件目から limit 件"""
+        rows = (
+            self._fresh_query.with_entities(Property, PropertyScore)
+            .order_by(*self._order_by())
+            .limit(offset + limit)
+            .all()
+        )
+        fresh = [{'property': property_record(p), 'score': score_from_row(s)} for p, s in rows]
+        merged = heapq.merge(fresh, self._stale, key=self._sort_key)
+        return list(islice(merged, offset, offset + limit))
@@ -0,0 +1,185 @@
+"""
+変更された物件の再採点（変更駆動でスコアを最新に保つ）
+
+価格・維持コストのスコアは同じ駅の他の販売中物件（StationComparables）に依存するので、
+1件の追加・値下げ・掲載終了でもその駅の物件のスコアが変わる。駅の比較対象が足りない物件は
+市区町村・都道府県のエリア統計（AreaComparables）に依存する。前回の実行以降に変わった
+物件を読み、その駅の販売中物件と、同じ市区町村・都道府県でエリア統計で比べる販売中物件に
+広げて、それらの property_scores の行だけを採点し直す。
+
+変更された物件:
+- 前回の開始以降に last_updated・delisted_at が更新された物件（追加・価格変更・掲載終了）
+- 前回の開始以降に掲載日数・値下げからの経過日数の加点の段が変わった販売中の物件
+- 現行版のスコア行がそろっていない販売中の物件（未採点・販売中に戻った物件・版の変更）
+- スコア行が残っている販売終了の物件（行は削除する）
+
+掲載終了・販売中に戻る更新（delisting）は last_updated を変えないので、販売終了の物件の
+スコア行を消しておき、行がない販売中の物件として販売中に戻ったことを検出する。
+採点はスコアのキャッシュ（score_key）を通すので、キーが変わらない行は書き込まない。
+駅名・市区町村が変わった物件の元の駅・市区町村は分からないので、その物件は全件の再計算
+（recalculate_scores）で直す。
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, delete, func, or_, select
+
+from ..models.database import Property, PropertyScore, ScoreRun
+from .profiles import WEIGHT_PROFILES
+from .safe_scorer import SafePropertyScorer
+from .comparables import MIN_SAMPLES
+from .score_cache import ScoreCache
+from .score_store import CHUNK_SIZE, recency_step_crossed, rescore_properties
+
+logger = logging.getLogger(__name__)
+
+# 前回の開始より少し前から読む（実行中にコミットされた更新の取りこぼしを防ぐ。重複はキャッシュで弾く）
+DEFAULT_OVERLAP = timedelta(seconds=60)
+
+
+def last_run_started(session) -> Optional[datetime]:
+    """前回（完了した回）の開始日時（初回は None）"""
+    return session.query(func.max(ScoreRun.started_at)).filter(ScoreRun.finished_at != None).scalar()
+
+
+def _delisted_with_scores(session) -> List[int]:
+    """スコア行が残っている販売終了の物件ID"""
+    return sorted(
+        property_id for (property_id,) in session.query(Property.id).filter(Property.is_active == False)
+        .filter(select(PropertyScore.id).where(PropertyScore.property_id == Property.id).exists())
+    )
+
+
+def changed_property_ids(session, since: Optional[datetime], target_types: Optional[Iterable[str]] = None,
+                         now: Optional[datetime] = None) -> Set[int]:
+    """
+    since 以降（now まで）に変わった物件ID（since が None なら全物件）
+
+    Args:
+        target_types: スコア行がそろっているか確かめる重みプロファイル（省略時は全プロファイル）
+    """
+    if since is None:
+        return {property_id for (property_id,) in session.query(Property.id)}
+    target_types = list(WEIGHT_PROFILES if target_types is None else target_types)
+    changed = {
+        property_id for (property_id,) in session.query(Property.id).filter(
+            or_(Property.last_updated >= since, Property.delisted_at >= since)
+        )
+    }
+    # 物件が変わらなくても経過日数で値下げスコアの加点が変わる
+    changed.update(
+        property_id for (property_id,) in session.query(Property.id).filter(
+            Property.is_active == True, recency_step_crossed(since, now or datetime.now())
+        )
+    )
+    stored = (
+        select(func.count(PropertyScore.id))
+        .where(PropertyScore.property_id == Property.id,
+               PropertyScore.scorer_version == SafePropertyScorer.VERSION,
+               PropertyScore.target_type.in_(target_types))
+        .correlate(Property).scalar_subquery()
+    )
+    changed.update(
+        property_id for (property_id,) in session.query(Property.id).filter(
+            Property.is_active == True, stored < len(target_types)
+        )
+    )
+    changed.update(_delisted_with_scores(session))
+    return changed
+
+
+def _sufficient(column):
+    """自分を除いても比較対象が MIN_SAMPLES 件以上ある（全指標の値がある販売中物件が多い）エリア名のサブクエリ"""
+    return (
+        select(column)
+        .where(Property.is_active == True, column != None, column != '',
+               Property.price > 0, Property.price_per_sqm > 0, Property.area > 0)
+        .group_by(column)
+        .having(func.count(Property.id) > MIN_SAMPLES)
+    )
+
+
+def _area_fallback_ids(session, wards: List[str], prefectures: List[str]) -> Set[int]:
+    """
+    エリア統計で比べる（駅の比較対象が足りない）販売中物件のうち、wards の市区町村、
+    または prefectures の都道府県で市区町村の比較対象も足りないもの
+    """
+    small_station = or_(Property.station_name == None, Property.station_name == '',
+                        Property.station_name.notin_(_sufficient(Property.station_name)))
+    small_ward = or_(Property.ward == None, Property.ward == '',
+                     Property.ward.notin_(_sufficient(Property.ward)))
+    found = set()
+    for column, names, condition in ((Property.ward, wards, small_station),
+                                     (Property.prefecture, prefectures, and_(small_station, small_ward))):
+        for start in range(0, len(names), CHUNK_SIZE):
+            found.update(
+                property_id for (property_id,) in session.query(Property.id).filter(
+                    Property.is_active == True, column.in_(names[start:start + CHUNK_SIZE]), condition
+                )
+            )
+    return found
+
+
+def affected_property_ids(session, property_ids: Iterable[int]) -> List[int]:
+    """変わった物件と同じ駅の販売中物件、同じ市区町村・都道府県でエリア統計で比べる販売中物件のID"""
+    property_ids = list(property_ids)
+    stations, wards, prefectures = set(), set(), set()
+    affected = set()
+    for start in range(0, len(property_ids), CHUNK_SIZE):
+        for property_id, station, ward, prefecture, is_active in session.query(
+                Property.id, Property.station_name, Property.ward, Property.prefecture, Property.is_active) \
+                .filter(Property.id.in_(property_ids[start:start + CHUNK_SIZE])):
+            if station:
+                stations.add(station)
+            elif is_active:
+                affected.add(property_id)
+            if ward:
+                wards.add(ward)
+            if prefecture:
+                prefectures.add(prefecture)
+    stations = sorted(stations)
+    for start in range(0, len(stations), CHUNK_SIZE):
+        affected.update(
+            property_id for (property_id,) in session.query(Property.id).filter(
+                Property.is_active == True, Property.station_name.in_(stations[start:start + CHUNK_SIZE])
+            )
+        )
+    affected.update(_area_fallback_ids(session, sorted(wards), sorted(prefectures)))
+    return sorted(affected)
+
+
+def rescore_changed(session, target_types: Optional[Iterable[str]] = None, cache: Optional[ScoreCache] = None,
+                    overlap: timedelta = DEFAULT_OVERLAP) -> Dict[str, int]:
+    """
+    前回の実行以降に変わった物件とその駅の物件だけを採点し直して保存（コミットまで行う）
+
+    Returns:
+        件数 {'changed': 変わった物件, 'properties': 採点した物件, 'written': 書き込んだ行, 'removed': 削除した行}
+    """
+    started_at = datetime.now()
+    since = last_run_started(session)
+    changed = changed_property_ids(session, since - overlap if since else None, target_types, started_at)
+    affected = affected_property_ids(session, changed)
+
+    # 販売終了の物件のスコア行を削除
+    inactive = _delisted_with_scores(session)
+    removed = 0
+    for start in range(0, len(inactive), CHUNK_SIZE):
+        removed += session.execute(
+            delete(PropertyScore).where(PropertyScore.property_id.in_(inactive[start:start + CHUNK_SIZE]))
+        ).rowcount
+    session.commit()
+
+    if since is None:
+        # 初回は全物件の再計算（他の版の行も片付ける）
+        written = rescore_properties(session, target_types=target_types, cache=cache)
+    else:
+        written = rescore_properties(session, affected, target_types=target_types, cache=cache) if affected else 0
+    counts = {'changed': len(changed), 'properties': len(affected), 'written': written, 'removed': removed}
+    session.add(ScoreRun(started_at=started_at, finished_at=datetime.now(), changed_count=counts['changed'],
+                         property_count=counts['properties'], written_count=written))
+    session.commit()
+    logger.info(f"Rescored changed properties: {counts}")
+    return counts
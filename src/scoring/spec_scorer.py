@@ -3,9 +3,10 @@
 """
 
 import logging
-import json
 from typing import Dict
 
+from ..models.attributes import FEATURE_BITS, feature_flags_of
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,7 +51,7 @@ class SpecScorer:
             
             # 4. 設備スコア（7点）
             scores['equipment_score'] = self._calculate_equipment_score(
-                property_data.get('features')
+                feature_flags_of(property_data)
             )
             
             # 合計
@@ -132,25 +133,25 @@ class SpecScorer:
         
         return min(5.0, score)
     
-    def _calculate_equipment_score(self, features: str) -> float:
+    # 設備ごとの加点（ディスポーザー・リノベーション済みは件数が偏るので対象外）
+    EQUIPMENT_POINTS = {
+        'auto_lock': 1.5,
+        'delivery_box': 1.5,
+        'pet_ok': 2.0,
+        'floor_heating': 2.0,  # ない場合が多いのであればデカイ
+    }
+    
+    def _calculate_equipment_score(self, flags: int) -> float:
         """
         設備スコア算出（7点満点）
+        
+        Args:
+            flags: 設備のビットマスク（attributes.FEATURE_BITS）
         """
         score = 2.0  # 基礎点
         
-        equipment = {}
-        if features:
-            try:
-                equipment = json.loads(features) if isinstance(features, str) else features
-            except:
-                equipment = {}
-        
-        # 加点幅を増やす
-        if equipment.get('auto_lock'): score += 1.5
-        if equipment.get('delivery_box'): score += 1.5
-        if equipment.get('pet_ok'): score += 2.0
-        if equipment.get('floor_heating'): score += 2.0
-        if equipment.get('disposer'): score += 1.0
-        if equipment.get('renovation'): score += 1.0
+        for key, points in self.EQUIPMENT_POINTS.items():
+            if flags & FEATURE_BITS[key]:
+                score += points
         
         return min(7.0, score)
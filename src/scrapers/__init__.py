@@ -3,5 +3,7 @@ Scrapers package
 """
 
 from .suumo_scraper import SuumoScraper
+from .listing_crawler import ListingCrawler
+from .pipeline import DetailPipeline
 
-__all__ = ['SuumoScraper']
+__all__ = ['SuumoScraper', 'ListingCrawler', 'DetailPipeline']
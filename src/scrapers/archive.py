@@ -0,0 +1,123 @@
+"""
+取得済みHTMLの圧縮アーカイブ（コンテンツアドレス方式）
+
+本文は sha256 をキーに gzip 圧縮して保存し、URLごとの最新本文・取得日時・
+パーサーバージョンを索引（SQLite）で管理する。パーサー修正後は再クロール
+せずにアーカイブから再パースできる。
+"""
+
+import gzip
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from .http_cache import canonical_url, body_hash
+
+
+class HtmlArchive:
+    """取得したページ本文の保存と、再パース対象の管理"""
+
+    def __init__(self, root: str = 'data/html_archive'):
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive_index (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                parser_version INTEGER
+            )
+        """)
+        self._conn.commit()
+
+    def object_path(self, digest: str) -> str:
+        """本文ファイルのパス（objects/先頭2文字/ハッシュ.html.gz）"""
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.html.gz")
+
+    def put(self, url: str, content: bytes) -> str:
+        """
+        本文を保存し、URLの最新本文として索引を更新
+
+        同一本文は一度しか書き込まない。本文が変わった場合はパーサーバージョンをリセットする。
+
+        Returns:
+            本文のハッシュ
+        """
+        digest = body_hash(content)
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO archive_index (url, body_hash, fetched_at, parser_version)
+                VALUES (?, ?, ?, NULL)
+                ON CONFLICT(url) DO UPDATE SET
+                    parser_version = CASE WHEN archive_index.body_hash = excluded.body_hash
+                                          THEN archive_index.parser_version ELSE NULL END,
+                    body_hash = excluded.body_hash,
+                    fetched_at = excluded.fetched_at
+            """, (canonical_url(url), digest, datetime.now().isoformat()))
+            self._conn.commit()
+        return digest
+
+    def load(self, url: str) -> Optional[bytes]:
+        """URLの最新本文を取得（未保存なら None）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body_hash FROM archive_index WHERE url = ?", (canonical_url(url),)
+            ).fetchone()
+        if not row:
+            return None
+        return self.load_object(row[0])
+
+    def load_object(self, digest: str) -> Optional[bytes]:
+        """ハッシュから本文を取得"""
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+
+    def parser_version(self, url: str) -> Optional[int]:
+        """URLの最新本文をパースしたパーサーバージョン（未パースなら None）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parser_version FROM archive_index WHERE url = ?", (canonical_url(url),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_parsed(self, urls: List[str], parser_version: int) -> None:
+        """パース済みとしてパーサーバージョンを記録"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE archive_index SET parser_version = ? WHERE url = ?",
+                [(parser_version, canonical_url(url)) for url in urls]
+            )
+            self._conn.commit()
+
+    def stale_entries(self, parser_version: int, url_pattern: str = '%/bukkengaiyo/%') -> List[Tuple[str, str]]:
+        """
+        現行パーサーより古いバージョンでパースされた（または未パースの）エントリ
+
+        Returns:
+            [(url, body_hash), ...]
+        """
+        with self._lock:
+            return self._conn.execute("""
+                SELECT url, body_hash FROM archive_index
+                WHERE url LIKE ? AND (parser_version IS NULL OR parser_version < ?)
+                ORDER BY url
+            """, (url_pattern, parser_version)).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
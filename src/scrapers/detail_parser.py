@@ -0,0 +1,311 @@
+"""
+物件概要（bukkengaiyo）ページの高速パーサー
+
+BeautifulSoup でページ全体のツリーを組み立てる代わりに、lxml でパースして
+XPath で物件概要テーブルとパンくず・見出しだけを参照する。ラベルの判定は
+ラベル文字列ごとにキャッシュし、正規表現はモジュール読み込み時に一度だけ
+コンパイルする。出力は SuumoScraper._parse_bukkengaiyo（旧実装）と同じ形式。
+"""
+
+import json
+import logging
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# --- 正規表現（モジュール読み込み時に一度だけコンパイル） ---
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+_YEN_TRANS = str.maketrans('０１２３４５６７８９（）／', '0123456789()/')
+_PAREN_RE = re.compile(r'\(.*?\)')
+_ZEN_PAREN_RE = re.compile(r'（.*?）')
+_OKU_RE = re.compile(r'(\d+)億')
+_MAN_RE = re.compile(r'(\d+)万')
+_LEFTOVER_YEN_RE = re.compile(r'(?:万|億|^)(\d+)円')
+_NUMBER_RE = re.compile(r'(\d+)')
+_DECIMAL_RE = re.compile(r'([\d.]+)')
+_YEAR_RE = re.compile(r'(\d{4})年')
+_FLOOR_RE = re.compile(r'(\d+)階')
+_CITY_RE = re.compile(r'[都県](.+?区|.+?市)')
+_BRACKET_RE = re.compile(r'\[.*?\]')
+_ACCESS_NOISE_RE = re.compile(r'[\s\]\[「」]+')
+_ACCESS_RE = re.compile(r'(.+?)\s*(?:歩|徒歩)(\d+)分')
+_STATION_NAME_RE = re.compile(r'」*(.+?)$')
+_H1_PROMO_RE = re.compile(r'^.*?(!|！|】)\s*')
+_H1_PRICE_RE = re.compile(r'[\s\u3000]*[\d,]+[万億]円?.*$')
+_H1_PAREN_RE = re.compile(r'[\(（].*?[\)）]$')
+_H2_PROMO_RE = re.compile(r'^【.*?】\s*')
+
+# --- XPath（コンパイル済み） ---
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_TEXT_NODES = etree.XPath(
+    './/text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]'
+)
+_BREADCRUMB_XPATHS = (
+    etree.XPath(f"//*[{_has_class('breadcrumb_item')}]//a[contains(@href, '/nc_')]"),
+    etree.XPath(f"//*[{_has_class('p-breadcrumb-item')}]//a[contains(@href, '/nc_')]"),
+)
+_H1_XPATHS = (
+    etree.XPath(f"//h1[{_has_class('section_h1-header-title')}]"),
+    etree.XPath(f"//h1[{_has_class('secTitle')}]"),
+    etree.XPath('//h1'),
+)
+_H2_XPATH = etree.XPath(f"//h2[{_has_class('section_h2-header-title')}]")
+_SPEC_TABLES_XPATH = etree.XPath(f"//table[{_has_class('mt10')}]")
+_ROWS_XPATH = etree.XPath('.//tr')
+_CELLS_XPATH = etree.XPath('.//th|.//td')
+
+_PREFECTURES = ('東京都', '神奈川県', '埼玉県', '千葉県')
+_DIRECTIONS = ('南', '東', '西', '北', '南東', '南西', '北東', '北西')
+
+# --- ラベル判定テーブル（旧実装の if/elif の順序どおりに評価） ---
+_LABEL_RULES = (
+    ('title', ('物件名', 'マンション名')),
+    ('price', ('価格',)),
+    ('area', ('専有面積',)),
+    ('layout', ('間取り',)),
+    ('building_age', ('築年月', '完成時期')),
+    ('floor', ('所在階',)),
+    ('direction', ('向き', '方角', 'バルコニー')),
+    ('address', ('所在地',)),
+    ('access', ('交通',)),
+    ('management_fee', ('管理費',)),
+    ('repair_reserve', ('修繕積立金',)),
+)
+
+
+@lru_cache(maxsize=1024)
+def _label_handlers(label: str) -> Tuple[str, ...]:
+    """ラベルに該当する処理名（評価順）。物件名は条件付きのため後続候補も返す"""
+    return tuple(name for name, keywords in _LABEL_RULES if any(k in label for k in keywords))
+
+
+def _text(el, strip: bool = True, separator: str = '') -> str:
+    """BeautifulSoup の get_text() と同じ規則でテキストを取得"""
+    strings = _TEXT_NODES(el)
+    if strip:
+        return separator.join(s.strip() for s in strings if s.strip())
+    return separator.join(strings)
+
+
+def parse_yen_value(value_text: str) -> Optional[int]:
+    """「1億2345万円」や「1万4000円」といった形式を円単位の数値に変換"""
+    if not value_text or value_text == '-':
+        return None
+
+    text = value_text.translate(_YEN_TRANS).replace(',', '')
+    text = _PAREN_RE.sub('', text)
+    text = _ZEN_PAREN_RE.sub('', text)
+
+    total_yen = 0
+    oku_match = _OKU_RE.search(text)
+    if oku_match:
+        total_yen += int(oku_match.group(1)) * 100000000
+    man_match = _MAN_RE.search(text)
+    if man_match:
+        total_yen += int(man_match.group(1)) * 10000
+
+    leftover_match = _LEFTOVER_YEN_RE.search(text)
+    if leftover_match:
+        total_yen += int(leftover_match.group(1))
+    elif not oku_match and not man_match:
+        num_match = _NUMBER_RE.search(text)
+        if num_match:
+            total_yen = int(num_match.group(1))
+
+    return total_yen if total_yen > 0 else None
+
+
+def _parse_access(cell, data: Dict) -> None:
+    """交通欄から全アクセス情報と最寄り駅を抽出"""
+    best_distance = float('inf')
+    best_station = ""
+    access_info_list = []
+
+    for line in _text(cell, strip=False, separator='\n').split('\n'):
+        line_clean = _ACCESS_NOISE_RE.sub(' ', line).strip()
+        if not line_clean or '乗り換え案内' in line_clean or '地図' in line_clean:
+            continue
+
+        m_all = _ACCESS_RE.search(line_clean)
+        if m_all:
+            access_info_list.append(f"{m_all.group(1)} 徒歩{m_all.group(2)}分")
+            dist = int(m_all.group(2))
+            if dist < best_distance:
+                best_distance = dist
+                m_name = _STATION_NAME_RE.search(m_all.group(1))
+                best_station = m_name.group(1).split()[-1] if m_name else m_all.group(1)
+
+    if best_distance != float('inf'):
+        data['station_name'] = best_station
+        data['station_distance'] = best_distance
+    if access_info_list:
+        data['access_info'] = '\n'.join(access_info_list)
+
+
+def _apply_field(handler: str, value: str, cell, data: Dict) -> None:
+    """ラベルに対応する項目を data に設定"""
+    if handler == 'title':
+        data['title'] = value
+    elif handler == 'price':
+        price_yen = parse_yen_value(value)
+        if price_yen:
+            data['price'] = price_yen // 10000  # DBには万円単位で保存
+    elif handler == 'area':
+        m = _DECIMAL_RE.search(value)
+        if m:
+            data['area'] = float(m.group(1))
+    elif handler == 'layout':
+        data['layout'] = value
+    elif handler == 'building_age':
+        m = _YEAR_RE.search(value)
+        if m:
+            data['built_year'] = int(m.group(1))
+            data['building_age'] = max(0, datetime.now().year - data['built_year'])
+    elif handler == 'floor':
+        m = _FLOOR_RE.search(value)
+        if m:
+            data['floor'] = int(m.group(1))
+    elif handler == 'direction':
+        for d in _DIRECTIONS:
+            if d in value:
+                data['direction'] = d
+                break
+    elif handler == 'address':
+        data['address'] = value
+        for pref in _PREFECTURES:
+            if pref in value:
+                data['prefecture'] = pref
+                break
+        m = _CITY_RE.search(value)
+        if m:
+            data['city'] = m.group(1)
+    elif handler == 'access':
+        _parse_access(cell, data)
+    elif handler == 'management_fee':
+        data['management_fee'] = parse_yen_value(value)
+    elif handler == 'repair_reserve':
+        data['repair_reserve'] = parse_yen_value(value)
+
+
+def _extract_title(root) -> str:
+    """パンくず → H1 → H2 の順に物件名を取得"""
+    title = ''
+    for xpath in _BREADCRUMB_XPATHS:
+        found = xpath(root)
+        if found:
+            title = _text(found[0])
+            break
+
+    if not title:
+        for xpath in _H1_XPATHS:
+            found = xpath(root)
+            if found:
+                h1_text = _text(found[0])
+                h1_text = _H1_PROMO_RE.sub('', h1_text)
+                h1_text = _H1_PRICE_RE.sub('', h1_text)
+                h1_text = _H1_PAREN_RE.sub('', h1_text)
+                title = h1_text.strip()
+                break
+
+    if not title or title.isdigit():
+        found = _H2_XPATH(root)
+        if found:
+            t = _text(found[0]).replace('【マンション】', '').strip()
+            title = _H2_PROMO_RE.sub('', t).strip()
+
+    return title
+
+
+def _parse_document(html: bytes):
+    """宣言された文字コード（なければUTF-8）でHTMLをパース"""
+    m = _CHARSET_RE.search(html[:4096])
+    encoding = m.group(1).decode('ascii') if m else 'utf-8'
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding)
+    except LookupError:
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+    return lxml.html.document_fromstring(html, parser=parser)
+
+
+def parse_bukkengaiyo(html: bytes, url: str) -> Dict:
+    """物件概要ページのHTMLから物件情報を抽出"""
+    data = {
+        'source': 'SUUMO',
+        'url': url,
+        'title': '',
+        'price': None,
+        'area': None,
+        'price_per_sqm': None,
+        'building_age': None,
+        'built_year': None,
+        'floor': None,
+        'direction': None,
+        'layout': None,
+        'address': '',
+        'prefecture': '',
+        'city': '',
+        'station_name': '',
+        'station_distance': None,
+        'management_fee': None,
+        'repair_reserve': None,
+        'features': {}
+    }
+
+    try:
+        root = _parse_document(html)
+        data['title'] = _extract_title(root)
+
+        # 設備判定は物件概要テーブル内のテキストのみを対象にする
+        spec_texts: List[str] = []
+
+        for table in _SPEC_TABLES_XPATH(root):
+            for row in _ROWS_XPATH(table):
+                cells = _CELLS_XPATH(row)
+                i = 0
+                while i < len(cells) - 1:
+                    if cells[i].tag == 'th' and cells[i + 1].tag == 'td':
+                        label = _text(cells[i]).replace('ヒント', '').strip()
+                        value = _BRACKET_RE.sub('', _text(cells[i + 1])).strip()
+                        spec_texts.append(label)
+                        spec_texts.append(value)
+
+                        for handler in _label_handlers(label):
+                            # 物件名はタイトル未取得か仮タイトルの場合のみ採用し、それ以外は次の候補へ
+                            if handler == 'title' and data['title'] and '物件' not in data['title']:
+                                continue
+                            _apply_field(handler, value, cells[i + 1], data)
+                            break
+                        i += 2
+                    else:
+                        i += 1
+
+        # ㎡単価を計算
+        if data['price'] and data['area']:
+            data['price_per_sqm'] = (data['price'] * 10000) / data['area']
+
+        # 設備情報
+        spec_text = '\n'.join(spec_texts)
+        features = {}
+        if 'オートロック' in spec_text:
+            features['auto_lock'] = True
+        if 'ペット' in spec_text and '可' in spec_text:
+            features['pet_ok'] = True
+        if '宅配ボックス' in spec_text or '宅配BOX' in spec_text:
+            features['delivery_box'] = True
+
+        data['features'] = json.dumps(features, ensure_ascii=False)
+
+    except Exception as e:
+        logger.error(f"Parse error: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+
+    return data
@@ -0,0 +1,181 @@
+"""
+条件付きGET用のHTTPキャッシュ（SQLite永続化）
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_url(url: str) -> str:
+    """キャッシュキー用にURLを正規化（フラグメント除去・末尾スラッシュ・クエリ順序）"""
+    parts = urlsplit(url.strip())
+    path = parts.path or '/'
+    if not path.endswith('/'):
+        path += '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+def body_hash(content: bytes) -> str:
+    """レスポンス本文のハッシュ（sha256）"""
+    return hashlib.sha256(content).hexdigest()
+
+
+class HttpCache:
+    """ETag / Last-Modified / 本文ハッシュを保存し、再取得時の変更有無を判定する"""
+
+    def __init__(self, db_path: str = 'data/http_cache.db'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT NOT NULL,
+                body_size INTEGER NOT NULL,
+                fetched_at TEXT NOT NULL,
+                checked_at TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+        # defer=True で記録し、まだ confirm されていない応答（URL → 行の値）
+        self._pending: Dict[str, tuple] = {}
+
+        # 今回の実行での集計
+        self.stats = {
+            'requests': 0,
+            'not_modified': 0,     # 304 Not Modified
+            'identical': 0,        # 200だが本文ハッシュが一致
+            'misses': 0,           # 新規 or 変更あり
+            'bytes_downloaded': 0,
+            'bytes_saved': 0,      # 304で転送されなかった本文サイズ
+        }
+
+    def get(self, url: str) -> Optional[Dict]:
+        """キャッシュエントリを取得"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body_hash, body_size FROM http_cache WHERE url = ?",
+                (canonical_url(url),)
+            ).fetchone()
+        if not row:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'body_hash': row[2], 'body_size': row[3]}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """再取得時に付与する If-None-Match / If-Modified-Since"""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_not_modified(self, url: str) -> None:
+        """304を受け取った場合の記録"""
+        entry = self.get(url)
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['not_modified'] += 1
+            if entry:
+                self.stats['bytes_saved'] += entry['body_size']
+            self._conn.execute("UPDATE http_cache SET checked_at = ? WHERE url = ?", (now, canonical_url(url)))
+            self._conn.commit()
+
+    def record_response(self, url: str, content: bytes, etag: Optional[str] = None,
+                        last_modified: Optional[str] = None, defer: bool = False) -> bool:
+        """
+        200レスポンスを記録
+
+        Args:
+            defer: 本文ハッシュ・ETag をすぐには保存せず、confirm されるまで保留する
+                   （パース・DB書き込みが済む前に失敗したページを次回「未変更」と扱わないため）
+
+        Returns:
+            前回と本文が同一なら True（パース・DB書き込みを省略してよい）
+        """
+        entry = self.get(url)
+        digest = body_hash(content)
+        unchanged = entry is not None and entry['body_hash'] == digest
+        now = datetime.now().isoformat()
+        row = (canonical_url(url), etag, last_modified, digest, len(content), now, now)
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_downloaded'] += len(content)
+            if unchanged:
+                self.stats['identical'] += 1
+            else:
+                self.stats['misses'] += 1
+            if defer and not unchanged:
+                self._pending[row[0]] = row
+                return unchanged
+            self._write(row)
+        return unchanged
+
+    def confirm(self, urls) -> int:
+        """保留中の応答を保存（DB書き込みが済んだページ）。保存した件数を返す"""
+        with self._lock:
+            rows = [row for row in (self._pending.pop(canonical_url(url), None) for url in urls) if row]
+            for row in rows:
+                self._write(row)
+        return len(rows)
+
+    def discard(self, urls) -> None:
+        """保留中の応答を捨てる（次回は変更ありとして取得・パースし直す）"""
+        with self._lock:
+            for url in urls:
+                self._pending.pop(canonical_url(url), None)
+
+    def _write(self, row: tuple) -> None:
+        """エントリを保存（ロックは呼び出し側）"""
+        self._conn.execute("""
+            INSERT INTO http_cache (url, etag, last_modified, body_hash, body_size, fetched_at, checked_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash,
+                body_size = excluded.body_size,
+                fetched_at = CASE WHEN http_cache.body_hash = excluded.body_hash
+                                  THEN http_cache.fetched_at ELSE excluded.fetched_at END,
+                checked_at = excluded.checked_at
+        """, row)
+        self._conn.commit()
+
+    def invalidate(self, urls) -> None:
+        """エントリを削除（次回の取得は条件付きGETにせず、本文も変更ありとして扱う）"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM http_cache WHERE url = ?", [(canonical_url(url),) for url in urls])
+            self._conn.commit()
+
+    @property
+    def hits(self) -> int:
+        return self.stats['not_modified'] + self.stats['identical']
+
+    def summary(self) -> str:
+        """集計結果の文字列表現"""
+        s = self.stats
+        hit_rate = (self.hits / s['requests'] * 100) if s['requests'] else 0.0
+        return (
+            f"HTTPキャッシュ: {s['requests']}件中 ヒット{self.hits}件 "
+            f"(304: {s['not_modified']} / 同一本文: {s['identical']}) ミス{s['misses']}件 "
+            f"ヒット率{hit_rate:.1f}% / 転送 {s['bytes_downloaded'] / 1024 / 1024:.1f}MB "
+            f"/ 削減 {s['bytes_saved'] / 1024 / 1024:.1f}MB"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
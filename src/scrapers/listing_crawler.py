@@ -0,0 +1,255 @@
+"""
+SUUMO検索結果（一覧ページ）のクローラー
+
+都道府県・市区町村（sc_）・駅（ek_）どの検索URLでも、一覧の物件リスト部分
+（#js-bukkenList）だけを見て物件概要ページのURLを順次返す。ページ送りの
+最終ページを検出した時点で巡回を止める。
+"""
+
+import logging
+import re
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from lxml import etree
+
+from .detail_parser import parse_yen_value, _parse_document
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://suumo.jp"
+
+# /ms/chuko/<都道府県>/.../nc_<物件ID>/ 形式の物件リンク
+_PROPERTY_HREF_RE = re.compile(r'^(?:https?://suumo\.jp)?(/ms/chuko/[a-z]+/(?:[^/?#]+/)*?nc_(\d+))(?:/|$|\?|#)')
+_PAGE_PARAM_RE = re.compile(r'[?&]page=(\d+)')
+
+_BUKKEN_LIST_XPATH = etree.XPath("//div[@id='js-bukkenList']")
+_ANCHOR_HREF_XPATH = etree.XPath('.//a/@href')
+_PAGINATION_HREF_XPATH = etree.XPath(
+    "//*[contains(@class, 'pagination')]//a/@href"
+)
+_CARD_XPATH = etree.XPath(".//div[contains(concat(' ', normalize-space(@class), ' '), ' property_unit ')]")
+_CARD_TITLE_XPATH = etree.XPath(".//h2[contains(@class, 'property_unit-title')]//a")
+_CARD_DL_XPATH = etree.XPath('.//dl')
+
+_AREA_RE = re.compile(r'([\d.]+)')
+_YEAR_RE = re.compile(r'(\d{4})年')
+_CARD_STATION_RE = re.compile(r'「(.+?)」.*?(?:歩|徒歩)(\d+)分')
+
+
+def listing_url(prefecture: str, ward: Optional[str] = None, station: Optional[str] = None) -> str:
+    """
+    検索URLを組み立てる
+
+    例: listing_url('tokyo', ward='chiyoda') -> https://suumo.jp/ms/chuko/tokyo/sc_chiyoda/
+        listing_url('tokyo', station='05480') -> https://suumo.jp/ms/chuko/tokyo/ek_05480/
+    """
+    path = f"/ms/chuko/{prefecture}/"
+    if ward:
+        path += f"sc_{ward}/"
+    elif station:
+        path += f"ek_{station}/"
+    return BASE_URL + path
+
+
+def page_url(search_url: str, page: int) -> str:
+    """検索URLに page パラメータを付与（1ページ目はそのまま）"""
+    if page <= 1:
+        return search_url
+    parts = urlsplit(search_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'page']
+    query.append(('page', str(page)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def canonical_property_url(href: str) -> Optional[Tuple[str, str]]:
+    """
+    物件リンクを物件概要ページの正規URLに変換
+
+    Returns:
+        (正規URL, source_id)。物件リンクでなければ None
+    """
+    m = _PROPERTY_HREF_RE.match(href.strip())
+    if not m:
+        return None
+    return f"{BASE_URL}{m.group(1)}/bukkengaiyo/", m.group(2)
+
+
+def parse_listing(html: bytes):
+    """一覧ページをパース（宣言された文字コードで）"""
+    return _parse_document(html)
+
+
+def bukken_list(root):
+    """物件リスト部分（おすすめ枠・ナビを除外）。見つからなければページ全体"""
+    found = _BUKKEN_LIST_XPATH(root)
+    return found[0] if found else root
+
+
+def extract_property_urls(root) -> List[Tuple[str, str]]:
+    """一覧ページから (物件概要URL, source_id) を出現順・重複なしで抽出"""
+    results = []
+    seen = set()
+    for href in _ANCHOR_HREF_XPATH(bukken_list(root)):
+        found = canonical_property_url(href)
+        if found and found[1] not in seen:
+            seen.add(found[1])
+            results.append(found)
+    return results
+
+
+def find_last_page(root) -> Optional[int]:
+    """ページ送りから最終ページ番号を取得（ページ送りがなければ None）"""
+    pages = [int(m.group(1)) for href in _PAGINATION_HREF_XPATH(root)
+             for m in [_PAGE_PARAM_RE.search(href)] if m]
+    return max(pages) if pages else None
+
+
+def parse_listing_cards(root) -> List[Dict]:
+    """
+    一覧ページの物件カードから価格・面積・間取り・駅・築年を抽出
+
+    カードで分かる項目だけを持つ辞書を返す（値が読めない項目は None）。
+    """
+    cards = []
+    for unit in _CARD_XPATH(bukken_list(root)):
+        link = _CARD_TITLE_XPATH(unit)
+        hrefs = [link[0].get('href', '')] if link else _ANCHOR_HREF_XPATH(unit)
+        found = next((f for f in map(canonical_property_url, hrefs) if f), None)
+        if not found:
+            continue
+
+        card = {
+            'url': found[0],
+            'source_id': found[1],
+            'title': link[0].text_content().strip() if link else '',
+            'price': None,
+            'area': None,
+            'layout': None,
+            'building_age': None,
+            'built_year': None,
+            'address': None,
+            'station_name': None,
+            'station_distance': None,
+        }
+        for dl in _CARD_DL_XPATH(unit):
+            dt, dd = dl.find('dt'), dl.find('dd')
+            if dt is None or dd is None:
+                continue
+            label = dt.text_content().strip()
+            value = dd.text_content().strip()
+            if '価格' in label:
+                price_yen = parse_yen_value(value)
+                if price_yen:
+                    card['price'] = price_yen // 10000
+            elif '専有面積' in label:
+                m = _AREA_RE.search(value)
+                if m:
+                    card['area'] = float(m.group(1))
+            elif '間取り' in label:
+                card['layout'] = value
+            elif '築年月' in label:
+                m = _YEAR_RE.search(value)
+                if m:
+                    card['built_year'] = int(m.group(1))
+                    card['building_age'] = max(0, datetime.now().year - card['built_year'])
+            elif '所在地' in label:
+                card['address'] = value
+            elif '駅' in label:
+                m = _CARD_STATION_RE.search(value)
+                if m:
+                    card['station_name'] = m.group(1)
+                    card['station_distance'] = int(m.group(2))
+        cards.append(card)
+    return cards
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """イテラブルを size 件ずつのリストに分割"""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ListingCrawler:
+    """検索結果一覧を巡回して物件概要URLを順次返す"""
+
+    def __init__(self, scraper, max_pages: Optional[int] = None):
+        """
+        Args:
+            scraper: SuumoScraper（接続プール・レート制限・キャッシュを共有）
+            max_pages: 巡回ページ数の上限（None なら最終ページまで）
+        """
+        self.scraper = scraper
+        self.max_pages = max_pages
+        self.completed = False  # 直前の巡回が最終ページまでエラーなく終わったか（掲載終了の判定用）
+
+    def _fetch_listing(self, url: str) -> Optional[bytes]:
+        """一覧ページを取得。アーカイブがあれば未変更ページはアーカイブから読む"""
+        archive = getattr(self.scraper, 'archive', None)
+        html = self.scraper._fetch_html(url, conditional=archive is not None)
+        if html is None and archive:
+            html = archive.load(url)
+        if html is None:
+            html = self.scraper._fetch_html(url)
+        return html
+
+    def iter_pages(self, search_url: str) -> Iterator[Tuple[int, object]]:
+        """(ページ番号, パース済みページ) を最終ページまで順に返す"""
+        page = 1
+        last_page = None
+        failed = False
+        self.completed = False
+        while True:
+            if last_page is not None and page > last_page:
+                self.completed = not failed  # max_pages ちょうどで最終ページまで見た回も含む
+                return
+            if self.max_pages and page > self.max_pages:
+                return
+
+            url = page_url(search_url, page)
+            try:
+                root = parse_listing(self.scraper.wait_out_circuit(self._fetch_listing, url))
+            except Exception as e:
+                logger.error(f"Error fetching listing page {url}: {e}")
+                failed = True
+                if last_page is None:
+                    return  # 最終ページが分からないまま失敗したら打ち切る
+                page += 1
+                continue
+
+            found_last = find_last_page(root)
+            last_page = max(found_last or page, page)
+            yield page, root
+            page += 1
+
+    def iter_cards(self, search_url: str) -> Iterator[Dict]:
+        """検索結果の全物件カードを重複なしで順次返す"""
+        seen = set()
+        for page, root in self.iter_pages(search_url):
+            cards = parse_listing_cards(root)
+            if not cards:
+                logger.info(f"No property cards on page {page}, stop: {search_url}")
+                return
+            for card in cards:
+                if card['source_id'] not in seen:
+                    seen.add(card['source_id'])
+                    yield card
+
+    def iter_property_urls(self, search_url: str) -> Iterator[str]:
+        """検索結果の全物件の物件概要URLを重複なしで順次返す"""
+        seen = set()
+        for page, root in self.iter_pages(search_url):
+            urls = extract_property_urls(root)
+            if not urls:
+                logger.info(f"No properties on page {page}, stop: {search_url}")
+                return
+            for url, source_id in urls:
+                if source_id not in seen:
+                    seen.add(source_id)
+                    yield url
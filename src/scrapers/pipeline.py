@@ -0,0 +1,239 @@
+"""
+取得とパースを分離した詳細ページ取得パイプライン
+
+取得スレッドは生のHTMLを上限付きキューに積むだけで、パースは別プロセス
+（ProcessPoolExecutor）で行う。取得側がCPU処理で止まることはなく、パースが
+追いつかないときだけキューが埋まって取得側が待つ（背圧）。どちらの段で
+時間を使ったかを集計し、取得律速かパース律速かを報告する。
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .detail_parser import parse_bukkengaiyo
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _parse_timed(html: bytes, url: str) -> Tuple[Dict, float]:
+    """ワーカープロセスでパースし、結果とCPU時間を返す"""
+    started = time.process_time()
+    detail = parse_bukkengaiyo(html, url)
+    return detail, time.process_time() - started
+
+
+class DetailPipeline:
+    """取得スレッド → 上限付きキュー → パース用プロセスプール"""
+
+    def __init__(self, scraper, parse_workers: Optional[int] = None, queue_size: Optional[int] = None):
+        """
+        Args:
+            scraper: SuumoScraper（取得スレッド数は scraper.concurrency）
+            parse_workers: パース用プロセス数（省略時はCPUコア数）
+            queue_size: 取得済み・未パースのHTMLを溜める上限（省略時は parse_workers の4倍）
+        """
+        self.scraper = scraper
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.parse_workers * 4
+        self._pool = self._new_pool()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'pages': 0,
+            'parsed': 0,
+            'wall': 0.0,
+            'fetch': 0.0,           # 取得スレッドが通信していた時間の合計
+            'fetch_blocked': 0.0,   # パース待ちでキューに積めなかった時間の合計
+            'parse_cpu': 0.0,       # ワーカーでのパースCPU時間の合計
+            'parse_starved': 0.0,   # パース側が取得待ちで空いていた時間
+        }
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # 取得スレッドが動いている状態で fork しないよう spawn で起動する
+        return ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def _add_stat(self, key: str, value: float) -> None:
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def _fetch_worker(self, urls: deque, html_queue: queue.Queue, results: queue.Queue) -> None:
+        """URLを取得して生HTMLをキューへ。未変更・失敗は結果キューへ直接"""
+        while True:
+            try:
+                url = urls.popleft()
+            except IndexError:
+                return
+
+            started = time.monotonic()
+            try:
+                html = self.scraper.wait_out_circuit(self.scraper.fetch_detail_html, url)
+            except Exception as e:
+                logger.error(f"Error fetching property detail {url}: {e}")
+                html = False
+            self._add_stat('fetch', time.monotonic() - started)
+
+            if html is None:
+                results.put((url, self.scraper.unchanged_detail(url)))
+            elif html is False:
+                results.put((url, None))
+            else:
+                started = time.monotonic()
+                html_queue.put((url, html))  # 上限に達していればパースが追いつくまで待つ
+                self._add_stat('fetch_blocked', time.monotonic() - started)
+
+    def _dispatch(self, html_queue: queue.Queue, results: queue.Queue, fetchers: int, pending: deque) -> None:
+        """
+        キューのHTMLをプロセスプールに投入し、完了したものから結果キューへ
+
+        途中で失敗しても（ワーカーの強制終了で BrokenProcessPool など）、パース中・キューに
+        残ったURLを失敗（None）として返し、必ず終了を知らせる（run が待ち続けないように）。
+        """
+        in_flight = {}
+        finished = [0]
+        try:
+            self._dispatch_loop(html_queue, results, fetchers, in_flight, finished)
+        except Exception as e:
+            logger.error(f"Parse dispatcher failed: {e!r}")
+            if isinstance(e, BrokenProcessPool):
+                self._pool = self._new_pool()  # 次のバッチは新しいプールで
+            for url in in_flight.values():
+                results.put((url, None))
+            # 取得スレッドを止め、キューに積まれた分も失敗として返す（空くまで待つ取得スレッドを解放）
+            pending.clear()
+            while finished[0] < fetchers:
+                item = html_queue.get()
+                if item is _DONE:
+                    finished[0] += 1
+                else:
+                    results.put((item[0], None))
+        finally:
+            results.put(_DONE)
+
+    def _dispatch_loop(self, html_queue: queue.Queue, results: queue.Queue, fetchers: int,
+                       in_flight: Dict, finished: List[int]) -> None:
+        """_dispatch の本体（in_flight: パース中の future → URL、finished: 終了した取得スレッド数）"""
+
+        def collect(futures):
+            for future in futures:
+                url = in_flight.pop(future)
+                try:
+                    detail, cpu = future.result()
+                    self._add_stat('parse_cpu', cpu)
+                    self._add_stat('parsed', 1)
+                except Exception as e:
+                    logger.error(f"Parse error {url}: {e}")
+                    detail = None
+                results.put((url, detail))
+
+        while finished[0] < fetchers or in_flight:
+            if finished[0] < fetchers and len(in_flight) < self.parse_workers * 2:
+                started = time.monotonic()
+                try:
+                    item = html_queue.get(timeout=0.05 if in_flight else None)
+                except queue.Empty:
+                    item = None
+                if not in_flight:
+                    self._add_stat('parse_starved', time.monotonic() - started)
+                if item is _DONE:
+                    finished[0] += 1
+                elif item is not None:
+                    url, html = item
+                    try:
+                        in_flight[self._pool.submit(_parse_timed, html, url)] = url
+                    except Exception:
+                        results.put((url, None))
+                        raise
+                if in_flight:
+                    done = [f for f in in_flight if f.done()]
+                    collect(done)
+            else:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                collect(done)
+
+    def run(self, urls: List[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        URLを取得・パースし、終わったものから (url, 詳細データ) を返す
+
+        順序は完了順。未変更ページは unchanged の結果、失敗は None。
+        """
+        if not urls:
+            return
+        started = time.monotonic()
+        pending = deque(urls)
+        html_queue = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue()
+        fetchers = min(self.scraper.concurrency, len(urls))
+
+        def fetch_then_signal():
+            try:
+                self._fetch_worker(pending, html_queue, results)
+            finally:
+                html_queue.put(_DONE)
+
+        threads = [threading.Thread(target=fetch_then_signal, daemon=True) for _ in range(fetchers)]
+        threads.append(threading.Thread(target=self._dispatch, args=(html_queue, results, fetchers, pending),
+                                        daemon=True))
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                self.stats['pages'] += 1
+                yield item
+        finally:
+            pending.clear()  # 途中で打ち切られたら残りは取得しない
+            for t in threads:
+                t.join()
+            self.stats['wall'] += time.monotonic() - started
+
+    def get_property_details(self, urls: List[str]) -> List[Optional[Dict]]:
+        """SuumoScraper.get_property_details と同じく入力順の結果リストを返す"""
+        found = dict(self.run(urls))
+        return [found.get(url) for url in urls]
+
+    def bottleneck(self) -> str:
+        """取得律速か・パース律速か"""
+        s = self.stats
+        if not s['wall']:
+            return '不明'
+        # 取得スレッドがパース待ちで止まっていた割合が大きければパース律速
+        fetchers = max(1, self.scraper.concurrency)
+        blocked_ratio = s['fetch_blocked'] / (s['wall'] * fetchers)
+        parse_busy = s['parse_cpu'] / (s['wall'] * self.parse_workers)
+        return 'パース律速' if blocked_ratio > 0.1 or parse_busy > 0.8 else '取得律速'
+
+    def summary(self) -> str:
+        """スループットの内訳"""
+        s = self.stats
+        rate = s['pages'] / s['wall'] if s['wall'] else 0.0
+        return (
+            f"パイプライン: {s['pages']}ページ / {s['wall']:.1f}秒 ({rate:.2f}ページ/秒) "
+            f"/ 通信 {s['fetch']:.1f}秒・パース待ち {s['fetch_blocked']:.1f}秒"
+            f"（取得{self.scraper.concurrency}スレッド合計） "
+            f"/ パースCPU {s['parse_cpu']:.1f}秒・取得待ち {s['parse_starved']:.1f}秒"
+            f"（{self.parse_workers}プロセス） → {self.bottleneck()}"
+        )
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,226 @@
+"""
+リクエストレート制限モジュール
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダー（秒数 または HTTP日付）を待ち秒数に変換"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpenError(Exception):
+    """エラー急増でサーキットブレーカーが開いている間のリクエスト"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"circuit open, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class AdaptiveRateLimiter:
+    """サーバーの状態に合わせて速度と同時実行数を自動調整するレート制限（スレッドセーフ）
+
+    - トークンバケットで秒間リクエスト数を rate 以下に抑える
+    - 429/503・エラー・レイテンシ悪化で rate と同時実行数を半減し、
+      正常応答が続けば少しずつ上限まで戻す（AIMD）
+    - Retry-After（なければ指数バックオフ）の間は全ワーカーの発行を止める
+    - 直近のエラー率がしきい値を超えたらサーキットを開き、cooldown 秒は即座に
+      CircuitOpenError を送出する。経過後は1件だけ試し、成功すれば閉じる
+
+    使い方: acquire() でリクエスト枠を取得し、応答後に必ず release() で結果を報告する。
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, max_rate: Optional[float] = 1.0, max_concurrency: int = 1,
+                 min_rate: float = 0.05, latency_target: float = 5.0,
+                 error_threshold: float = 0.5, window: int = 20, min_samples: int = 5,
+                 cooldown: float = 60.0, backoff_base: float = 1.0, max_backoff: float = 120.0):
+        """
+        Args:
+            max_rate: 秒間リクエスト数の上限（None または 0 以下で無制限）
+            max_concurrency: 同時リクエスト数の上限
+            min_rate: 減速時の下限（秒間リクエスト数）
+            latency_target: これを超える応答時間（秒）を混雑とみなして減速
+            error_threshold: サーキットを開く直近エラー率
+            window: エラー率を計算する直近リクエスト数
+            min_samples: エラー率を判定する最小件数
+            cooldown: サーキットを開いておく秒数
+            backoff_base: Retry-After がないエラー時の待ち秒数（連続失敗ごとに倍）
+            max_backoff: バックオフの上限（秒）
+        """
+        self.max_rate = max_rate if max_rate and max_rate > 0 else None
+        self.rate = self.max_rate
+        self.min_rate = min_rate
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._tokens = 1.0
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._successes = 0
+        self._consecutive_failures = 0
+        self._last_decrease = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._circuit = 'closed'  # closed / open / half_open
+        self._circuit_until = 0.0
+
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,      # 429 / 503
+            'errors': 0,         # 5xx・通信エラー
+            'slow': 0,           # latency_target 超過
+            'circuit_opens': 0,
+        }
+
+    def _refill(self, now: float) -> None:
+        if self.rate is None:
+            self._tokens = 1.0
+        else:
+            self._tokens = min(1.0, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self) -> None:
+        """リクエスト枠が空くまで待つ（サーキットが開いていれば CircuitOpenError）"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._circuit == 'open':
+                    if now < self._circuit_until:
+                        raise CircuitOpenError(self._circuit_until - now)
+                    self._circuit = 'half_open'
+                if self._circuit == 'half_open' and self._in_flight > 0:
+                    raise CircuitOpenError(self.cooldown)  # 試行中の1件の結果待ち
+
+                if self._in_flight >= self.limit:
+                    self._cond.wait()
+                    continue
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self._in_flight += 1
+                    self.stats['requests'] += 1
+                    return
+                self._cond.wait((1.0 - self._tokens) / self.rate)
+
+    def _decrease(self, now: float) -> None:
+        """乗算的減少（同時に返ってきた失敗で二重に減らさないよう1秒に1回まで）"""
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.limit = max(1, self.limit // 2)
+        if self.rate is not None:  # 無制限設定では同時実行数のみ調整
+            self.rate = max(self.min_rate, self.rate / 2)
+        self._successes = 0
+
+    def _increase(self) -> None:
+        """加算的増加（現在の同時実行数ぶん成功が続くごとに1段階戻す）"""
+        self._successes += 1
+        if self._successes < self.limit:
+            return
+        self._successes = 0
+        self.limit = min(self.max_concurrency, self.limit + 1)
+        if self.rate is not None:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+    def release(self, status: Optional[int] = None, latency: Optional[float] = None,
+                retry_after: Optional[float] = None, error: bool = False) -> None:
+        """
+        リクエスト結果を報告して枠を返す
+
+        Args:
+            status: HTTPステータス（通信エラー時は None）
+            latency: 応答時間（秒）
+            retry_after: Retry-After ヘッダーの秒数
+            error: 通信エラー（タイムアウト・接続失敗）
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._in_flight = max(0, self._in_flight - 1)
+
+            throttled = status in self.THROTTLE_STATUSES
+            failed = error or throttled or (status is not None and status >= 500)
+            self._outcomes.append(failed)
+
+            if failed:
+                self._consecutive_failures += 1
+                self.stats['throttled' if throttled else 'errors'] += 1
+                if retry_after is None:
+                    retry_after = min(self.max_backoff,
+                                      self.backoff_base * 2 ** (self._consecutive_failures - 1))
+                    retry_after *= random.uniform(0.8, 1.2)
+                self._paused_until = max(self._paused_until, now + retry_after)
+                self._decrease(now)
+            else:
+                self._consecutive_failures = 0
+                if latency is not None and latency > self.latency_target:
+                    self.stats['slow'] += 1
+                    self._decrease(now)
+                else:
+                    self._increase()
+
+            if self._circuit == 'half_open':
+                if failed:
+                    self._open_circuit(now)
+                else:
+                    self._circuit = 'closed'
+                    self._outcomes.clear()
+                    logger.info("Circuit closed")
+            elif self._circuit == 'closed' and len(self._outcomes) >= self.min_samples \
+                    and sum(self._outcomes) / len(self._outcomes) >= self.error_threshold:
+                self._open_circuit(now)
+
+            self._cond.notify_all()
+
+    def _open_circuit(self, now: float) -> None:
+        self._circuit = 'open'
+        self._circuit_until = now + self.cooldown
+        self.stats['circuit_opens'] += 1
+        logger.warning(f"Circuit opened for {self.cooldown:.0f}s (rate={self.rate}, limit={self.limit})")
+
+    @property
+    def circuit_state(self) -> str:
+        return self._circuit
+
+    def summary(self) -> str:
+        """集計結果の文字列表現"""
+        s = self.stats
+        rate = f"{self.rate:.2f}/{self.max_rate:.2f}件/秒" if self.rate is not None else "無制限"
+        return (
+            f"レート制限: {s['requests']}件 / 429・503: {s['throttled']}件 / エラー: {s['errors']}件 "
+            f"/ 低速: {s['slow']}件 / 遮断: {s['circuit_opens']}回 "
+            f"/ 現在 {rate}・同時{self.limit}/{self.max_concurrency}"
+        )
@@ -2,16 +2,23 @@
 SUUMO scraper for mansion properties - 修正版
 """
 
-import time
+import asyncio
 import logging
 import re
 import json
+import time
 from typing import List, Dict, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 
+from .rate_limiter import AdaptiveRateLimiter, CircuitOpenError, parse_retry_after
+from .http_cache import HttpCache
+from .archive import HtmlArchive
+from .detail_parser import parse_bukkengaiyo, parse_yen_value
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -22,107 +29,273 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# パース処理を修正したら上げる（アーカイブからの再パース対象判定に使用）
+# v2: lxml版パーサーに移行し、設備判定を物件概要テーブル内に限定
+# v3: 築年（西暦）を出力
+PARSER_VERSION = 3
+
+
+def parse_detail_html(html: bytes, url: str) -> Dict:
+    """物件概要ページのHTMLをパース（再パース用のプロセスプールからも呼べるモジュール関数）"""
+    return parse_bukkengaiyo(html, url)
+
 
 class SuumoScraper:
     """SUUMOから分譲マンション物件情報をスクレイピング"""
     
     BASE_URL = "https://suumo.jp"
+    REQUEST_TIMEOUT = 30
+    MAX_RETRIES = 3  # 429/503・5xx・通信エラー時の再試行回数（待ち時間はレート制限側で管理）
+    CIRCUIT_WAITS = 3  # サーキットが開いていたとき、再開まで待って試し直す回数
     
-    def __init__(self, interval: float = 3.0):
+    def __init__(self, interval: float = 3.0, concurrency: int = 1, cache: Optional[HttpCache] = None,
+                 archive: Optional[HtmlArchive] = None, rate_limiter: Optional[AdaptiveRateLimiter] = None):
+        """
+        Args:
+            interval: 最小リクエスト間隔（秒）。全ワーカー共通で 1/interval 回/秒を上限とする
+            concurrency: 非同期取得時の同時リクエスト数の上限
+            cache: 条件付きGET用のHTTPキャッシュ（指定時は未変更ページのパースを省略）
+            archive: 取得したHTMLの保存先（指定時は全ページを圧縮保存）
+            rate_limiter: 複数のスクレイパーで共有するレート制限（省略時は interval / concurrency から作成）
+        """
         self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.archive = archive
+        # 混雑・429/503で自動的に減速し、回復すれば上限まで戻す
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            max_rate=1.0 / interval if interval > 0 else None,
+            max_concurrency=self.concurrency
+        )
+        
+        # keep-aliveの接続プールを全ワーカーで共有
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(self.concurrency, 10))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
     
+    @staticmethod
+    def _bukkengaiyo_url(property_url: str) -> str:
+        """物件概要ページのURLを構築（二重付与防止）"""
+        if 'bukkengaiyo' in property_url:
+            return property_url
+        return property_url.rstrip('/') + '/bukkengaiyo/'
+    
+    def _fetch_html(self, url: str, conditional: bool = False, defer: bool = False) -> Optional[bytes]:
+        """
+        レート制限付きでページを取得（一覧ページ・詳細ページ共通）
+        
+        conditional=True かつキャッシュ有効時は If-None-Match / If-Modified-Since を付与し、
+        304 または前回と同一本文なら None を返す。defer=True なら本文ハッシュ・ETag の保存を
+        confirm_saved まで保留する。
+        """
+        headers = self.cache.conditional_headers(url) if (conditional and self.cache) else {}
+        response = self._get_with_retry(url, headers)
+        
+        if response.status_code == 304 and self.cache:
+            self.cache.record_not_modified(url)
+            return None
+        response.raise_for_status()
+        
+        if self.archive:
+            self.archive.put(url, response.content)
+        
+        if self.cache:
+            unchanged = self.cache.record_response(
+                url,
+                response.content,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                defer=defer
+            )
+            if conditional and unchanged:
+                return None
+        return response.content
+    
+    def _get_with_retry(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        """
+        レート制限を通してGET。429/503・5xx・通信エラーは再試行する
+        
+        待ち時間（Retry-After・指数バックオフ）はレート制限側が全ワーカー共通で管理する。
+        サーキットが開いている間は CircuitOpenError を送出する。
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.REQUEST_TIMEOUT)
+            except requests.RequestException:
+                self.rate_limiter.release(error=True)
+                if attempt == self.MAX_RETRIES:
+                    raise
+                logger.warning(f"Request failed, retrying ({attempt + 1}/{self.MAX_RETRIES}): {url}")
+                continue
+            
+            self.rate_limiter.release(
+                status=response.status_code,
+                latency=time.monotonic() - started,
+                retry_after=parse_retry_after(response.headers.get('Retry-After'))
+            )
+            if response.status_code in AdaptiveRateLimiter.THROTTLE_STATUSES or response.status_code >= 500:
+                if attempt < self.MAX_RETRIES:
+                    logger.warning(f"HTTP {response.status_code}, retrying ({attempt + 1}/{self.MAX_RETRIES}): {url}")
+                    continue
+            return response
+    
+    def wait_out_circuit(self, fetch, url: str):
+        """
+        fetch(url) を呼び、サーキットが開いていれば再開まで待って試し直す
+
+        CIRCUIT_WAITS 回待っても開いたままなら CircuitOpenError を送出する。
+        """
+        for attempt in range(self.CIRCUIT_WAITS + 1):
+            try:
+                return fetch(url)
+            except CircuitOpenError as e:
+                if attempt == self.CIRCUIT_WAITS:
+                    raise
+                logger.warning(f"Circuit open, waiting {e.retry_in:.0f}s before retrying: {url}")
+                time.sleep(e.retry_in)
+    
+    def probe_status(self, url: str) -> Optional[int]:
+        """
+        HEAD でページの有無だけを確認（本文は取得しない。掲載終了の確認用）
+        
+        Returns:
+            HTTPステータス（リダイレクトは辿った後）。通信エラー・サーキットが開いたままの時は None
+        """
+        try:
+            self.wait_out_circuit(lambda _: self.rate_limiter.acquire(), url)
+        except CircuitOpenError as e:
+            logger.warning(f"HEAD skipped: {url}: {e}")
+            return None
+        started = time.monotonic()
+        try:
+            response = self.session.head(url, timeout=self.REQUEST_TIMEOUT, allow_redirects=True)
+        except requests.RequestException as e:
+            self.rate_limiter.release(error=True)
+            logger.warning(f"HEAD failed: {url}: {e}")
+            return None
+        self.rate_limiter.release(
+            status=response.status_code,
+            latency=time.monotonic() - started,
+            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+        )
+        return response.status_code
+    
+    def fetch_detail_html(self, property_url: str) -> Optional[bytes]:
+        """
+        物件概要ページのHTMLを取得（パースはしない）
+        
+        キャッシュ有効時にページが前回から変わっておらず、現行パーサーで処理済みなら None を返す。
+        取得した本文の記録は、DBに書き込んでから confirm_saved で確定する。
+        """
+        bukkengaiyo_url = self._bukkengaiyo_url(property_url)
+        html = self._fetch_html(bukkengaiyo_url, conditional=self.cache is not None, defer=True)
+        if html is None and self.archive and (self.archive.parser_version(bukkengaiyo_url) or 0) < PARSER_VERSION:
+            # ページは未変更だが旧パーサーでしか処理していないのでアーカイブから再パース
+            html = self.archive.load(bukkengaiyo_url)
+        return html
+    
+    def forget_detail(self, property_urls: List[str]) -> None:
+        """
+        HTTPキャッシュから詳細ページの記録を消す（次の取得は条件付きGETにせず必ずパースする）
+
+        一覧カードで保存済みの値と食い違うと分かった物件を再取得するときに使う。
+        """
+        if self.cache:
+            self.cache.invalidate([self._bukkengaiyo_url(url) for url in property_urls])
+    
+    @staticmethod
+    def unchanged_detail(property_url: str) -> Dict:
+        """ページ未変更を表す結果（呼び出し側はDB書き込みを省略する）"""
+        return {'source': 'SUUMO', 'url': property_url, 'unchanged': True}
+    
+    def confirm_saved(self, property_urls: List[str]) -> None:
+        """
+        DBへの書き込みが済んだ詳細ページを記録（HTTPキャッシュの本文ハッシュ・ETag と、
+        アーカイブの現行パーサーで処理済みの印）
+
+        記録するまでは次回の取得でも未変更扱いにならないので、パース・書き込みに
+        失敗したページは次回取得し直される。
+        """
+        urls = [self._bukkengaiyo_url(url) for url in property_urls]
+        if self.cache:
+            self.cache.confirm(urls)
+        if self.archive:
+            self.archive.mark_parsed(urls, PARSER_VERSION)
+    
+    def discard_fetched(self, property_urls: List[str]) -> None:
+        """パース・書き込みに失敗した詳細ページの保留中の記録を捨てる"""
+        if self.cache:
+            self.cache.discard([self._bukkengaiyo_url(url) for url in property_urls])
+    
     def get_property_detail(self, property_url: str) -> Optional[Dict]:
-        """物件詳細ページから詳細情報を取得"""
+        """
+        物件詳細ページから詳細情報を取得
+        
+        キャッシュ有効時にページが前回から変わっていなければ、パースせずに
+        {'url': ..., 'unchanged': True} を返す（呼び出し側はDB書き込みを省略する）。
+        DBに書き込んだら confirm_saved を呼ぶ（呼ばなければ次回も取得・パースし直す）。
+        サーキットが開いていれば再開まで待って取得し直す（wait_out_circuit）。
+        """
         try:
             logger.info(f"Fetching property detail: {property_url}")
             
-            # 物件概要ページのURLを構築（二重付与防止）
-            if 'bukkengaiyo' in property_url:
-                bukkengaiyo_url = property_url
-            else:
-                bukkengaiyo_url = property_url.rstrip('/') + '/bukkengaiyo/'
-            
-            response = self.session.get(bukkengaiyo_url)
-            response.raise_for_status()
+            html = self.wait_out_circuit(self.fetch_detail_html, property_url)
+            if html is None:
+                return self.unchanged_detail(property_url)
             
-            soup = BeautifulSoup(response.content, 'lxml')
-            detail = self._parse_bukkengaiyo(soup, property_url)
-            
-            time.sleep(self.interval)
-            return detail
+            return parse_detail_html(html, property_url)
             
+        except CircuitOpenError as e:
+            logger.error(f"Circuit still open, giving up: {property_url}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error fetching property detail: {e}")
             import traceback
             logger.error(traceback.format_exc())
             return None
     
-    def _parse_bukkengaiyo(self, soup: BeautifulSoup, url: str) -> Dict:
-        """物件概要ページから情報を抽出"""
-        data = {
-            'source': 'SUUMO',
-            'url': url,
-            'title': '',
-            'price': None,
-            'area': None,
-            'price_per_sqm': None,
-            'building_age': None,
-            'floor': None,
-            'direction': None,
-            'layout': None,
-            'address': '',
-            'prefecture': '',
-            'city': '',
-            'station_name': '',
-            'station_distance': None,
-            'management_fee': None,
-            'repair_reserve': None,
-            'features': {}
-        }
+    async def get_property_details_async(self, property_urls: List[str], concurrency: Optional[int] = None) -> List[Optional[Dict]]:
+        """
+        複数の物件詳細を並列取得
         
-    def _parse_yen_value(self, value_text: str) -> Optional[int]:
-        """「1億2345万円」や「1万4000円」といった形式を数値（円または万円）に変換"""
-        if not value_text or value_text == '-':
-            return None
-            
-        # 全角を半角に、カンマを除去、不要な記号を除去
-        text = value_text.translate(str.maketrans('０１２３４５６７８９（）／', '0123456789()/'))
-        text = text.replace(',', '')
-        # 括弧内の除去（「(巡回)」などを消して数値抽出を助ける）
-        text = re.sub(r'\(.*?\)', '', text)
-        text = re.sub(r'（.*?）', '', text)
+        同時に concurrency 件までリクエストを投げ、レートは rate_limiter で全体制御する。
         
-        total_yen = 0
+        Returns:
+            property_urls と同じ順序の詳細データ（失敗時は None）
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
         
-        # 億の処理
-        oku_match = re.search(r'(\d+)億', text)
-        if oku_match:
-            total_yen += int(oku_match.group(1)) * 100000000
+        async def fetch_one(url: str) -> Optional[Dict]:
+            async with semaphore:
+                return await asyncio.to_thread(self.get_property_detail, url)
         
-        # 万の処理
-        man_match = re.search(r'(\d+)万', text)
-        if man_match:
-            total_yen += int(man_match.group(1)) * 10000
-            
-        # 円の処理（「万」の後に続く数字も含む）
-        # 例：「1万4000円」の「4000」
-        leftover_match = re.search(r'(?:万|億|^)(\d+)円', text)
-        if leftover_match:
-            total_yen += int(leftover_match.group(1))
-        elif not oku_match and not man_match:
-            # 「万」も「億」も「円」もないが数字だけある場合
-            num_match = re.search(r'(\d+)', text)
-            if num_match:
-                total_yen = int(num_match.group(1))
-                
-        return total_yen if total_yen > 0 else None
+        return await asyncio.gather(*(fetch_one(url) for url in property_urls))
+    
+    def get_property_details(self, property_urls: List[str], concurrency: Optional[int] = None) -> List[Optional[Dict]]:
+        """get_property_details_async の同期版"""
+        if not property_urls:
+            return []
+        return asyncio.run(self.get_property_details_async(property_urls, concurrency))
+    
+    @staticmethod
+    def _parse_yen_value(value_text: str) -> Optional[int]:
+        """「1億2345万円」や「1万4000円」といった形式を数値（円または万円）に変換"""
+        return parse_yen_value(value_text)
 
-    def _parse_bukkengaiyo(self, soup: BeautifulSoup, url: str) -> Dict:
-        """物件概要ページから情報を抽出"""
+    @staticmethod
+    def _parse_bukkengaiyo(soup: BeautifulSoup, url: str) -> Dict:
+        """
+        物件概要ページから情報を抽出（BeautifulSoup版の旧実装）
+        
+        本番のパースは detail_parser.parse_bukkengaiyo を使用。
+        出力の同一性確認とベンチマーク（scripts/bench_parser.py）のために残している。
+        """
         data = {
             'source': 'SUUMO',
             'url': url,
@@ -131,6 +304,7 @@ class SuumoScraper:
             'area': None,
             'price_per_sqm': None,
             'building_age': None,
+            'built_year': None,
             'floor': None,
             'direction': None,
             'layout': None,
@@ -202,7 +376,7 @@ class SuumoScraper:
                             
                             # 価格（億・万円対応）
                             elif '価格' in label:
-                                price_yen = self._parse_yen_value(value)
+                                price_yen = SuumoScraper._parse_yen_value(value)
                                 if price_yen:
                                     # DBには万円単位で保存
                                     data['price'] = price_yen // 10000
@@ -221,7 +395,8 @@ class SuumoScraper:
                             elif '築年月' in label or '完成時期' in label:
                                 m = re.search(r'(\d{4})年', value)
                                 if m:
-                                    age = datetime.now().year - int(m.group(1))
+                                    data['built_year'] = int(m.group(1))
+                                    age = datetime.now().year - data['built_year']
                                     data['building_age'] = max(0, age)  # 0年（築1年未満）も許容
                             
                             # 所在階
@@ -287,11 +462,11 @@ class SuumoScraper:
                             
                             # 管理費
                             elif '管理費' in label:
-                                data['management_fee'] = self._parse_yen_value(value)
+                                data['management_fee'] = SuumoScraper._parse_yen_value(value)
                             
                             # 修繕積立金
                             elif '修繕積立金' in label:
-                                data['repair_reserve'] = self._parse_yen_value(value)
+                                data['repair_reserve'] = SuumoScraper._parse_yen_value(value)
                             
                             i += 2
                         else: